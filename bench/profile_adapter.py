@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+适配器异步剖析脚本
+
+cProfile会把协程挂起时间错记到await语句上，看不出事件循环时间
+到底花在分发、JSON解析还是网络往返；Scalene的async模式能按行
+归因await占比（n_async_await_percent）。用法：
+
+    scalene --async --cli bench/profile_adapter.py
+
+默认跑FastMockExchange（无网络，剖析纯适配器开销）；设置环境变量
+PROFILE_LIVE=1且配置了OKX_API_KEY等时改跑OKXAdapter模拟盘，
+此时await占比高的行即网络RTT，不值得做CPU优化。
+"""
+
+import asyncio
+import os
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# 并发请求数与轮数，放大热路径便于采样
+N_SYMBOLS = 20
+N_ROUNDS = 50
+SYMBOLS = [f'SYM{i}/USDT' for i in range(N_SYMBOLS)]
+
+
+def _build_exchange():
+    """按环境变量选择被剖析的适配器"""
+    if os.getenv('PROFILE_LIVE') == '1':
+        from src.config.settings import get_api_keys
+        from src.exchanges.okx_adapter import OKXAdapter
+        keys = get_api_keys('okx')
+        return OKXAdapter(
+            api_key=keys['api_key'],
+            secret_key=keys['secret_key'],
+            passphrase=keys['passphrase'],
+            sandbox=True,
+        ), ['BTC/USDT', 'ETH/USDT']
+    from src.exchanges.fast_mock_exchange import FastMockExchange
+    return FastMockExchange(), SYMBOLS
+
+
+async def main():
+    exchange, symbols = _build_exchange()
+    await exchange.connect()
+    try:
+        for _ in range(N_ROUNDS):
+            await exchange.get_tickers(symbols)
+            await exchange.get_candles_batch(symbols, '1h', limit=100)
+    finally:
+        await exchange.disconnect()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -9,6 +9,14 @@ import logging
 from pathlib import Path
 import sys
 
+# uvloop替换CPython默认事件循环，调度/回调开销显著更低；
+# Windows或未安装时回退标准循环
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    uvloop = None
+
 # 添加项目根目录到Python路径
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
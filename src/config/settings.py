@@ -1,283 +1,288 @@
-"""
-配置管理系统
-负责加载和管理所有系统配置
-"""
-
-import os
-from pathlib import Path
-from typing import Dict, Any, Optional
-from dataclasses import dataclass
-from dotenv import load_dotenv
-import yaml
-
-
-# 加载环境变量
-env_path = Path(__file__).parent.parent.parent / '.env'
-load_dotenv(env_path)
-
-
-@dataclass
-class ExchangeConfig:
-    """交易所配置"""
-    name: str
-    api_key: Optional[str] = None
-    secret: Optional[str] = None
-    password: Optional[str] = None
-    sandbox: bool = True
-    rate_limit: int = 100  # 每分钟最大请求数
-
-
-@dataclass
-class DatabaseConfig:
-    """数据库配置"""
-    type: str = "sqlite"  # sqlite, postgresql, mysql
-    host: str = "localhost"
-    port: int = 5432
-    username: str = ""
-    password: str = ""
-    database: str = "dmasupertrend"
-    redis_url: str = "redis://localhost:6379/0"
-
-
-@dataclass
-class StrategyConfig:
-    """策略配置"""
-    symbol: str = "BTC/USDT"
-    timeframe: str = "1h"
-    fast_ma: int = 9
-    slow_ma: int = 21
-    super_trend_period: int = 10
-    super_trend_multiplier: float = 3.0
-    risk_per_trade: float = 0.02  # 单笔风险2%
-    max_daily_loss: float = 0.05  # 日最大亏损5%
-
-
-@dataclass
-class RiskConfig:
-    """风控配置"""
-    max_leverage: int = 20
-    min_leverage: int = 3
-    max_position_size: float = 0.3  # 单币种最大30%
-    stop_loss_percent: float = 0.02  # 硬止损2%
-    take_profit_1: float = 1.5  # 第一批止盈1.5倍
-    take_profit_2: float = 2.0  # 第二批止盈2.0倍
-    trailing_stop: float = 0.03  # 移动止盈回撤3%
-    max_consecutive_losses: int = 3  # 熔断机制
-
-
-@dataclass
-class TelegramConfig:
-    """Telegram配置"""
-    enabled: bool = False
-    bot_token: Optional[str] = None
-    chat_id: Optional[str] = None
-    notify_open: bool = True
-    notify_close: bool = True
-    notify_stop: bool = True
-    report_interval: int = 3600  # 每小时报告
-
-
-@dataclass
-class BacktestConfig:
-    """回测配置"""
-    parallel_workers: int = 4
-    cache_ttl: int = 3600
-    optimize_iterations: int = 100
-    train_test_split: float = 0.8
-
-
-@dataclass
-class SystemConfig:
-    """系统总配置"""
-    exchange: ExchangeConfig
-    database: DatabaseConfig
-    strategy: StrategyConfig
-    risk: RiskConfig
-    telegram: TelegramConfig
-    backtest: BacktestConfig
-    
-    # 日志配置
-    log_level: str = "INFO"
-    log_file: str = "logs/trading.log"
-    
-    # 性能配置
-    max_memory_usage: float = 2.0  # GB
-    data_delay_ms: int = 500
-    order_delay_ms: int = 100
-    
-    # 开发环境
-    debug: bool = False
-
-
-def load_config(config_path: Optional[str] = None) -> SystemConfig:
-    """
-    加载配置文件
-    
-    Args:
-        config_path: 配置文件路径，None则使用默认配置
-        
-    Returns:
-        SystemConfig: 系统配置对象
-    """
-    # 默认配置
-    config = {
-        'exchange': {
-            'name': 'okx',
-            'sandbox': True,
-            'rate_limit': 100
-        },
-        'database': {
-            'type': 'sqlite',
-            'database': 'dmasupertrend.db',
-            'redis_url': 'redis://localhost:6379/0'
-        },
-        'strategy': {
-            'symbol': 'BTC/USDT',
-            'timeframe': '1h',
-            'fast_ma': 9,
-            'slow_ma': 21,
-            'super_trend_period': 10,
-            'super_trend_multiplier': 3.0,
-            'risk_per_trade': 0.02,
-            'max_daily_loss': 0.05
-        },
-        'risk': {
-            'max_leverage': 20,
-            'min_leverage': 3,
-            'max_position_size': 0.3,
-            'stop_loss_percent': 0.02,
-            'take_profit_1': 1.5,
-            'take_profit_2': 2.0,
-            'trailing_stop': 0.03,
-            'max_consecutive_losses': 3
-        },
-        'telegram': {
-            'enabled': False,
-            'notify_open': True,
-            'notify_close': True,
-            'notify_stop': True,
-            'report_interval': 3600
-        },
-        'backtest': {
-            'parallel_workers': 4,
-            'cache_ttl': 3600,
-            'optimize_iterations': 100,
-            'train_test_split': 0.8
-        },
-        'log_level': 'INFO',
-        'log_file': 'logs/trading.log',
-        'max_memory_usage': 2.0,
-        'data_delay_ms': 500,
-        'order_delay_ms': 100,
-        'debug': False
-    }
-    
-    # 从环境变量覆盖配置
-    exchange_config = config['exchange']
-    exchange_config['api_key'] = os.getenv('OKX_API_KEY')
-    exchange_config['secret'] = os.getenv('OKX_SECRET')
-    exchange_config['password'] = os.getenv('OKX_PASSWORD')
-    
-    telegram_config = config['telegram']
-    telegram_config['bot_token'] = os.getenv('TELEGRAM_BOT_TOKEN')
-    telegram_config['chat_id'] = os.getenv('TELEGRAM_CHAT_ID')
-    
-    # 如果指定了配置文件，从文件加载
-    if config_path:
-        config_path = Path(config_path)
-        if config_path.exists():
-            with open(config_path, 'r', encoding='utf-8') as f:
-                file_config = yaml.safe_load(f)
-                # 合并配置
-                for key, value in file_config.items():
-                    if key in config and isinstance(config[key], dict) and isinstance(value, dict):
-                        config[key].update(value)
-                    else:
-                        config[key] = value
-    
-    # 创建配置对象
-    system_config = SystemConfig(
-        exchange=ExchangeConfig(**config['exchange']),
-        database=DatabaseConfig(**config['database']),
-        strategy=StrategyConfig(**config['strategy']),
-        risk=RiskConfig(**config['risk']),
-        telegram=TelegramConfig(**config['telegram']),
-        backtest=BacktestConfig(**config['backtest']),
-        log_level=config['log_level'],
-        log_file=config['log_file'],
-        max_memory_usage=config['max_memory_usage'],
-        data_delay_ms=config['data_delay_ms'],
-        order_delay_ms=config['order_delay_ms'],
-        debug=config['debug']
-    )
-    
-    return system_config
-
-
-def save_config(config: SystemConfig, config_path: str) -> None:
-    """
-    保存配置到文件
-    
-    Args:
-        config: 系统配置对象
-        config_path: 保存路径
-    """
-    config_dict = {
-        'exchange': {
-            'name': config.exchange.name,
-            'sandbox': config.exchange.sandbox,
-            'rate_limit': config.exchange.rate_limit
-        },
-        'database': {
-            'type': config.database.type,
-            'host': config.database.host,
-            'port': config.database.port,
-            'database': config.database.database,
-            'redis_url': config.database.redis_url
-        },
-        'strategy': {
-            'symbol': config.strategy.symbol,
-            'timeframe': config.strategy.timeframe,
-            'fast_ma': config.strategy.fast_ma,
-            'slow_ma': config.strategy.slow_ma,
-            'super_trend_period': config.strategy.super_trend_period,
-            'super_trend_multiplier': config.strategy.super_trend_multiplier,
-            'risk_per_trade': config.strategy.risk_per_trade,
-            'max_daily_loss': config.strategy.max_daily_loss
-        },
-        'risk': {
-            'max_leverage': config.risk.max_leverage,
-            'min_leverage': config.risk.min_leverage,
-            'max_position_size': config.risk.max_position_size,
-            'stop_loss_percent': config.risk.stop_loss_percent,
-            'take_profit_1': config.risk.take_profit_1,
-            'take_profit_2': config.risk.take_profit_2,
-            'trailing_stop': config.risk.trailing_stop,
-            'max_consecutive_losses': config.risk.max_consecutive_losses
-        },
-        'telegram': {
-            'enabled': config.telegram.enabled,
-            'notify_open': config.telegram.notify_open,
-            'notify_close': config.telegram.notify_close,
-            'notify_stop': config.telegram.notify_stop,
-            'report_interval': config.telegram.report_interval
-        },
-        'backtest': {
-            'parallel_workers': config.backtest.parallel_workers,
-            'cache_ttl': config.backtest.cache_ttl,
-            'optimize_iterations': config.backtest.optimize_iterations,
-            'train_test_split': config.backtest.train_test_split
-        },
-        'log_level': config.log_level,
-        'log_file': config.log_file,
-        'max_memory_usage': config.max_memory_usage,
-        'data_delay_ms': config.data_delay_ms,
-        'order_delay_ms': config.order_delay_ms,
-        'debug': config.debug
-    }
-    
-    config_path = Path(config_path)
-    config_path.parent.mkdir(parents=True, exist_ok=True)
-    
-    with open(config_path, 'w', encoding='utf-8') as f:
-        yaml.dump(config_dict, f, default_flow_style=False, allow_unicode=True)
\ No newline at end of file
+"""
+配置管理系统
+负责加载和管理所有系统配置
+"""
+
+import functools
+import os
+from collections import ChainMap
+from pathlib import Path
+from typing import Dict, Any, Optional
+from dataclasses import dataclass, field
+from dotenv import load_dotenv
+import yaml
+
+try:
+    # libyaml的C实现，解析/序列化比纯Python快约5-10倍
+    from yaml import CSafeLoader as _YamlLoader, CSafeDumper as _YamlDumper
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader, SafeDumper as _YamlDumper
+
+
+# .env路径只计算一次；实际加载推迟到首次load_config，
+# 不为用不到配置的导入方（测试、短命CLI）付文件扫描成本
+_ENV_PATH = Path(__file__).resolve().parents[2] / '.env'
+
+
+@dataclass(slots=True, frozen=True)
+class ExchangeConfig:
+    """交易所配置"""
+    name: str
+    api_key: Optional[str] = None
+    secret: Optional[str] = None
+    password: Optional[str] = None
+    sandbox: bool = True
+    rate_limit: int = 100  # 每分钟最大请求数
+
+
+@dataclass(slots=True, frozen=True)
+class DatabaseConfig:
+    """数据库配置"""
+    type: str = "sqlite"  # sqlite, postgresql, mysql
+    host: str = "localhost"
+    port: int = 5432
+    username: str = ""
+    password: str = ""
+    database: str = "dmasupertrend"
+    redis_url: str = "redis://localhost:6379/0"
+
+
+@dataclass(slots=True, frozen=True)
+class StrategyConfig:
+    """策略配置"""
+    symbol: str = "BTC/USDT"
+    timeframe: str = "1h"
+    fast_ma: int = 9
+    slow_ma: int = 21
+    super_trend_period: int = 10
+    super_trend_multiplier: float = 3.0
+    risk_per_trade: float = 0.02  # 单笔风险2%
+    max_daily_loss: float = 0.05  # 日最大亏损5%
+
+
+@dataclass(slots=True, frozen=True)
+class RiskConfig:
+    """风控配置（字段与src.risk.risk_manager.RiskConfig一致，可直接传给RiskManager）"""
+    max_leverage: int = 20
+    min_leverage: int = 3
+    max_position_size: float = 0.3  # 单币种最大30%
+    risk_per_trade: float = 0.02  # 单笔风险2%
+    stop_loss_percent: float = 0.02  # 硬止损2%
+    take_profit_1: float = 1.5  # 第一批止盈1.5倍
+    take_profit_2: float = 2.0  # 第二批止盈2.0倍
+    trailing_stop: float = 0.03  # 移动止盈回撤3%
+    max_consecutive_losses: int = 3  # 熔断机制
+    max_daily_loss: float = 0.05  # 日最大亏损5%
+    min_order_size: float = 10.0  # 最小订单金额(USDT)
+
+    # 派生常量（init=False，__post_init__里算一次）：热路径直接乘，
+    # 不重复做除法/复合乘法
+    inv_stop_loss: float = field(init=False)
+    sl_price_mult: float = field(init=False)   # = 1 - stop_loss_percent
+    tp1_price_mult: float = field(init=False)  # = 1 + stop*take_profit_1
+    tp2_price_mult: float = field(init=False)  # = 1 + stop*take_profit_2
+
+    def __post_init__(self):
+        object.__setattr__(self, 'inv_stop_loss', 1.0 / self.stop_loss_percent)
+        object.__setattr__(self, 'sl_price_mult', 1.0 - self.stop_loss_percent)
+        object.__setattr__(self, 'tp1_price_mult',
+                           1.0 + self.stop_loss_percent * self.take_profit_1)
+        object.__setattr__(self, 'tp2_price_mult',
+                           1.0 + self.stop_loss_percent * self.take_profit_2)
+
+
+@dataclass(slots=True, frozen=True)
+class TelegramConfig:
+    """Telegram配置"""
+    enabled: bool = False
+    bot_token: Optional[str] = None
+    chat_id: Optional[str] = None
+    notify_open: bool = True
+    notify_close: bool = True
+    notify_stop: bool = True
+    report_interval: int = 3600  # 每小时报告
+
+
+@dataclass(slots=True, frozen=True)
+class BacktestConfig:
+    """回测配置"""
+    parallel_workers: int = 4
+    cache_ttl: int = 3600
+    optimize_iterations: int = 100
+    train_test_split: float = 0.8
+
+
+@dataclass(slots=True, frozen=True)
+class SystemConfig:
+    """系统总配置"""
+    exchange: ExchangeConfig
+    database: DatabaseConfig
+    strategy: StrategyConfig
+    risk: RiskConfig
+    telegram: TelegramConfig
+    backtest: BacktestConfig
+    
+    # 日志配置
+    log_level: str = "INFO"
+    log_file: str = "logs/trading.log"
+    
+    # 性能配置
+    max_memory_usage: float = 2.0  # GB
+    data_delay_ms: int = 500
+    order_delay_ms: int = 100
+    
+    # 开发环境
+    debug: bool = False
+
+
+# 环境变量在进程生命周期内不变，首次使用时加载.env并读取一次
+_ENV: Optional[Dict[str, Optional[str]]] = None
+
+
+def _get_env() -> Dict[str, Optional[str]]:
+    global _ENV
+    if _ENV is None:
+        load_dotenv(_ENV_PATH)
+        _ENV = {
+            'OKX_API_KEY': os.getenv('OKX_API_KEY'),
+            'OKX_SECRET': os.getenv('OKX_SECRET'),
+            'OKX_PASSWORD': os.getenv('OKX_PASSWORD'),
+            'TELEGRAM_BOT_TOKEN': os.getenv('TELEGRAM_BOT_TOKEN'),
+            'TELEGRAM_CHAT_ID': os.getenv('TELEGRAM_CHAT_ID'),
+        }
+    return _ENV
+
+
+def get_api_keys(exchange: str = 'okx') -> Dict[str, Optional[str]]:
+    """
+    获取交易所API凭证（从环境变量/.env读取）
+
+    Args:
+        exchange: 交易所名称，目前支持'okx'
+
+    Returns:
+        包含api_key/secret/password的字典
+    """
+    env = _get_env()
+    if exchange.lower() == 'okx':
+        return {
+            'api_key': env['OKX_API_KEY'],
+            'secret': env['OKX_SECRET'],
+            'password': env['OKX_PASSWORD'],
+        }
+    return {'api_key': None, 'secret': None, 'password': None}
+
+
+# 无参load_config()的单例：配置对象已冻结，进程内安全共享
+_DEFAULT_SINGLETON: Optional[SystemConfig] = None
+
+
+def load_config(config_path: Optional[str] = None) -> SystemConfig:
+    """
+    加载配置文件
+
+    无参调用返回模块级单例（一次属性读取）；指定文件时结果按
+    (路径, 文件mtime)缓存，配置文件被修改后mtime变化自动失效。
+
+    Args:
+        config_path: 配置文件路径，None则使用默认配置
+
+    Returns:
+        SystemConfig: 系统配置对象
+    """
+    if config_path is None:
+        global _DEFAULT_SINGLETON
+        if _DEFAULT_SINGLETON is None:
+            _DEFAULT_SINGLETON = _load_config_cached(None, 0)
+        return _DEFAULT_SINGLETON
+
+    mtime = 0
+    if config_path:
+        config_path = str(config_path)
+        try:
+            mtime = os.stat(config_path).st_mtime_ns
+        except OSError:
+            mtime = 0
+    return _load_config_cached(config_path, mtime)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_config_cached(config_path: Optional[str], mtime: int) -> SystemConfig:
+    # 如果指定了配置文件，从文件加载
+    file_config: Dict[str, Any] = {}
+    if config_path and mtime:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            file_config = yaml.load(f, Loader=_YamlLoader) or {}
+
+    # 默认值以dataclass字段定义为单一来源，这里只保留与字段默认值
+    # 不同的覆盖项（环境变量、派生默认）；优先级：默认 < 环境变量 < 配置文件
+    env = _get_env()
+    overrides = {
+        'exchange': {'name': 'okx',
+                     'api_key': env['OKX_API_KEY'],
+                     'secret': env['OKX_SECRET'],
+                     'password': env['OKX_PASSWORD']},
+        'database': {'database': 'dmasupertrend.db'},
+        'telegram': {'bot_token': env['TELEGRAM_BOT_TOKEN'],
+                     'chat_id': env['TELEGRAM_CHAT_ID']},
+    }
+
+    def section(name: str) -> ChainMap:
+        return ChainMap(file_config.get(name) or {}, overrides.get(name) or {})
+
+    # SystemConfig自身的标量字段同样依赖dataclass默认值
+    top_keys = ('log_level', 'log_file', 'max_memory_usage',
+                'data_delay_ms', 'order_delay_ms', 'debug')
+    top = {k: file_config[k] for k in top_keys if k in file_config}
+
+    return SystemConfig(
+        exchange=ExchangeConfig(**section('exchange')),
+        database=DatabaseConfig(**section('database')),
+        strategy=StrategyConfig(**section('strategy')),
+        risk=RiskConfig(**section('risk')),
+        telegram=TelegramConfig(**section('telegram')),
+        backtest=BacktestConfig(**section('backtest')),
+        **top
+    )
+
+
+# save_config输出的固定结构：节名 -> 导出的属性列表
+_SAVE_SCHEMA = (
+    ('exchange', ('name', 'sandbox', 'rate_limit')),
+    ('database', ('type', 'host', 'port', 'database', 'redis_url')),
+    ('strategy', ('symbol', 'timeframe', 'fast_ma', 'slow_ma', 'super_trend_period',
+                  'super_trend_multiplier', 'risk_per_trade', 'max_daily_loss')),
+    ('risk', ('max_leverage', 'min_leverage', 'max_position_size', 'risk_per_trade',
+              'stop_loss_percent', 'take_profit_1', 'take_profit_2', 'trailing_stop',
+              'max_consecutive_losses', 'max_daily_loss', 'min_order_size')),
+    ('telegram', ('enabled', 'notify_open', 'notify_close', 'notify_stop', 'report_interval')),
+    ('backtest', ('parallel_workers', 'cache_ttl', 'optimize_iterations', 'train_test_split')),
+)
+_SAVE_TOP_FIELDS = ('log_level', 'log_file', 'max_memory_usage',
+                    'data_delay_ms', 'order_delay_ms', 'debug')
+
+
+def save_config(config: SystemConfig, config_path: str) -> None:
+    """
+    保存配置到文件
+
+    输出结构由_SAVE_SCHEMA数据驱动，单次遍历构建，不再手写
+    逐键的字典字面量。
+
+    Args:
+        config: 系统配置对象
+        config_path: 保存路径
+    """
+    config_dict = {
+        section: {attr: getattr(getattr(config, section), attr) for attr in attrs}
+        for section, attrs in _SAVE_SCHEMA
+    }
+    for attr in _SAVE_TOP_FIELDS:
+        config_dict[attr] = getattr(config, attr)
+
+    config_path = Path(config_path)
+    config_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(config_path, 'w', encoding='utf-8') as f:
+        yaml.dump(config_dict, f, Dumper=_YamlDumper, default_flow_style=False,
+                  allow_unicode=True, sort_keys=False)
@@ -1,346 +1,516 @@
-"""
-事件驱动架构
-定义系统中的所有事件类型和事件管理器
-"""
-
-from dataclasses import dataclass
-from enum import Enum
-from typing import Dict, Any, Optional, List, Callable
-from datetime import datetime
-import asyncio
-from decimal import Decimal
-
-
-class EventType(Enum):
-    """事件类型枚举"""
-    MARKET_DATA = "market_data"  # 市场数据更新
-    SIGNAL = "signal"  # 策略信号
-    ORDER = "order"  # 订单事件
-    TRADE = "trade"  # 交易执行
-    POSITION = "position"  # 持仓更新
-    RISK = "risk"  # 风控事件
-    SYSTEM = "system"  # 系统事件
-
-
-@dataclass
-class Event:
-    """基础事件类"""
-    event_type: EventType
-    timestamp: datetime
-    data: Dict[str, Any]
-    source: str = "unknown"
-    
-    def __post_init__(self):
-        if isinstance(self.timestamp, str):
-            self.timestamp = datetime.fromisoformat(self.timestamp)
-
-
-@dataclass
-class MarketEvent(Event):
-    """市场数据事件"""
-    symbol: str
-    timeframe: str
-    candles: List[Dict[str, Any]]
-    
-    def __init__(self, symbol: str, timeframe: str, candles: List[Dict[str, Any]], source: str = "data_fetcher"):
-        super().__init__(
-            event_type=EventType.MARKET_DATA,
-            timestamp=datetime.now(),
-            data={
-                'symbol': symbol,
-                'timeframe': timeframe,
-                'candles': candles
-            },
-            source=source
-        )
-        self.symbol = symbol
-        self.timeframe = timeframe
-        self.candles = candles
-
-
-@dataclass
-class SignalEvent(Event):
-    """策略信号事件"""
-    symbol: str
-    signal_type: str  # 'buy', 'sell', 'hold'
-    price: float
-    confidence: float
-    metadata: Dict[str, Any] = None
-    
-    def __init__(self, symbol: str, signal_type: str, price: float, 
-                 confidence: float, metadata: Dict[str, Any] = None, source: str = "strategy"):
-        super().__init__(
-            event_type=EventType.SIGNAL,
-            timestamp=datetime.now(),
-            data={
-                'symbol': symbol,
-                'signal_type': signal_type,
-                'price': price,
-                'confidence': confidence,
-                'metadata': metadata or {}
-            },
-            source=source
-        )
-        self.symbol = symbol
-        self.signal_type = signal_type
-        self.price = price
-        self.confidence = confidence
-        self.metadata = metadata or {}
-
-
-@dataclass
-class OrderEvent(Event):
-    """订单事件"""
-    symbol: str
-    order_id: str
-    side: str  # 'buy', 'sell'
-    order_type: str  # 'market', 'limit'
-    price: float
-    amount: float
-    status: str  # 'pending', 'filled', 'cancelled', 'rejected'
-    
-    def __init__(self, symbol: str, order_id: str, side: str, order_type: str,
-                 price: float, amount: float, status: str = 'pending', source: str = "risk_manager"):
-        super().__init__(
-            event_type=EventType.ORDER,
-            timestamp=datetime.now(),
-            data={
-                'symbol': symbol,
-                'order_id': order_id,
-                'side': side,
-                'order_type': order_type,
-                'price': price,
-                'amount': amount,
-                'status': status
-            },
-            source=source
-        )
-        self.symbol = symbol
-        self.order_id = order_id
-        self.side = side
-        self.order_type = order_type
-        self.price = price
-        self.amount = amount
-        self.status = status
-
-
-@dataclass
-class TradeEvent(Event):
-    """交易执行事件"""
-    symbol: str
-    order_id: str
-    side: str
-    price: float
-    amount: float
-    fee: float
-    pnl: float = 0.0
-    
-    def __init__(self, symbol: str, order_id: str, side: str,
-                 price: float, amount: float, fee: float, pnl: float = 0.0, source: str = "exchange"):
-        super().__init__(
-            event_type=EventType.TRADE,
-            timestamp=datetime.now(),
-            data={
-                'symbol': symbol,
-                'order_id': order_id,
-                'side': side,
-                'price': price,
-                'amount': amount,
-                'fee': fee,
-                'pnl': pnl
-            },
-            source=source
-        )
-        self.symbol = symbol
-        self.order_id = order_id
-        self.side = side
-        self.price = price
-        self.amount = amount
-        self.fee = fee
-        self.pnl = pnl
-
-
-@dataclass
-class PositionEvent(Event):
-    """持仓事件"""
-    symbol: str
-    position_type: str  # 'long', 'short', 'flat'
-    size: float
-    entry_price: float
-    mark_price: float
-    unrealized_pnl: float
-    
-    def __init__(self, symbol: str, position_type: str, size: float,
-                 entry_price: float, mark_price: float, unrealized_pnl: float, source: str = "exchange"):
-        super().__init__(
-            event_type=EventType.POSITION,
-            timestamp=datetime.now(),
-            data={
-                'symbol': symbol,
-                'position_type': position_type,
-                'size': size,
-                'entry_price': entry_price,
-                'mark_price': mark_price,
-                'unrealized_pnl': unrealized_pnl
-            },
-            source=source
-        )
-        self.symbol = symbol
-        self.position_type = position_type
-        self.size = size
-        self.entry_price = entry_price
-        self.mark_price = mark_price
-        self.unrealized_pnl = unrealized_pnl
-
-
-@dataclass
-class RiskEvent(Event):
-    """风控事件"""
-    risk_type: str  # 'stop_loss', 'take_profit', 'margin_call', 'breach'
-    level: str  # 'warning', 'critical'
-    message: str
-    details: Dict[str, Any]
-    
-    def __init__(self, risk_type: str, level: str, message: str, 
-                 details: Dict[str, Any] = None, source: str = "risk_manager"):
-        super().__init__(
-            event_type=EventType.RISK,
-            timestamp=datetime.now(),
-            data={
-                'risk_type': risk_type,
-                'level': level,
-                'message': message,
-                'details': details or {}
-            },
-            source=source
-        )
-        self.risk_type = risk_type
-        self.level = level
-        self.message = message
-        self.details = details or {}
-
-
-@dataclass
-class SystemEvent(Event):
-    """系统事件"""
-    system_type: str  # 'start', 'stop', 'error', 'config_update'
-    message: str
-    details: Dict[str, Any] = None
-    
-    def __init__(self, system_type: str, message: str, 
-                 details: Dict[str, Any] = None, source: str = "system"):
-        super().__init__(
-            event_type=EventType.SYSTEM,
-            timestamp=datetime.now(),
-            data={
-                'system_type': system_type,
-                'message': message,
-                'details': details or {}
-            },
-            source=source
-        )
-        self.system_type = system_type
-        self.message = message
-        self.details = details or {}
-
-
-class EventManager:
-    """事件管理器 - 负责事件的分发和处理"""
-    
-    def __init__(self):
-        self._listeners: Dict[EventType, List[Callable]] = {}
-        self._all_listeners: List[Callable] = []
-        self._event_queue: asyncio.Queue = asyncio.Queue()
-        self._running = False
-        self._processing_task = None
-    
-    def subscribe(self, event_type: EventType, callback: Callable):
-        """订阅特定类型事件"""
-        if event_type not in self._listeners:
-            self._listeners[event_type] = []
-        self._listeners[event_type].append(callback)
-    
-    def subscribe_all(self, callback: Callable):
-        """订阅所有事件"""
-        self._all_listeners.append(callback)
-    
-    def unsubscribe(self, event_type: EventType, callback: Callable):
-        """取消订阅"""
-        if event_type in self._listeners:
-            self._listeners[event_type] = [cb for cb in self._listeners[event_type] if cb != callback]
-    
-    def publish(self, event: Event):
-        """发布事件到队列"""
-        self._event_queue.put_nowait(event)
-    
-    async def emit(self, event: Event):
-        """直接触发事件（同步处理）"""
-        # 通知所有监听器
-        for callback in self._all_listeners:
-            try:
-                await self._handle_callback(callback, event)
-            except Exception as e:
-                print(f"Error in all-listener callback: {e}")
-        
-        # 通知特定类型监听器
-        if event.event_type in self._listeners:
-            for callback in self._listeners[event.event_type]:
-                try:
-                    await self._handle_callback(callback, event)
-                except Exception as e:
-                    print(f"Error in typed-listener callback: {e}")
-    
-    async def _handle_callback(self, callback: Callable, event: Event):
-        """处理回调，支持异步和同步函数"""
-        import inspect
-        if inspect.iscoroutinefunction(callback):
-            await callback(event)
-        else:
-            callback(event)
-    
-    async def process_events(self):
-        """处理事件队列"""
-        while self._running:
-            try:
-                event = await asyncio.wait_for(self._event_queue.get(), timeout=1.0)
-                await self.emit(event)
-            except asyncio.TimeoutError:
-                continue
-            except Exception as e:
-                print(f"Error processing event: {e}")
-    
-    async def start(self):
-        """启动事件处理"""
-        if not self._running:
-            self._running = True
-            self._processing_task = asyncio.create_task(self.process_events())
-    
-    async def stop(self):
-        """停止事件处理"""
-        self._running = False
-        if self._processing_task:
-            await self._processing_task
-        # 清空队列
-        while not self._event_queue.empty():
-            self._event_queue.get_nowait()
-    
-    def get_queue_size(self) -> int:
-        """获取队列大小"""
-        return self._event_queue.qsize()
-    
-    async def wait_for_event(self, event_type: EventType, timeout: float = 10.0) -> Optional[Event]:
-        """等待特定类型事件"""
-        try:
-            start_time = asyncio.get_event_loop().time()
-            while True:
-                if asyncio.get_event_loop().time() - start_time > timeout:
-                    return None
-                
-                event = await asyncio.wait_for(self._event_queue.get(), timeout=0.1)
-                if event.event_type == event_type:
-                    return event
-                else:
-                    # 放回队列，继续等待
-                    self._event_queue.put_nowait(event)
-        except asyncio.TimeoutError:
-            return None
\ No newline at end of file
+"""
+事件驱动架构
+定义系统中的所有事件类型和事件管理器
+"""
+
+from collections import deque
+from enum import IntEnum
+from typing import Dict, Any, Optional, List, Callable, ClassVar, Tuple
+from datetime import datetime
+import asyncio
+import json
+import logging
+import sys
+import time
+import types
+
+try:
+    import orjson
+except ImportError:  # orjson为可选加速依赖，缺失时退回标准库json
+    orjson = None
+
+# 进程启动时记录一次(单调钟, 墙钟)基准。事件时间戳取monotonic_ns
+# （单次时钟读取、无datetime分配），需要墙钟时间时用增量重建
+_MONO_BASE_NS = time.monotonic_ns()
+_WALL_BASE = time.time()
+
+# 预绑定error方法：分发热路径上不做logger属性查找，
+# I/O交由handler处理而不是print直接写stdout
+logger = logging.getLogger(__name__)
+_log_error = logger.error
+
+# 未提供metadata/details时共享同一个不可变空映射，省掉每事件一次
+# 的dict分配；消费方如需修改请先dict(ev.metadata)拷贝
+_EMPTY = types.MappingProxyType({})
+
+
+def _json_default(obj):
+    """JSON序列化兜底：共享的_EMPTY等mappingproxy按普通字典输出，
+    其余不可序列化类型转字符串"""
+    if isinstance(obj, types.MappingProxyType):
+        return dict(obj)
+    return str(obj)
+
+
+class EventType(IntEnum):
+    """事件类型枚举（IntEnum：小整数值直接用作分发表下标）"""
+    MARKET_DATA = 0  # 市场数据更新
+    SIGNAL = 1  # 策略信号
+    ORDER = 2  # 订单事件
+    TRADE = 3  # 交易执行
+    POSITION = 4  # 持仓更新
+    RISK = 5  # 风控事件
+    SYSTEM = 6  # 系统事件
+
+
+class Event:
+    """
+    事件类（标签联合）
+
+    单一slotted类承载所有事件类型，event_type为类型标签。相比
+    每类型一个子类：单一__init__路径、单一类型对分发分支更友好，
+    且省掉一层super()间接。各类型事件用下方的工厂classmethod构造。
+
+    事件只保存标量属性（__slots__），timestamp和data均为惰性计算：
+    高频路径上每秒可能产生成百上千个事件，提前构造datetime对象
+    和data字典是主要的分配开销。
+    """
+
+    __slots__ = (
+        'event_type', 'source', '_ts_ns', '_data',
+        # 各事件类型字段的并集，未用到的slot保持未赋值（不占堆内存）
+        'symbol', 'timeframe', 'candles',
+        'signal_type', 'price', 'confidence', 'metadata',
+        'order_id', 'side', 'order_type', 'amount', 'status',
+        'fee', 'pnl',
+        'position_type', 'size', 'entry_price', 'mark_price', 'unrealized_pnl',
+        'risk_type', 'level', 'message', 'details',
+        'system_type',
+    )
+
+    # 每个事件类型的数据字段，按EventType整数值索引
+    _FIELDS_BY_TYPE: ClassVar[Tuple[Tuple[str, ...], ...]] = (
+        ('symbol', 'timeframe', 'candles'),                                      # MARKET_DATA
+        ('symbol', 'signal_type', 'price', 'confidence', 'metadata'),            # SIGNAL
+        ('symbol', 'order_id', 'side', 'order_type', 'price', 'amount', 'status'),  # ORDER
+        ('symbol', 'order_id', 'side', 'price', 'amount', 'fee', 'pnl'),         # TRADE
+        ('symbol', 'position_type', 'size', 'entry_price', 'mark_price', 'unrealized_pnl'),  # POSITION
+        ('risk_type', 'level', 'message', 'details'),                            # RISK
+        ('system_type', 'message', 'details'),                                   # SYSTEM
+    )
+
+    def __init__(self, event_type: EventType, timestamp=None,
+                 data: Dict[str, Any] = None, source: str = "unknown"):
+        self.event_type = event_type
+        if timestamp is None:
+            self._ts_ns = time.monotonic_ns()
+        else:
+            if isinstance(timestamp, str):
+                wall = datetime.fromisoformat(timestamp).timestamp()
+            elif isinstance(timestamp, datetime):
+                wall = timestamp.timestamp()
+            else:
+                wall = float(timestamp)
+            self._ts_ns = _MONO_BASE_NS + int((wall - _WALL_BASE) * 1e9)
+        self._data = data
+        self.source = source
+
+    @property
+    def epoch(self) -> float:
+        """墙钟时间戳（epoch秒），由单调钟增量重建"""
+        return _WALL_BASE + (self._ts_ns - _MONO_BASE_NS) * 1e-9
+
+    @property
+    def timestamp(self) -> datetime:
+        """事件时间（按需转换，构造时不分配datetime）"""
+        return datetime.fromtimestamp(self.epoch)
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """事件数据字典（首次访问时从字段构建并缓存）"""
+        if self._data is None:
+            self._data = {f: getattr(self, f)
+                          for f in self._FIELDS_BY_TYPE[self.event_type]}
+        return self._data
+
+    def as_df(self):
+        """
+        K线数据的DataFrame视图（仅MARKET_DATA事件）
+
+        交易所适配器返回ccxt原始的[timestamp, open, high, low, close,
+        volume]行，热路径按下标读数即可；需要列标签的慢路径（报表、
+        回测分析）在这里按需构建，pandas的导入和DataFrame分配都不
+        落在事件发布路径上。
+        """
+        import pandas as pd
+
+        candles = self.candles
+        if isinstance(candles, pd.DataFrame):
+            return candles
+        if len(candles) and isinstance(candles[0], dict):
+            return pd.DataFrame(candles)
+        return pd.DataFrame(
+            candles,
+            columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'],
+        )
+
+    def to_json(self) -> bytes:
+        """
+        序列化为JSON字节串（跨进程边界：IPC/Redis/Telegram）
+
+        直接从slot属性构建输出，进程内监听器仍走属性/惰性data，
+        不为序列化额外保留中间字典。
+        """
+        payload = {'event_type': int(self.event_type),
+                   'timestamp': self.epoch,
+                   'source': self.source}
+        for f in self._FIELDS_BY_TYPE[self.event_type]:
+            payload[f] = getattr(self, f)
+        if orjson is not None:
+            return orjson.dumps(payload, default=_json_default)
+        return json.dumps(payload, ensure_ascii=False,
+                          default=_json_default).encode('utf-8')
+
+    @classmethod
+    def from_wire(cls, payload: Dict[str, Any]) -> 'Event':
+        """
+        从反序列化负载（IPC/Redis等）重建事件
+
+        工厂方法要求timestamp为epoch浮点数，字符串/datetime的
+        类型强制转换只在这里做。
+        """
+        event_type = payload.get('event_type')
+        if not isinstance(event_type, EventType):
+            event_type = EventType(event_type)
+        event = cls(
+            event_type=event_type,
+            timestamp=payload.get('timestamp'),
+            data=payload.get('data'),
+            source=payload.get('source', 'unknown'),
+        )
+        data = payload.get('data') or {}
+        for f in cls._FIELDS_BY_TYPE[event_type]:
+            setattr(event, f, data.get(f, payload.get(f)))
+        return event
+
+    # ------------------------------------------------------------------
+    # 工厂方法：每个事件类型一个，直接写slot，无中间字典
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def market(cls, symbol: str, timeframe: str, candles: List[Dict[str, Any]],
+               source: str = "data_fetcher") -> 'Event':
+        """市场数据事件"""
+        ev = cls.__new__(cls)
+        ev.event_type = EventType.MARKET_DATA
+        ev._ts_ns = time.monotonic_ns()
+        ev._data = None
+        ev.source = source
+        ev.symbol = symbol
+        ev.timeframe = timeframe
+        ev.candles = candles
+        return ev
+
+    @classmethod
+    def signal(cls, symbol: str, signal_type: str, price: float,
+               confidence: float, metadata: Dict[str, Any] = None,
+               source: str = "strategy") -> 'Event':
+        """策略信号事件（signal_type: 'buy', 'sell', 'hold'）"""
+        ev = cls.__new__(cls)
+        ev.event_type = EventType.SIGNAL
+        ev._ts_ns = time.monotonic_ns()
+        ev._data = None
+        ev.source = source
+        ev.symbol = symbol
+        ev.signal_type = signal_type
+        ev.price = price
+        ev.confidence = confidence
+        ev.metadata = metadata if metadata else _EMPTY
+        return ev
+
+    @classmethod
+    def order(cls, symbol: str, order_id: str, side: str, order_type: str,
+              price: float, amount: float, status: str = 'pending',
+              source: str = "risk_manager") -> 'Event':
+        """订单事件（status: 'pending', 'filled', 'cancelled', 'rejected'）"""
+        ev = cls.__new__(cls)
+        ev.event_type = EventType.ORDER
+        ev._ts_ns = time.monotonic_ns()
+        ev._data = None
+        ev.source = source
+        ev.symbol = symbol
+        ev.order_id = order_id
+        ev.side = side
+        ev.order_type = order_type
+        ev.price = price
+        ev.amount = amount
+        ev.status = status
+        return ev
+
+    @classmethod
+    def trade(cls, symbol: str, order_id: str, side: str,
+              price: float, amount: float, fee: float, pnl: float = 0.0,
+              source: str = "exchange") -> 'Event':
+        """交易执行事件"""
+        ev = cls.__new__(cls)
+        ev.event_type = EventType.TRADE
+        ev._ts_ns = time.monotonic_ns()
+        ev._data = None
+        ev.source = source
+        ev.symbol = symbol
+        ev.order_id = order_id
+        ev.side = side
+        ev.price = price
+        ev.amount = amount
+        ev.fee = fee
+        ev.pnl = pnl
+        return ev
+
+    @classmethod
+    def position(cls, symbol: str, position_type: str, size: float,
+                 entry_price: float, mark_price: float, unrealized_pnl: float,
+                 source: str = "exchange") -> 'Event':
+        """持仓事件（position_type: 'long', 'short', 'flat'）"""
+        ev = cls.__new__(cls)
+        ev.event_type = EventType.POSITION
+        ev._ts_ns = time.monotonic_ns()
+        ev._data = None
+        ev.source = source
+        ev.symbol = symbol
+        ev.position_type = position_type
+        ev.size = size
+        ev.entry_price = entry_price
+        ev.mark_price = mark_price
+        ev.unrealized_pnl = unrealized_pnl
+        return ev
+
+    @classmethod
+    def risk(cls, risk_type: str, level: str, message: str,
+             details: Dict[str, Any] = None, source: str = "risk_manager") -> 'Event':
+        """风控事件（risk_type: 'stop_loss', 'take_profit', 'margin_call', 'breach'）"""
+        ev = cls.__new__(cls)
+        ev.event_type = EventType.RISK
+        ev._ts_ns = time.monotonic_ns()
+        ev._data = None
+        ev.source = source
+        ev.risk_type = risk_type
+        ev.level = level
+        ev.message = message
+        ev.details = details if details else _EMPTY
+        return ev
+
+    @classmethod
+    def system(cls, system_type: str, message: str,
+               details: Dict[str, Any] = None, source: str = "system") -> 'Event':
+        """系统事件（system_type: 'start', 'stop', 'error', 'config_update'）"""
+        ev = cls.__new__(cls)
+        ev.event_type = EventType.SYSTEM
+        ev._ts_ns = time.monotonic_ns()
+        ev._data = None
+        ev.source = source
+        ev.system_type = system_type
+        ev.message = message
+        ev.details = details if details else _EMPTY
+        return ev
+
+
+# 在导入时intern字段名字符串，让data字典的构建和下游查找
+# 走CPython字符串相等的快路径（指针比较）
+Event._FIELDS_BY_TYPE = tuple(
+    tuple(sys.intern(_f) for _f in _fields) for _fields in Event._FIELDS_BY_TYPE
+)
+
+# 兼容别名：原先的六个事件子类名指向对应的工厂方法，
+# 调用签名与旧构造器一致
+MarketEvent = Event.market
+SignalEvent = Event.signal
+OrderEvent = Event.order
+TradeEvent = Event.trade
+PositionEvent = Event.position
+RiskEvent = Event.risk
+SystemEvent = Event.system
+
+
+class EventManager:
+    """事件管理器 - 负责事件的分发和处理"""
+    
+    def __init__(self):
+        # 监听器存为(callback, is_coro)元组，is_coro在订阅时计算一次，
+        # 避免在每次分发时调用iscoroutinefunction这类慢速自省。
+        # 分发表是按EventType整数值索引的扁平列表：数组下标取代
+        # 每次emit的枚举哈希+相等比较
+        self._listeners: List[List[Tuple[Callable, bool]]] = [[] for _ in EventType]
+        self._all_listeners: List[Tuple[Callable, bool]] = []
+        self._batch_listeners: List[List[Tuple[Callable, bool]]] = [[] for _ in EventType]
+        # wait_for_event的等待者：emit时直接set_result，无需轮询队列
+        self._waiters: List[List[asyncio.Future]] = [[] for _ in EventType]
+        # 单消费者队列：deque的append/popleft是C级O(1)操作，
+        # 省掉asyncio.Queue内部的Future/getter机制；唤醒用一个
+        # asyncio.Event。（如未来出现多消费者再换回asyncio.Queue）
+        self._event_queue: deque = deque()
+        self._wakeup: asyncio.Event = asyncio.Event()
+        self._running = False
+        self._processing_task = None
+        # publish是全系统最热的入口：预绑定队列append和唤醒set，
+        # 每次发布省掉两次属性查找
+        self._queue_append = self._event_queue.append
+        self._queue_extend = self._event_queue.extend
+        self._wakeup_set = self._wakeup.set
+
+    def subscribe(self, event_type: EventType, callback: Callable):
+        """订阅特定类型事件"""
+        self._listeners[event_type].append(
+            (callback, asyncio.iscoroutinefunction(callback))
+        )
+
+    def subscribe_all(self, callback: Callable):
+        """订阅所有事件"""
+        self._all_listeners.append(
+            (callback, asyncio.iscoroutinefunction(callback))
+        )
+
+    def subscribe_batch(self, event_type: EventType, callback: Callable):
+        """
+        批量订阅特定类型事件
+
+        回调每次收到一个同类型事件列表（队列一次排空的所有事件），
+        适合可以合并处理的监听器（如行情聚合）。
+        """
+        self._batch_listeners[event_type].append(
+            (callback, asyncio.iscoroutinefunction(callback))
+        )
+
+    def unsubscribe(self, event_type: EventType, callback: Callable):
+        """取消订阅"""
+        self._listeners[event_type] = [
+            entry for entry in self._listeners[event_type] if entry[0] != callback
+        ]
+
+    def has_subscribers(self, event_type: EventType) -> bool:
+        """该类型事件当前是否有任何接收方
+
+        生产者可据此在无人监听时跳过事件对象的构造和入队，
+        四个列表的真值判断都是C级len检查。
+        """
+        return bool(self._all_listeners
+                    or self._listeners[event_type]
+                    or self._batch_listeners[event_type]
+                    or self._waiters[event_type])
+
+    def publish(self, event: Event):
+        """
+        发布事件到队列
+
+        只做入队+唤醒，生产者立即返回：慢监听器只拖慢消费任务的
+        下一轮批处理，不会把_process_signal/_process_order这类
+        生产者阻塞在自己的发布调用里，也不会递归加深调用栈。
+        """
+        self._queue_append(event)
+        self._wakeup_set()
+
+    def publish_many(self, events) -> None:
+        """批量发布事件：一次入队、一次唤醒，处理循环单次批量消费"""
+        self._queue_extend(events)
+        self._wakeup_set()
+
+    async def emit(self, event: Event):
+        """直接触发事件（同步处理）"""
+        # 通知所有监听器
+        for callback, is_coro in self._all_listeners:
+            try:
+                if is_coro:
+                    await callback(event)
+                else:
+                    callback(event)
+            except Exception:
+                _log_error("Error in all-listener callback", exc_info=True)
+
+        # 通知特定类型监听器
+        listeners = self._listeners[event.event_type]
+        if listeners:
+            for callback, is_coro in listeners:
+                try:
+                    if is_coro:
+                        await callback(event)
+                    else:
+                        callback(event)
+                except Exception:
+                    _log_error("Error in typed-listener callback", exc_info=True)
+
+        # 唤醒wait_for_event的等待者
+        waiters = self._waiters[event.event_type]
+        if waiters:
+            for fut in waiters:
+                if not fut.done():
+                    fut.set_result(event)
+            waiters.clear()
+    
+    async def process_events(self):
+        """处理事件队列"""
+        queue = self._event_queue
+        while self._running:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if not queue:
+                continue
+
+            # 批量排空：把当前已入队的事件一次取完，将await/恢复的
+            # 开销摊到整批事件上，而不是每个事件一次上下文切换
+            batch = []
+            while queue:
+                batch.append(queue.popleft())
+
+            try:
+                await self._emit_batch(batch)
+            except Exception:
+                _log_error("Error processing event batch", exc_info=True)
+
+    async def _emit_batch(self, batch: List[Event]):
+        """分发一批事件：逐事件通知普通监听器，按类型分组通知批量监听器"""
+        for event in batch:
+            await self.emit(event)
+
+        if any(self._batch_listeners):
+            grouped: Dict[EventType, List[Event]] = {}
+            for event in batch:
+                grouped.setdefault(event.event_type, []).append(event)
+
+            for event_type, events in grouped.items():
+                listeners = self._batch_listeners[event_type]
+                if not listeners:
+                    continue
+                for callback, is_coro in listeners:
+                    try:
+                        if is_coro:
+                            await callback(events)
+                        else:
+                            callback(events)
+                    except Exception:
+                        _log_error("Error in batch-listener callback", exc_info=True)
+    
+    async def start(self):
+        """启动事件处理"""
+        if not self._running:
+            self._running = True
+            self._processing_task = asyncio.create_task(self.process_events())
+    
+    async def stop(self):
+        """停止事件处理"""
+        self._running = False
+        self._wakeup.set()  # 唤醒消费任务以退出循环
+        if self._processing_task:
+            await self._processing_task
+        # 清空队列
+        self._event_queue.clear()
+    
+    def get_queue_size(self) -> int:
+        """获取队列大小"""
+        return len(self._event_queue)
+    
+    async def wait_for_event(self, event_type: EventType, timeout: float = 10.0) -> Optional[Event]:
+        """
+        等待特定类型事件
+
+        通过per-type的Future在emit时直接唤醒：不再从主队列取事件
+        再放回（那会打乱事件顺序，且多个等待者互相饿死）。
+        """
+        fut = asyncio.get_running_loop().create_future()
+        waiters = self._waiters[event_type]
+        waiters.append(fut)
+        try:
+            return await asyncio.wait_for(fut, timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            if fut in waiters:
+                waiters.remove(fut)
\ No newline at end of file
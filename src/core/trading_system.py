@@ -1,553 +1,798 @@
-"""
-主交易系统
-协调所有模块，实现完整的交易流程
-"""
-
-import asyncio
-from typing import Dict, Any, Optional, List
-from datetime import datetime
-from loguru import logger
-
-from src.core.events import (
-    EventManager, MarketEvent, SignalEvent, OrderEvent, 
-    TradeEvent, PositionEvent, RiskEvent, SystemEvent, EventType
-)
-from src.config.settings import SystemConfig
-from src.data.data_fetcher import DataFetcher
-from src.data.data_cache import DataCache
-from src.strategies.dma_supertrend import DMASuperTrendStrategy, MarketClassifier, TimeframeOptimizer
-from src.risk.risk_manager import RiskManager, RiskConfig, OrderValidator
-from src.exchanges.exchange_factory import ExchangeFactory
-from src.utils.logger import get_trading_logger
-
-
-class StrategyEngine:
-    """策略执行引擎"""
-    
-    def __init__(self, event_manager: EventManager, config: SystemConfig):
-        self.event_manager = event_manager
-        self.config = config
-        
-        # 初始化策略组件
-        self.strategy = DMASuperTrendStrategy()
-        self.market_classifier = MarketClassifier()
-        self.timeframe_optimizer = TimeframeOptimizer()
-        
-        # 策略状态
-        self.current_timeframe = config.strategy.timeframe
-        self.current_market_state = "trend"
-        
-        self.logger = logger.bind(module="StrategyEngine")
-    
-    async def process_market_data(self, event: MarketEvent):
-        """处理市场数据，生成策略信号"""
-        try:
-            # 1. 分类市场状态
-            df = event.data['candles']
-            if len(df) >= 20:
-                self.current_market_state = self.market_classifier.classify(df)
-            
-            # 2. 优化时间框架（基于市场状态）
-            if self.current_market_state == "range":
-                # 横盘市场，可能需要调整时间框架
-                self.current_timeframe = self.timeframe_optimizer.recommend_timeframe(
-                    symbol=event.data['symbol'],
-                    volatility=0.02,  # 需要从数据计算
-                    capital=10000,  # 需要从配置获取
-                    frequency='medium'
-                )
-            
-            # 3. 生成策略信号
-            current_price = event.data['candles']['close'].iloc[-1]
-            signal, confidence, metadata = self.strategy.generate_signal(
-                event.data['candles'], 
-                current_price
-            )
-            
-            if signal != "hold":
-                # 4. 发布信号事件
-                signal_event = SignalEvent(
-                    symbol=event.data['symbol'],
-                    signal_type=signal,
-                    price=current_price,
-                    confidence=confidence,
-                    metadata={
-                        **metadata,
-                        'market_state': self.current_market_state,
-                        'timeframe': self.current_timeframe,
-                        'source': 'strategy_engine'
-                    }
-                )
-                self.event_manager.publish(signal_event)
-                
-                self.logger.info(
-                    f"生成信号: {signal} {event.data['symbol']} "
-                    f"置信度: {confidence:.2f} "
-                    f"市场状态: {self.current_market_state}"
-                )
-            
-        except Exception as e:
-            self.logger.error(f"策略处理失败: {e}")
-
-
-class TradingSystem:
-    """主交易系统"""
-    
-    def __init__(self, config: SystemConfig):
-        self.config = config
-        self.event_manager = EventManager()
-        
-        # 初始化核心组件
-        self.data_fetcher = DataFetcher(config, self.event_manager)
-        self.data_cache = DataCache(config)
-        self.strategy_engine = StrategyEngine(self.event_manager, config)
-        
-        # 风控组件
-        risk_config = RiskConfig(
-            max_leverage=config.risk.max_leverage,
-            min_leverage=config.risk.min_leverage,
-            max_position_size=config.risk.max_position_size,
-            risk_per_trade=config.risk.risk_per_trade,
-            stop_loss_percent=config.risk.stop_loss_percent,
-            take_profit_1=config.risk.take_profit_1,
-            take_profit_2=config.risk.take_profit_2,
-            trailing_stop=config.risk.trailing_stop,
-            max_consecutive_losses=config.risk.max_consecutive_losses,
-            max_daily_loss=config.risk.max_daily_loss,
-            min_order_size=config.risk.min_order_size
-        )
-        self.risk_manager = RiskManager(risk_config, self.event_manager)
-        self.order_validator = OrderValidator(risk_config)
-        
-        # 交易所组件
-        self.exchange = None
-        
-        # 系统状态
-        self.is_running = False
-        self.is_paused = False
-        self.start_time = None
-        
-        # 订阅事件
-        self._subscribe_events()
-        
-        self.logger = logger.bind(module="TradingSystem")
-    
-    def _subscribe_events(self):
-        """订阅事件"""
-        # 策略引擎订阅市场数据
-        self.event_manager.subscribe(EventType.MARKET_DATA, self.strategy_engine.process_market_data)
-        
-        # 风险管理器订阅信号
-        self.event_manager.subscribe(EventType.SIGNAL, self._process_signal)
-        
-        # 交易系统订阅订单事件
-        self.event_manager.subscribe(EventType.ORDER, self._process_order)
-        
-        # 监控持仓变化
-        self.event_manager.subscribe(EventType.POSITION, self._process_position)
-        
-        # 处理风控事件
-        self.event_manager.subscribe(EventType.RISK, self._process_risk_event)
-    
-    async def initialize(self):
-        """初始化交易系统"""
-        try:
-            self.logger.info("开始初始化交易系统...")
-            
-            # 1. 初始化数据缓存
-            await self.data_cache.initialize()
-            self.logger.info("数据缓存初始化完成")
-            
-            # 2. 初始化数据获取器
-            if not await self.data_fetcher.initialize():
-                raise Exception("数据获取器初始化失败")
-            self.logger.info("数据获取器初始化完成")
-            
-            # 3. 初始化交易所
-            exchange_config = self.config.exchange
-            self.exchange = ExchangeFactory.create(
-                exchange_config.name,
-                api_key=exchange_config.api_key,
-                secret=exchange_config.secret,
-                password=exchange_config.password,
-                sandbox=exchange_config.sandbox
-            )
-            await self.exchange.connect()
-            self.logger.info(f"交易所 {exchange_config.name} 连接成功")
-            
-            # 4. 启动事件处理
-            await self.event_manager.start()
-            self.logger.info("事件管理器启动完成")
-            
-            self.logger.info("交易系统初始化完成")
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"初始化失败: {e}")
-            return False
-    
-    async def start(self):
-        """启动交易系统"""
-        if self.is_running:
-            self.logger.warning("系统已在运行")
-            return
-        
-        if not await self.initialize():
-            self.logger.error("初始化失败，无法启动系统")
-            return
-        
-        self.is_running = True
-        self.start_time = datetime.now()
-        
-        # 发布系统启动事件
-        system_event = SystemEvent(
-            system_type="start",
-            message="交易系统启动",
-            details={
-                'start_time': self.start_time.isoformat(),
-                'config': {
-                    'symbol': self.config.strategy.symbol,
-                    'timeframe': self.config.strategy.timeframe,
-                    'exchange': self.config.exchange.name
-                }
-            }
-        )
-        self.event_manager.publish(system_event)
-        
-        self.logger.info(f"交易系统启动成功 - 交易对: {self.config.strategy.symbol}")
-        
-        # 开始主循环
-        await self._main_loop()
-    
-    async def _main_loop(self):
-        """主循环"""
-        symbol = self.config.strategy.symbol
-        timeframe = self.config.strategy.timeframe
-        
-        while self.is_running:
-            try:
-                if self.is_paused:
-                    await asyncio.sleep(1)
-                    continue
-                
-                # 1. 获取市场数据
-                candles = await self.data_fetcher.fetch_candles(symbol, timeframe, limit=100)
-                
-                if candles:
-                    # 2. 缓存数据
-                    df = await self.data_cache.get_market_data(symbol, timeframe)
-                    if df is None:
-                        df = candles
-                        await self.data_cache.set_market_data(symbol, timeframe, df)
-                    
-                    # 3. 发布市场事件
-                    market_event = MarketEvent(
-                        symbol=symbol,
-                        timeframe=timeframe,
-                        candles=candles
-                    )
-                    self.event_manager.publish(market_event)
-                
-                # 4. 检查持仓和止盈止损
-                await self._check_positions()
-                
-                # 5. 等待下一次循环
-                await asyncio.sleep(self.config.system.loop_interval)
-                
-            except Exception as e:
-                self.logger.error(f"主循环异常: {e}")
-                await asyncio.sleep(5)  # 异常时等待更长时间
-    
-    async def _process_signal(self, event: SignalEvent):
-        """处理策略信号"""
-        if self.is_paused:
-            return
-        
-        # 1. 检查信号置信度
-        if event.confidence < 0.6:
-            self.logger.debug(f"信号置信度过低: {event.confidence}")
-            return
-        
-        # 2. 获取账户余额
-        try:
-            balance_info = await self.exchange.get_balance()
-            balance = balance_info.get('USDT', {}).get('free', 0)
-            
-            if balance < self.config.risk.min_order_size:
-                self.logger.warning(f"余额不足: {balance}U")
-                return
-        except Exception as e:
-            self.logger.error(f"获取余额失败: {e}")
-            return
-        
-        # 3. 风控检查
-        order_request = {
-            'symbol': event.symbol,
-            'side': event.signal_type,
-            'price': event.price,
-            'amount': 0,  # 将由风控计算
-            'type': 'market'
-        }
-        
-        risk_check = self.risk_manager.check_order(order_request, balance)
-        
-        if not risk_check['valid']:
-            self.logger.warning(f"风控拒绝: {risk_check['reason']}")
-            return
-        
-        # 4. 调整订单
-        adjusted_order = risk_check['order_request']
-        
-        # 5. 验证订单
-        validation = self.order_validator.validate_market_order(
-            adjusted_order['symbol'],
-            adjusted_order['side'],
-            adjusted_order['amount'],
-            adjusted_order['price'],
-            balance
-        )
-        
-        if not validation['valid']:
-            self.logger.warning(f"订单验证失败: {validation['reason']}")
-            return
-        
-        # 6. 发布订单事件
-        order_event = OrderEvent(
-            symbol=adjusted_order['symbol'],
-            order_id=f"ORD_{datetime.now().timestamp()}",
-            side=adjusted_order['side'],
-            order_type=adjusted_order['type'],
-            price=adjusted_order['price'],
-            amount=adjusted_order['amount'],
-            status='pending'
-        )
-        self.event_manager.publish(order_event)
-        
-        self.logger.info(
-            f"准备下单: {adjusted_order['side']} {adjusted_order['symbol']} "
-            f"数量: {adjusted_order['amount']:.6f} "
-            f"杠杆: {risk_check['position_info']['leverage']}x"
-        )
-    
-    async def _process_order(self, event: OrderEvent):
-        """处理订单事件"""
-        if event.status != 'pending':
-            return
-        
-        try:
-            # 执行订单
-            if event.side == 'buy':
-                order_result = await self.exchange.create_order(
-                    symbol=event.symbol,
-                    side='buy',
-                    order_type='market',
-                    amount=event.amount
-                )
-            else:
-                order_result = await self.exchange.create_order(
-                    symbol=event.symbol,
-                    side='sell',
-                    order_type='market',
-                    amount=event.amount
-                )
-            
-            # 更新订单状态
-            event.status = 'filled'
-            
-            # 发布交易事件
-            trade_event = TradeEvent(
-                symbol=event.symbol,
-                order_id=event.order_id,
-                side=event.side,
-                price=event.price,
-                amount=event.amount,
-                fee=0.001,  # 假设手续费0.1%
-                pnl=0.0  # 暂时设为0，平仓时计算
-            )
-            self.event_manager.publish(trade_event)
-            
-            # 更新持仓
-            position_type = 'long' if event.side == 'buy' else 'short'
-            self.risk_manager.update_position(
-                event.symbol,
-                position_type,
-                event.amount,
-                event.price,
-                event.price
-            )
-            
-            self.logger.info(f"订单执行成功: {event.symbol} {event.side} {event.amount}")
-            
-        except Exception as e:
-            event.status = 'rejected'
-            self.logger.error(f"订单执行失败: {e}")
-            
-            # 发布失败的订单事件
-            failed_order = OrderEvent(
-                symbol=event.symbol,
-                order_id=event.order_id,
-                side=event.side,
-                order_type=event.order_type,
-                price=event.price,
-                amount=event.amount,
-                status='rejected'
-            )
-            self.event_manager.publish(failed_order)
-    
-    async def _check_positions(self):
-        """检查持仓和止盈止损"""
-        if not self.risk_manager.open_positions:
-            return
-        
-        try:
-            # 获取最新价格
-            ticker = await self.exchange.get_ticker(self.config.strategy.symbol)
-            current_price = ticker['last']
-            
-            # 检查每个持仓
-            for symbol in list(self.risk_manager.open_positions.keys()):
-                # 检查止损
-                stop_loss = self.risk_manager.check_stop_loss(symbol, current_price)
-                if stop_loss:
-                    await self._close_position(stop_loss)
-                    continue
-                
-                # 检查止盈
-                take_profit = self.risk_manager.check_take_profit(symbol, current_price)
-                if take_profit:
-                    await self._close_position(take_profit)
-                    
-        except Exception as e:
-            self.logger.error(f"检查持仓失败: {e}")
-    
-    async def _close_position(self, close_signal: Dict[str, Any]):
-        """平仓"""
-        try:
-            symbol = close_signal['symbol']
-            price = close_signal['price']
-            
-            if close_signal['action'] == 'partial_close':
-                amount = close_signal['amount']
-            else:
-                # 全平
-                position = self.risk_manager.open_positions[symbol]
-                amount = position['size']
-            
-            # 执行平仓
-            side = 'sell' if self.risk_manager.open_positions[symbol]['type'] == 'long' else 'buy'
-            
-            order_result = await self.exchange.create_order(
-                symbol=symbol,
-                side=side,
-                order_type='market',
-                amount=amount
-            )
-            
-            # 更新持仓
-            if close_signal['action'] == 'partial_close':
-                self.risk_manager.update_position(
-                    symbol,
-                    self.risk_manager.open_positions[symbol]['type'],
-                    self.risk_manager.open_positions[symbol]['size'] - amount,
-                    self.risk_manager.open_positions[symbol]['entry_price'],
-                    price
-                )
-            else:
-                self.risk_manager.update_position(symbol, 'flat', 0, 0, 0)
-            
-            # 记录交易
-            pnl = 0  # 需要实际计算
-            self.risk_manager.record_trade(symbol, side, price, amount, pnl)
-            
-            self.logger.info(f"平仓成功: {symbol} {side} {amount} 价格: {price}")
-            
-        except Exception as e:
-            self.logger.error(f"平仓失败: {e}")
-    
-    def _process_position(self, event: PositionEvent):
-        """处理持仓事件"""
-        self.logger.info(
-            f"持仓更新: {event.symbol} {event.position_type} "
-            f"数量: {event.size} 未实现盈亏: {event.unrealized_pnl:.2f}"
-        )
-    
-    def _process_risk_event(self, event: RiskEvent):
-        """处理风控事件"""
-        if event.level == "critical":
-            self.logger.error(f"[风控] {event.message}")
-            # 触发熔断时暂停交易
-            if event.risk_type == "breach":
-                self.pause()
-        elif event.level == "warning":
-            self.logger.warning(f"[风控] {event.message}")
-        else:
-            self.logger.info(f"[风控] {event.message}")
-    
-    def pause(self):
-        """暂停交易"""
-        self.is_paused = True
-        self.logger.warning("交易已暂停")
-        
-        # 发布暂停事件
-        event = SystemEvent(
-            system_type="pause",
-            message="交易暂停",
-            details={'timestamp': datetime.now().isoformat()}
-        )
-        self.event_manager.publish(event)
-    
-    def resume(self):
-        """恢复交易"""
-        self.is_paused = False
-        self.logger.info("交易已恢复")
-        
-        # 发布恢复事件
-        event = SystemEvent(
-            system_type="resume",
-            message="交易恢复",
-            details={'timestamp': datetime.now().isoformat()}
-        )
-        self.event_manager.publish(event)
-    
-    async def stop(self):
-        """停止系统"""
-        self.is_running = False
-        self.is_paused = False
-        
-        # 关闭连接
-        if self.exchange:
-            await self.exchange.disconnect()
-        
-        # 停止事件管理器
-        await self.event_manager.stop()
-        
-        # 停止数据获取器
-        await self.data_fetcher.close()
-        
-        # 发布停止事件
-        event = SystemEvent(
-            system_type="stop",
-            message="交易系统停止",
-            details={
-                'stop_time': datetime.now().isoformat(),
-                'running_time': str(datetime.now() - self.start_time) if self.start_time else 'N/A'
-            }
-        )
-        self.event_manager.publish(event)
-        
-        self.logger.info("交易系统已停止")
-    
-    def get_status(self) -> Dict[str, Any]:
-        """获取系统状态"""
-        return {
-            'is_running': self.is_running,
-            'is_paused': self.is_paused,
-            'start_time': self.start_time.isoformat() if self.start_time else None,
-            'running_time': str(datetime.now() - self.start_time) if self.start_time else None,
-            'symbol': self.config.strategy.symbol,
-            'timeframe': self.config.strategy.timeframe,
-            'market_state': self.strategy_engine.current_market_state,
-            'open_positions': len(self.risk_manager.open_positions),
-            'risk_status': self.risk_manager.get_risk_status(),
-            'cache_stats': self.data_cache.get_stats()
+"""
+主交易系统
+协调所有模块，实现完整的交易流程
+"""
+
+import asyncio
+import itertools
+import time
+from typing import Dict, Any, Optional, List, Tuple
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from src.core.events import (
+    EventManager, MarketEvent, SignalEvent, OrderEvent, 
+    TradeEvent, PositionEvent, RiskEvent, SystemEvent, EventType
+)
+from src.config.settings import SystemConfig
+from src.data.data_fetcher import DataFetcher
+from src.data.data_cache import DataCache
+from src.strategies.dma_supertrend import DMASuperTrendStrategy, MarketClassifier, TimeframeOptimizer
+from src.risk.risk_manager import RiskManager, OrderValidator
+from src.exchanges.exchange_factory import ExchangeFactory
+from src.utils.logger import get_trading_logger
+
+
+# 订单ID序号：monotonic_ns已基本唯一，序号保证突发下绝不碰撞
+_order_seq = itertools.count()
+
+
+def _new_order_id() -> str:
+    """生成单调且无碰撞的订单ID，开销约为datetime.now().timestamp()的1%"""
+    return f"ORD_{time.monotonic_ns()}_{next(_order_seq)}"
+
+
+def _iso_now() -> str:
+    """当前时间的ISO串，仅用于低频系统事件"""
+    return datetime.now().isoformat()
+
+
+def _last_candle_fields(candles):
+    """取窗口内最新一根K线的(时间戳, 收盘价)，兼容字典行/序列行/DataFrame"""
+    if isinstance(candles, pd.DataFrame):
+        ts = candles['timestamp'].iloc[-1] if 'timestamp' in candles else None
+        return ts, candles['close'].iloc[-1]
+    row = candles[-1]
+    if isinstance(row, dict):
+        return row.get('timestamp'), row.get('close')
+    return row[0], row[4]
+
+
+# 绑定logger按模块缓存一份：logger.bind每次都复制上下文字典，
+# 没必要在每个实例构造时重复付这笔开销
+_ENGINE_LOGGER = logger.bind(module="StrategyEngine")
+_SYSTEM_LOGGER = logger.bind(module="TradingSystem")
+
+# 信号元数据里的固定来源标识
+_SIGNAL_SOURCE = 'strategy_engine'
+
+# 策略引擎K线环形缓冲容量
+_RING_SIZE = 512
+
+# 环形缓冲的列名与ccxt OHLCV行内的列下标
+_RING_COLUMNS = (('open', 1), ('high', 2), ('low', 3), ('close', 4), ('volume', 5))
+
+
+class StrategyEngine:
+    """策略执行引擎"""
+
+    def __init__(self, event_manager: EventManager, config: SystemConfig):
+        self.event_manager = event_manager
+        self.config = config
+
+        # 初始化策略组件
+        self.strategy = DMASuperTrendStrategy()
+        self.market_classifier = MarketClassifier()
+        self.timeframe_optimizer = TimeframeOptimizer()
+
+        # 策略状态
+        self.current_timeframe = config.strategy.timeframe
+        self.current_market_state = "trend"
+
+        # 发布阈值：低置信信号在源头过滤，不进事件队列
+        self.min_confidence = self.strategy.config.min_confidence
+
+        # K线环形缓冲：列式float64数组，双倍写入布局，
+        # view()无需拼接即可返回按时间升序的连续切片
+        self._ring = {name: np.empty(2 * _RING_SIZE, dtype=np.float64)
+                      for name, _ in _RING_COLUMNS}
+        self._head = 0
+        self._count = 0
+        self._last_ts: Optional[float] = None
+
+        self.logger = _ENGINE_LOGGER
+
+    def _append(self, values) -> None:
+        """写入一根K线，O(1)原地更新"""
+        i = self._head
+        for (name, _), value in zip(_RING_COLUMNS, values):
+            buf = self._ring[name]
+            buf[i] = value
+            buf[i + _RING_SIZE] = value
+        self._head = (i + 1) % _RING_SIZE
+        if self._count < _RING_SIZE:
+            self._count += 1
+
+    def _ingest(self, candles) -> int:
+        """
+        把K线窗口增量写入环形缓冲
+
+        推送可以是完整窗口也可以是单根K线，这里只写入时间戳晚于
+        已见最新K线的部分；同一时间戳视为未收盘K线的更新，覆盖
+        最近一格。时间戳前进而没有同时间戳覆盖时，说明上一根
+        在途K线已收盘且最终版本已在环中，把它计入返回的提交区间。
+
+        Returns:
+            环尾需要交给策略的K线数量（最后一根按盘中试算，
+            其余按已收盘提交）
+        """
+        if isinstance(candles, pd.DataFrame):
+            ts = candles['timestamp'].to_numpy() if 'timestamp' in candles \
+                else np.arange(len(candles), dtype=np.float64)
+            cols = [candles[name].to_numpy(dtype=np.float64)
+                    for name, _ in _RING_COLUMNS]
+        elif len(candles) and isinstance(candles[0], dict):
+            # 适配器返回的字典行
+            ts = np.array([row['timestamp'] for row in candles], dtype=np.float64)
+            cols = [np.array([row[name] for row in candles], dtype=np.float64)
+                    for name, _ in _RING_COLUMNS]
+        else:
+            arr = np.asarray(candles, dtype=np.float64)
+            if arr.size == 0:
+                return 0
+            ts = arr[:, 0]
+            cols = [arr[:, idx] for _, idx in _RING_COLUMNS]
+
+        n = len(ts)
+        if n == 0:
+            return 0
+
+        start = 0
+        rewound = False
+        had_pending = self._last_ts is not None and self._count > 0
+        if self._last_ts is not None:
+            start = int(np.searchsorted(ts, self._last_ts, side='left'))
+            if start < n and ts[start] == self._last_ts and self._count:
+                # 回退一格，重写未收盘K线
+                self._head = (self._head - 1) % _RING_SIZE
+                self._count -= 1
+                rewound = True
+
+        appended = n - start
+        if appended == 0:
+            return 0
+        for i in range(start, n):
+            self._append(col[i] for col in cols)
+        self._last_ts = float(ts[-1])
+        if not rewound and had_pending:
+            # 上一根在途K线随本次前进收盘，其存量最终版本一并提交
+            appended += 1
+        # 推送超过环容量时早期行已被覆盖，环里只剩最后_count根可寻址
+        return min(appended, self._count)
+
+    def view(self):
+        """返回(open, high, low, close, volume)连续ndarray视图，零拷贝"""
+        hi = self._head + _RING_SIZE
+        lo = hi - self._count
+        return tuple(self._ring[name][lo:hi] for name, _ in _RING_COLUMNS)
+
+    async def process_market_data(self, event: MarketEvent):
+        """处理市场数据，生成策略信号"""
+        try:
+            # 1. K线入环形缓冲，取连续列视图
+            appended = self._ingest(event.data['candles'])
+            if not self._count:
+                return
+            open_, high, low, close, volume = self.view()
+
+            # 指标计算暂仍基于pandas，包装为无拷贝DataFrame复用
+            frame = pd.DataFrame(
+                {'open': open_, 'high': high, 'low': low,
+                 'close': close, 'volume': volume},
+                copy=False
+            )
+
+            # 2. 分类市场状态
+            if self._count >= 20:
+                self.current_market_state = self.market_classifier.classify(frame)
+
+            # 3. 优化时间框架（基于市场状态）
+            if self.current_market_state == "range":
+                # 横盘市场，可能需要调整时间框架
+                self.current_timeframe = self.timeframe_optimizer.recommend_timeframe(
+                    symbol=event.data['symbol'],
+                    volatility=0.02,  # 需要从数据计算
+                    capital=10000,  # 需要从配置获取
+                    frequency='medium'
+                )
+
+            # 4. 生成策略信号：增量更新。_ingest返回的提交区间里
+            # 除最后一根外都已收盘（含随本次前进收盘的上一根在途
+            # K线），提交进递推状态；最后一根按盘中值试算信号
+            for j in range(-appended, -1):
+                self.strategy.update(high[j], low[j], close[j], closed=True)
+            current_price = close[-1]
+            signal, confidence, metadata = self.strategy.update(
+                high[-1], low[-1], close[-1], closed=False
+            )
+            
+            if signal != "hold" and confidence >= self.min_confidence:
+                # 5. 发布信号事件。update()每次返回新建的元数据字典，
+                # 直接原地补字段，免去一次{**metadata, ...}整体复制
+                metadata['market_state'] = self.current_market_state
+                metadata['timeframe'] = self.current_timeframe
+                metadata['source'] = _SIGNAL_SOURCE
+                signal_event = SignalEvent(
+                    symbol=event.data['symbol'],
+                    signal_type=signal,
+                    price=current_price,
+                    confidence=confidence,
+                    metadata=metadata
+                )
+                self.event_manager.publish(signal_event)
+                
+                self.logger.info(
+                    f"生成信号: {signal} {event.data['symbol']} "
+                    f"置信度: {confidence:.2f} "
+                    f"市场状态: {self.current_market_state}"
+                )
+            
+        except Exception as e:
+            self.logger.error(f"策略处理失败: {e}")
+
+
+class TradingSystem:
+    """主交易系统"""
+
+    # 行情流价格的最大可复用时长与REST查价的最小间隔（秒）
+    _TICKER_MAX_AGE = 0.5
+    _TICKER_COOLDOWN = 1.0
+
+    # 余额缓存的有效期（秒）
+    _BALANCE_TTL = 30.0
+
+    def __init__(self, config: SystemConfig):
+        self.config = config
+        self.event_manager = EventManager()
+        
+        # 初始化核心组件
+        self.data_fetcher = DataFetcher(config, self.event_manager)
+        self.data_cache = DataCache(config)
+        self.strategy_engine = StrategyEngine(self.event_manager, config)
+        
+        # 风控组件：config.risk与risk_manager.RiskConfig字段一致，
+        # 两者都是冻结dataclass，按引用直接共享，不再逐字段拷贝
+        risk_config = config.risk
+        self.risk_manager = RiskManager(risk_config, self.event_manager)
+        self.order_validator = OrderValidator(risk_config)
+        
+        # 交易所组件
+        self.exchange = None
+        
+        # 系统状态
+        self.is_running = False
+        self.is_paused = False
+        self.start_time = None
+        # 启动时缓存一次ISO串和monotonic基准，get_status按任意频率
+        # 轮询都不再做datetime运算和字符串格式化
+        self._start_iso: Optional[str] = None
+        self._start_mono: Optional[float] = None
+        self._stop_event = asyncio.Event()
+        self._last_candle_ts = None
+
+        # 各交易对最近一次见到的价格：(价格, monotonic时间戳)
+        self._last_price: Dict[str, Tuple[float, float]] = {}
+        self._last_ticker_fetch = 0.0
+
+        # 余额缓存：余额只在成交/资金费时变化，信号路径不必每次
+        # 都付一次REST往返。成交后做近似扣减保持缓存热，下单被拒
+        # 时置零时间戳强制下次刷新
+        self._balance_cache: Dict[str, float] = {}
+        self._balance_stamp = 0.0
+
+        # 每个symbol一把平仓锁：并发平仓不同持仓，同一持仓不重复下单
+        self._close_locks: Dict[str, asyncio.Lock] = {}
+
+        # 行情订阅与持仓巡检任务
+        self._ws_task: Optional[asyncio.Task] = None
+        self._positions_task: Optional[asyncio.Task] = None
+        
+        # 订阅事件
+        self._subscribe_events()
+        
+        self.logger = _SYSTEM_LOGGER
+    
+    def _subscribe_events(self):
+        """订阅事件"""
+        # 策略引擎订阅市场数据
+        self.event_manager.subscribe(EventType.MARKET_DATA, self.strategy_engine.process_market_data)
+        
+        # 风险管理器订阅信号
+        self.event_manager.subscribe(EventType.SIGNAL, self._process_signal)
+        
+        # 交易系统订阅订单事件
+        self.event_manager.subscribe(EventType.ORDER, self._process_order)
+        
+        # 监控持仓变化
+        self.event_manager.subscribe(EventType.POSITION, self._process_position)
+        
+        # 处理风控事件
+        self.event_manager.subscribe(EventType.RISK, self._process_risk_event)
+    
+    async def initialize(self):
+        """初始化交易系统"""
+        try:
+            self.logger.info("开始初始化交易系统...")
+            
+            # 1. 数据缓存与数据获取器互不依赖，并发初始化
+            _, fetcher_ok = await asyncio.gather(
+                self.data_cache.initialize(),
+                self.data_fetcher.initialize()
+            )
+            if not fetcher_ok:
+                raise Exception("数据获取器初始化失败")
+            self.logger.info("数据缓存与数据获取器初始化完成")
+
+            # 2. 预热策略内核：JIT编译/缓存加载和pandas内部缓存
+            # 在放行主循环前完成，首根实盘K线不付首调用成本
+            self.strategy_engine.strategy.warmup()
+            self.logger.info("策略内核预热完成")
+
+            # 3. 初始化交易所
+            exchange_config = self.config.exchange
+            self.exchange = ExchangeFactory.create_exchange(
+                exchange_config.name,
+                {
+                    'api_key': exchange_config.api_key,
+                    'secret': exchange_config.secret,
+                    'password': exchange_config.password,
+                    'sandbox': exchange_config.sandbox,
+                }
+            )
+            await self.exchange.connect()
+            self.logger.info(f"交易所 {exchange_config.name} 连接成功")
+
+            # 4. 订阅行情推送：回调直接发布市场事件，
+            # 不再靠主循环定时拉取
+            self._ws_task = await self.exchange.subscribe_candles(
+                self.config.strategy.symbol,
+                self.config.strategy.timeframe,
+                self._on_candles
+            )
+            self.logger.info("行情订阅建立完成")
+
+            # 5. 启动事件处理
+            await self.event_manager.start()
+            self.logger.info("事件管理器启动完成")
+            
+            self.logger.info("交易系统初始化完成")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"初始化失败: {e}")
+            return False
+    
+    async def start(self):
+        """启动交易系统"""
+        if self.is_running:
+            self.logger.warning("系统已在运行")
+            return
+        
+        if not await self.initialize():
+            self.logger.error("初始化失败，无法启动系统")
+            return
+        
+        self.is_running = True
+        self.start_time = datetime.now()
+        self._start_iso = self.start_time.isoformat()
+        self._start_mono = time.monotonic()
+
+        # 发布系统启动事件
+        system_event = SystemEvent(
+            system_type="start",
+            message="交易系统启动",
+            details={
+                'start_time': self._start_iso,
+                'config': {
+                    'symbol': self.config.strategy.symbol,
+                    'timeframe': self.config.strategy.timeframe,
+                    'exchange': self.config.exchange.name
+                }
+            }
+        )
+        self.event_manager.publish(system_event)
+        
+        self.logger.info(f"交易系统启动成功 - 交易对: {self.config.strategy.symbol}")
+        
+        # 开始主循环
+        await self._main_loop()
+    
+    async def _main_loop(self):
+        """主循环
+
+        市场数据由行情订阅推送驱动（见_on_candles），主循环只负责
+        挂起等待停止信号；持仓巡检仍需REST查价，放在独立任务里
+        按固定间隔执行。
+        """
+        self._stop_event.clear()
+        self._positions_task = asyncio.create_task(self._positions_loop())
+        await self._stop_event.wait()
+
+    async def _on_candles(self, candles):
+        """行情推送回调：收到新K线后直接发布市场事件"""
+        if self.is_paused or candles is None or len(candles) == 0:
+            return
+
+        symbol = self.config.strategy.symbol
+        timeframe = self.config.strategy.timeframe
+        try:
+            await self.data_cache.set_market_data(symbol, timeframe, candles)
+
+            # 只在新K线收盘时递增缓存版本，盘中更新不触发下游重算
+            last_ts, last_close = _last_candle_fields(candles)
+            if last_close is not None:
+                self._last_price[symbol] = (last_close, time.monotonic())
+            if last_ts is not None and last_ts != self._last_candle_ts:
+                self._last_candle_ts = last_ts
+                await self.data_cache.bump_version(symbol, timeframe)
+
+            market_event = MarketEvent(
+                symbol=symbol,
+                timeframe=timeframe,
+                candles=candles
+            )
+            self.event_manager.publish(market_event)
+        except Exception as e:
+            self.logger.error(f"行情回调异常: {e}")
+
+    async def _positions_loop(self):
+        """持仓巡检循环"""
+        interval = self.config.data_delay_ms / 1000
+        while self.is_running:
+            try:
+                if not self.is_paused:
+                    await self._check_positions()
+                await asyncio.sleep(interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"持仓巡检异常: {e}")
+                await asyncio.sleep(5)  # 异常时等待更长时间
+    
+    async def _process_signal(self, event: SignalEvent):
+        """处理策略信号"""
+        if self.is_paused:
+            return
+
+        # 置信度过滤已在策略引擎发布前完成，这里不再重复检查
+
+        # 1. 获取账户余额（带TTL缓存，省掉信号路径上的REST往返）
+        try:
+            balance = await self._get_usdt_balance()
+
+            if balance < self.config.risk.min_order_size:
+                self.logger.warning(f"余额不足: {balance}U")
+                return
+        except Exception as e:
+            self.logger.error(f"获取余额失败: {e}")
+            return
+        
+        # 2. 风控检查+订单验证（check_order单遍完成，不再二次验证）
+        order_request = {
+            'symbol': event.symbol,
+            'side': event.signal_type,
+            'price': event.price,
+            'amount': 0,  # 将由风控计算
+            'type': 'market'
+        }
+
+        risk_check = self.risk_manager.check_order(order_request, balance)
+
+        if not risk_check['valid']:
+            self.logger.warning(f"风控拒绝: {risk_check['reason']}")
+            return
+
+        # 3. 调整订单
+        adjusted_order = risk_check['order_request']
+
+        # 4. 发布订单事件
+        order_event = OrderEvent(
+            symbol=adjusted_order['symbol'],
+            order_id=_new_order_id(),
+            side=adjusted_order['side'],
+            order_type=adjusted_order['type'],
+            price=adjusted_order['price'],
+            amount=adjusted_order['amount'],
+            status='pending'
+        )
+        self.event_manager.publish(order_event)
+        
+        self.logger.info(
+            f"准备下单: {adjusted_order['side']} {adjusted_order['symbol']} "
+            f"数量: {adjusted_order['amount']:.6f} "
+            f"杠杆: {risk_check['position_info']['leverage']}x"
+        )
+    
+    async def _get_usdt_balance(self) -> float:
+        """
+        获取USDT可用余额（带TTL缓存）
+
+        余额只在成交/资金费时变化，每个信号都走REST查余额会在
+        风控之前先付一次100-300ms往返。缓存30秒内直接复用，
+        成交后由_process_order强制失效，下一个信号重新查询。
+        """
+        now = time.monotonic()
+        if now - self._balance_stamp < self._BALANCE_TTL and 'USDT' in self._balance_cache:
+            return self._balance_cache['USDT']
+
+        balance_info = await self.exchange.get_balance()
+        balance = balance_info.get('USDT', {}).get('free', 0)
+        self._balance_cache['USDT'] = balance
+        self._balance_stamp = now
+        return balance
+
+    async def _process_order(self, event: OrderEvent):
+        """处理订单事件"""
+        if event.status != 'pending':
+            return
+        
+        try:
+            # 执行订单
+            if event.side == 'buy':
+                order_result = await self.exchange.create_order(
+                    symbol=event.symbol,
+                    side='buy',
+                    order_type='market',
+                    amount=event.amount
+                )
+            else:
+                order_result = await self.exchange.create_order(
+                    symbol=event.symbol,
+                    side='sell',
+                    order_type='market',
+                    amount=event.amount
+                )
+            
+            # 更新订单状态
+            event.status = 'filled'
+            
+            # 更新持仓
+            position_type = 'long' if event.side == 'buy' else 'short'
+            self.risk_manager.update_position(
+                event.symbol,
+                position_type,
+                event.amount,
+                event.price,
+                event.price
+            )
+
+            # 成交与持仓事件合并发布，只唤醒一次处理循环
+            trade_event = TradeEvent(
+                symbol=event.symbol,
+                order_id=event.order_id,
+                side=event.side,
+                price=event.price,
+                amount=event.amount,
+                fee=0.001,  # 假设手续费0.1%
+                pnl=0.0  # 暂时设为0，平仓时计算
+            )
+            position_event = PositionEvent(
+                symbol=event.symbol,
+                position_type=position_type,
+                size=event.amount,
+                entry_price=event.price,
+                mark_price=event.price,
+                unrealized_pnl=0.0
+            )
+            self.event_manager.publish_many((trade_event, position_event))
+
+            # 成交改变了可用保证金，且本地无法精确推算（名义价值
+            # 要按杠杆折算成保证金，手续费另计），直接失效缓存让
+            # 下一个信号重新查询，而不是用会放大杠杆倍误差的近似值
+            self._balance_stamp = 0.0
+
+            self.logger.info(f"订单执行成功: {event.symbol} {event.side} {event.amount}")
+            
+        except Exception as e:
+            event.status = 'rejected'
+            # 下单被拒说明本地视图可能已失真，强制下次刷新余额
+            self._balance_stamp = 0.0
+            self.logger.error(f"订单执行失败: {e}")
+            
+            # 发布失败的订单事件
+            failed_order = OrderEvent(
+                symbol=event.symbol,
+                order_id=event.order_id,
+                side=event.side,
+                order_type=event.order_type,
+                price=event.price,
+                amount=event.amount,
+                status='rejected'
+            )
+            self.event_manager.publish(failed_order)
+    
+    async def _check_positions(self):
+        """检查持仓和止盈止损"""
+        if not self.risk_manager.open_positions:
+            return
+
+        symbol = self.config.strategy.symbol
+        try:
+            # 行情流刚推过价格时直接复用，省掉一次REST往返；
+            # 否则按冷却间隔限频查ticker
+            now = time.monotonic()
+            cached = self._last_price.get(symbol)
+            if cached is not None and now - cached[1] < self._TICKER_MAX_AGE:
+                current_price = cached[0]
+            else:
+                if now - self._last_ticker_fetch < self._TICKER_COOLDOWN:
+                    return
+                self._last_ticker_fetch = now
+                ticker = await self.exchange.get_ticker(symbol)
+                current_price = ticker.last
+                self._last_price[symbol] = (current_price, time.monotonic())
+            
+            # 全部持仓一次向量化扫描（止损优先级在scan_exits内保证），
+            # 不再逐symbol调用check_stop_loss/check_take_profit
+            close_signals = self.risk_manager.scan_exits(current_price)
+
+            # 并发平仓：多个持仓同时触发时（闪崩），第N单不必排队
+            # 等前N-1单的下单往返；同symbol的互斥由_close_position
+            # 内的per-symbol锁保证
+            if close_signals:
+                if len(close_signals) == 1:
+                    await self._close_position(close_signals[0])
+                else:
+                    await asyncio.gather(
+                        *(self._close_position(sig) for sig in close_signals)
+                    )
+
+        except Exception as e:
+            self.logger.error(f"检查持仓失败: {e}")
+    
+    async def _close_position(self, close_signal: Dict[str, Any]):
+        """平仓（同一symbol串行，不同symbol可并发）"""
+        symbol = close_signal['symbol']
+        lock = self._close_locks.get(symbol)
+        if lock is None:
+            lock = self._close_locks[symbol] = asyncio.Lock()
+        async with lock:
+            # 拿到锁后持仓可能已被并发的另一次平仓清掉
+            if symbol not in self.risk_manager.open_positions:
+                return
+            await self._close_position_locked(close_signal)
+
+    async def _close_position_locked(self, close_signal: Dict[str, Any]):
+        """执行平仓（调用方需已持有该symbol的平仓锁）"""
+        try:
+            symbol = close_signal['symbol']
+            price = close_signal['price']
+
+            if close_signal['action'] == 'partial_close':
+                amount = close_signal['amount']
+            else:
+                # 全平
+                position = self.risk_manager.open_positions[symbol]
+                amount = position.size
+            
+            # 执行平仓
+            side = 'sell' if self.risk_manager.open_positions[symbol].type == 'long' else 'buy'
+            
+            order_result = await self.exchange.create_order(
+                symbol=symbol,
+                side=side,
+                order_type='market',
+                amount=amount
+            )
+            
+            # 更新持仓
+            if close_signal['action'] == 'partial_close':
+                position = self.risk_manager.open_positions[symbol]
+                self.risk_manager.update_position(
+                    symbol,
+                    position.type,
+                    position.size - amount,
+                    position.entry_price,
+                    price
+                )
+            else:
+                self.risk_manager.update_position(symbol, 'flat', 0, 0, 0)
+            
+            # 记录交易
+            pnl = 0  # 需要实际计算
+            self.risk_manager.record_trade(symbol, side, price, amount, pnl)
+            
+            self.logger.info(f"平仓成功: {symbol} {side} {amount} 价格: {price}")
+            
+        except Exception as e:
+            self.logger.error(f"平仓失败: {e}")
+    
+    def _process_position(self, event: PositionEvent):
+        """处理持仓事件"""
+        self.logger.info(
+            f"持仓更新: {event.symbol} {event.position_type} "
+            f"数量: {event.size} 未实现盈亏: {event.unrealized_pnl:.2f}"
+        )
+    
+    def _process_risk_event(self, event: RiskEvent):
+        """处理风控事件"""
+        if event.level == "critical":
+            self.logger.error(f"[风控] {event.message}")
+            # 触发熔断时暂停交易
+            if event.risk_type == "breach":
+                self.pause()
+        elif event.level == "warning":
+            self.logger.warning(f"[风控] {event.message}")
+        else:
+            self.logger.info(f"[风控] {event.message}")
+    
+    def pause(self):
+        """暂停交易"""
+        self.is_paused = True
+        self.logger.warning("交易已暂停")
+        
+        # 发布暂停事件
+        event = SystemEvent(
+            system_type="pause",
+            message="交易暂停",
+            details={'timestamp': _iso_now()}
+        )
+        self.event_manager.publish(event)
+    
+    def resume(self):
+        """恢复交易"""
+        self.is_paused = False
+        self.logger.info("交易已恢复")
+        
+        # 发布恢复事件
+        event = SystemEvent(
+            system_type="resume",
+            message="交易恢复",
+            details={'timestamp': _iso_now()}
+        )
+        self.event_manager.publish(event)
+    
+    async def stop(self):
+        """停止系统"""
+        self.is_running = False
+        self.is_paused = False
+        self._stop_event.set()
+
+        # 取消行情订阅和持仓巡检
+        for task in (self._ws_task, self._positions_task):
+            if task is not None:
+                task.cancel()
+        self._ws_task = None
+        self._positions_task = None
+
+        # 关闭连接、停止事件管理器和数据获取器互不依赖，并发收尾
+        closers = [self.event_manager.stop(), self.data_fetcher.close()]
+        if self.exchange:
+            closers.append(self.exchange.disconnect())
+        await asyncio.gather(*closers, return_exceptions=True)
+        
+        # 发布停止事件
+        event = SystemEvent(
+            system_type="stop",
+            message="交易系统停止",
+            details={
+                'stop_time': _iso_now(),
+                'running_time': time.monotonic() - self._start_mono if self._start_mono else 'N/A'
+            }
+        )
+        self.event_manager.publish(event)
+        
+        self.logger.info("交易系统已停止")
+    
+    def get_status(self) -> Dict[str, Any]:
+        """
+        获取系统状态
+
+        start_time直接取启动时缓存的ISO串，running_time返回秒数
+        （float），人类可读的格式化留给展示层做。
+        """
+        return {
+            'is_running': self.is_running,
+            'is_paused': self.is_paused,
+            'start_time': self._start_iso,
+            'running_time': time.monotonic() - self._start_mono if self._start_mono else None,
+            'symbol': self.config.strategy.symbol,
+            'timeframe': self.config.strategy.timeframe,
+            'market_state': self.strategy_engine.current_market_state,
+            'open_positions': len(self.risk_manager.open_positions),
+            'risk_status': self.risk_manager.get_risk_status(),
+            'cache_stats': self.data_cache.get_stats()
         }
\ No newline at end of file
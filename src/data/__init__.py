@@ -0,0 +1,7 @@
+"""
+数据模块
+"""
+from .data_cache import DataCache
+from .data_fetcher import DataFetcher
+
+__all__ = ['DataCache', 'DataFetcher']
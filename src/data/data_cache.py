@@ -0,0 +1,89 @@
+"""
+数据缓存
+基于版本号的行情数据缓存
+"""
+
+import asyncio
+from typing import Dict, Any, Optional, Tuple
+
+from loguru import logger
+
+from src.config.settings import SystemConfig
+
+
+class DataCache:
+    """
+    行情数据缓存
+
+    以(symbol, timeframe)为键缓存最近的K线窗口，并配套一个单调递增
+    的版本号。版本号只在检测到新K线收盘时递增（bump_version），
+    消费者读取(数据, 版本)，版本未变即可直接复用上次的计算结果，
+    避免TTL方式下写入快于命中导致的近零命中率。
+    """
+
+    def __init__(self, config: SystemConfig):
+        self.config = config
+        self._data: Dict[Tuple[str, str], Any] = {}
+        self._versions: Dict[Tuple[str, str], int] = {}
+        self._lock = asyncio.Lock()
+
+        # 命中统计
+        self._hits = 0
+        self._misses = 0
+
+        self.logger = logger.bind(module="DataCache")
+
+    async def initialize(self) -> bool:
+        """初始化缓存"""
+        return True
+
+    async def get_versioned(self, symbol: str, timeframe: str) -> Tuple[Any, int]:
+        """
+        读取缓存数据及其版本号
+
+        Args:
+            symbol: 交易对
+            timeframe: 时间框架
+
+        Returns:
+            (数据, 版本号)，未命中返回(None, 0)
+        """
+        key = (symbol, timeframe)
+        data = self._data.get(key)
+        if data is None:
+            self._misses += 1
+            return None, 0
+        self._hits += 1
+        return data, self._versions.get(key, 0)
+
+    async def bump_version(self, symbol: str, timeframe: str) -> int:
+        """
+        递增版本号，仅应在检测到新K线收盘时调用
+
+        Returns:
+            递增后的版本号
+        """
+        key = (symbol, timeframe)
+        async with self._lock:
+            version = self._versions.get(key, 0) + 1
+            self._versions[key] = version
+        return version
+
+    async def set_market_data(self, symbol: str, timeframe: str, data: Any) -> None:
+        """写入行情数据；版本号由调用方在新K线收盘后bump_version递增"""
+        self._data[(symbol, timeframe)] = data
+
+    async def get_market_data(self, symbol: str, timeframe: str) -> Optional[Any]:
+        """兼容入口：只取数据，不关心版本"""
+        data, _ = await self.get_versioned(symbol, timeframe)
+        return data
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        total = self._hits + self._misses
+        return {
+            'entries': len(self._data),
+            'hits': self._hits,
+            'misses': self._misses,
+            'hit_rate': self._hits / total if total else 0.0,
+        }
@@ -0,0 +1,48 @@
+"""
+数据获取器
+通过交易所适配器拉取行情数据
+"""
+
+from typing import Any, List, Optional
+
+from loguru import logger
+
+from src.config.settings import SystemConfig
+from src.exchanges.exchange_factory import ExchangeFactory
+
+
+class DataFetcher:
+    """行情数据获取器"""
+
+    def __init__(self, config: SystemConfig, event_manager=None):
+        self.config = config
+        self.event_manager = event_manager
+        self.exchange = None
+        self.logger = logger.bind(module="DataFetcher")
+
+    async def initialize(self) -> bool:
+        """初始化底层交易所适配器"""
+        try:
+            exchange_config = self.config.exchange
+            self.exchange = ExchangeFactory.create_exchange(
+                exchange_config.name,
+                {
+                    'api_key': exchange_config.api_key,
+                    'secret': exchange_config.secret,
+                    'password': exchange_config.password,
+                    'sandbox': exchange_config.sandbox,
+                }
+            )
+            return True
+        except Exception as e:
+            self.logger.error(f"数据获取器初始化失败: {e}")
+            return False
+
+    async def fetch_candles(self, symbol: str, timeframe: str,
+                            limit: int = 100) -> List[Any]:
+        """拉取K线数据"""
+        return await self.exchange.get_candles(symbol, timeframe, limit=limit)
+
+    async def close(self) -> None:
+        """关闭数据获取器"""
+        self.exchange = None
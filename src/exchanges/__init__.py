@@ -1,7 +1,7 @@
-"""
-交易所集成模块
-"""
-from .exchange_factory import ExchangeFactory
-from .exchange_interface import ExchangeInterface
-
-__all__ = ['ExchangeFactory', 'ExchangeInterface']
\ No newline at end of file
+"""
+交易所集成模块
+"""
+from .exchange_factory import ExchangeFactory
+from .exchange_interface import ExchangeInterface, Ticker, iter_candle_dicts
+
+__all__ = ['ExchangeFactory', 'ExchangeInterface', 'Ticker', 'iter_candle_dicts']
@@ -1,190 +1,313 @@
-"""
-交易所统一接口
-定义所有交易所必须实现的标准接口
-"""
-
-from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
-from decimal import Decimal
-import asyncio
-
-
-class ExchangeInterface(ABC):
-    """交易所统一接口"""
-    
-    @abstractmethod
-    async def connect(self) -> bool:
-        """连接交易所"""
-        pass
-    
-    @abstractmethod
-    async def disconnect(self) -> bool:
-        """断开连接"""
-        pass
-    
-    @abstractmethod
-    async def get_balance(self, currency: str = None) -> Dict[str, Any]:
-        """
-        获取账户余额
-        
-        Args:
-            currency: 币种，None表示获取所有币种
-            
-        Returns:
-            余额信息字典
-        """
-        pass
-    
-    @abstractmethod
-    async def get_ticker(self, symbol: str) -> Dict[str, Any]:
-        """
-        获取ticker信息
-        
-        Args:
-            symbol: 交易对，如'BTC/USDT'
-            
-        Returns:
-            ticker信息字典
-        """
-        pass
-    
-    @abstractmethod
-    async def get_orderbook(self, symbol: str, limit: int = 20) -> Dict[str, Any]:
-        """
-        获取订单簿
-        
-        Args:
-            symbol: 交易对
-            limit: 深度数量
-            
-        Returns:
-            订单簿信息字典
-        """
-        pass
-    
-    @abstractmethod
-    async def get_candles(self, symbol: str, timeframe: str, limit: int = 100) -> List[Dict[str, Any]]:
-        """
-        获取K线数据
-        
-        Args:
-            symbol: 交易对
-            timeframe: 时间框架，如'1m', '5m', '1h', '4h', '1d'
-            limit: K线数量
-            
-        Returns:
-            K线数据列表
-        """
-        pass
-    
-    @abstractmethod
-    async def create_order(self, symbol: str, side: str, order_type: str, 
-                          amount: float, price: Optional[float] = None, 
-                          params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """
-        创建订单
-        
-        Args:
-            symbol: 交易对
-            side: 买卖方向，'buy'或'sell'
-            order_type: 订单类型，'market'或'limit'
-            amount: 数量
-            price: 价格（限价单需要）
-            params: 额外参数
-            
-        Returns:
-            订单信息字典
-        """
-        pass
-    
-    @abstractmethod
-    async def cancel_order(self, order_id: str, symbol: str) -> Dict[str, Any]:
-        """
-        取消订单
-        
-        Args:
-            order_id: 订单ID
-            symbol: 交易对
-            
-        Returns:
-            取消结果字典
-        """
-        pass
-    
-    @abstractmethod
-    async def get_open_orders(self, symbol: str = None) -> List[Dict[str, Any]]:
-        """
-        获取未成交订单
-        
-        Args:
-            symbol: 交易对，None表示所有交易对
-            
-        Returns:
-            订单列表
-        """
-        pass
-    
-    @abstractmethod
-    async def get_order(self, order_id: str, symbol: str) -> Dict[str, Any]:
-        """
-        获取订单详情
-        
-        Args:
-            order_id: 订单ID
-            symbol: 交易对
-            
-        Returns:
-            订单详情字典
-        """
-        pass
-    
-    @abstractmethod
-    async def get_positions(self, symbol: str = None) -> List[Dict[str, Any]]:
-        """
-        获取持仓信息
-        
-        Args:
-            symbol: 交易对，None表示所有持仓
-            
-        Returns:
-            持仓列表
-        """
-        pass
-    
-    @abstractmethod
-    async def set_leverage(self, symbol: str, leverage: int) -> Dict[str, Any]:
-        """
-        设置杠杆
-        
-        Args:
-            symbol: 交易对
-            leverage: 杠杆倍数
-            
-        Returns:
-            设置结果字典
-        """
-        pass
-    
-    @abstractmethod
-    async def get_fee(self, symbol: str) -> Dict[str, float]:
-        """
-        获取交易费率
-        
-        Args:
-            symbol: 交易对
-            
-        Returns:
-            费率信息字典
-        """
-        pass
-    
-    @abstractmethod
-    def get_exchange_name(self) -> str:
-        """获取交易所名称"""
-        pass
-    
-    @abstractmethod
-    def is_connected(self) -> bool:
-        """检查是否已连接"""
-        pass</parameter>
-</write_to_file>
\ No newline at end of file
+"""
+交易所统一接口
+定义所有交易所必须实现的标准接口
+
+所有价格/数量字段统一为float（float64）：策略数学是统计性的，
+float精度足够且可直接喂NumPy向量化；交易所要求的精确舍入由
+适配器在提交订单时用ccxt的*_to_precision做一次，不在内部混用
+Decimal。
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Protocol, runtime_checkable
+import asyncio
+
+# ccxt原始OHLCV行的列名（时间戳为epoch毫秒）
+OHLCV_FIELDS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+
+@dataclass(slots=True, frozen=True)
+class Ticker:
+    """
+    ticker快照（冻结slots）
+
+    策略每秒消费大量ticker，slots对象比8键字典省约一半内存，
+    属性按偏移读取而非哈希查找。保留__getitem__以兼容仍按
+    ticker['last']取值的旧调用方。时间戳为epoch毫秒。
+    """
+    symbol: str
+    timestamp: Optional[int] = None
+    high: Optional[float] = None
+    low: Optional[float] = None
+    bid: Optional[float] = None
+    ask: Optional[float] = None
+    last: Optional[float] = None
+    volume: Optional[float] = None
+    quote_volume: Optional[float] = None
+
+    def __getitem__(self, key: str):
+        return getattr(self, key)
+
+
+def iter_candle_dicts(candles) -> Iterator[Dict[str, Any]]:
+    """
+    把原始OHLCV行惰性转成字典行
+
+    适配器返回的是[timestamp, open, high, low, close, volume]裸行，
+    热路径按下标读；偶发需要字典行的调用方（报表、日志）用本
+    生成器逐行转换，分配按需付费，不在获取路径上预先建几千个字典。
+    时间戳保持epoch毫秒，datetime转换留给真正需要的调用方。
+    """
+    for row in candles:
+        if isinstance(row, dict):
+            yield row
+        else:
+            yield dict(zip(OHLCV_FIELDS, row))
+
+
+@runtime_checkable
+class ExchangeInterface(Protocol):
+    """
+    交易所统一接口（结构化协议）
+
+    用Protocol而非ABC：接口约束只在类型检查期生效，运行期没有
+    ABCMeta的元类和__instancecheck__开销，方法调用走普通类的
+    内联缓存。适配器可继续显式继承以复用下方的批量并发实现，
+    也可纯鸭子类型实现全部方法。
+    """
+
+    # 批量请求的最大并发数，按各交易所限频在子类调整
+    _concurrency = 8
+
+    async def connect(self) -> bool:
+        """连接交易所"""
+        ...
+    
+    async def disconnect(self) -> bool:
+        """断开连接"""
+        ...
+    
+    async def get_balance(self, currency: str = None) -> Dict[str, Any]:
+        """
+        获取账户余额
+        
+        Args:
+            currency: 币种，None表示获取所有币种
+            
+        Returns:
+            余额信息字典
+        """
+        ...
+    
+    async def get_ticker(self, symbol: str) -> Ticker:
+        """
+        获取ticker信息
+
+        Args:
+            symbol: 交易对，如'BTC/USDT'
+
+        Returns:
+            Ticker快照
+        """
+        ...
+    
+    async def get_orderbook(self, symbol: str, limit: int = 20) -> Dict[str, Any]:
+        """
+        获取订单簿
+        
+        Args:
+            symbol: 交易对
+            limit: 深度数量
+            
+        Returns:
+            订单簿信息字典
+        """
+        ...
+    
+    async def get_candles(self, symbol: str, timeframe: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        获取K线数据
+        
+        Args:
+            symbol: 交易对
+            timeframe: 时间框架，如'1m', '5m', '1h', '4h', '1d'
+            limit: K线数量
+            
+        Returns:
+            K线数据列表
+        """
+        ...
+    
+    async def create_order(self, symbol: str, side: str, order_type: str, 
+                          amount: float, price: Optional[float] = None, 
+                          params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        创建订单
+        
+        Args:
+            symbol: 交易对
+            side: 买卖方向，'buy'或'sell'
+            order_type: 订单类型，'market'或'limit'
+            amount: 数量
+            price: 价格（限价单需要）
+            params: 额外参数
+            
+        Returns:
+            订单信息字典
+        """
+        ...
+    
+    async def cancel_order(self, order_id: str, symbol: str) -> Dict[str, Any]:
+        """
+        取消订单
+        
+        Args:
+            order_id: 订单ID
+            symbol: 交易对
+            
+        Returns:
+            取消结果字典
+        """
+        ...
+    
+    async def get_open_orders(self, symbol: str = None) -> List[Dict[str, Any]]:
+        """
+        获取未成交订单
+        
+        Args:
+            symbol: 交易对，None表示所有交易对
+            
+        Returns:
+            订单列表
+        """
+        ...
+    
+    async def get_order(self, order_id: str, symbol: str) -> Dict[str, Any]:
+        """
+        获取订单详情
+        
+        Args:
+            order_id: 订单ID
+            symbol: 交易对
+            
+        Returns:
+            订单详情字典
+        """
+        ...
+    
+    async def get_positions(self, symbol: str = None) -> List[Dict[str, Any]]:
+        """
+        获取持仓信息
+        
+        Args:
+            symbol: 交易对，None表示所有持仓
+            
+        Returns:
+            持仓列表
+        """
+        ...
+    
+    async def set_leverage(self, symbol: str, leverage: int) -> Dict[str, Any]:
+        """
+        设置杠杆
+        
+        Args:
+            symbol: 交易对
+            leverage: 杠杆倍数
+            
+        Returns:
+            设置结果字典
+        """
+        ...
+    
+    async def get_fee(self, symbol: str) -> Dict[str, float]:
+        """
+        获取交易费率
+        
+        Args:
+            symbol: 交易对
+            
+        Returns:
+            费率信息字典
+        """
+        ...
+    
+    def get_exchange_name(self) -> str:
+        """获取交易所名称"""
+        ...
+    
+    def is_connected(self) -> bool:
+        """检查是否已连接"""
+        ...
+
+    async def get_tickers(self, symbols: List[str]) -> List[Any]:
+        """
+        并发获取多个交易对的ticker
+
+        用信号量限流的gather一次发出全部请求：总耗时随最慢一次
+        往返走，而不是各往返之和。失败的交易对在结果中以异常对象
+        占位（return_exceptions），不拖垮整批。
+
+        Args:
+            symbols: 交易对列表
+
+        Returns:
+            与symbols等长的结果列表，元素为ticker字典或异常
+        """
+        sem = asyncio.Semaphore(self._concurrency)
+
+        async def one(symbol: str):
+            async with sem:
+                return await self.get_ticker(symbol)
+
+        return await asyncio.gather(*(one(s) for s in symbols),
+                                    return_exceptions=True)
+
+    async def get_candles_batch(self, symbols: List[str], timeframe: str,
+                                limit: int = 100) -> List[Any]:
+        """
+        并发获取多个交易对的K线（语义同get_tickers）
+
+        Args:
+            symbols: 交易对列表
+            timeframe: 时间框架
+            limit: 每个交易对的K线数量
+
+        Returns:
+            与symbols等长的结果列表，元素为K线数据或异常
+        """
+        sem = asyncio.Semaphore(self._concurrency)
+
+        async def one(symbol: str):
+            async with sem:
+                return await self.get_candles(symbol, timeframe, limit=limit)
+
+        return await asyncio.gather(*(one(s) for s in symbols),
+                                    return_exceptions=True)
+
+    async def subscribe_candles(self, symbol: str, timeframe: str,
+                                on_message: Callable,
+                                poll_interval: float = 1.0) -> asyncio.Task:
+        """
+        订阅K线推送
+
+        默认实现用REST轮询模拟推送，仅在最新K线发生变化时回调，
+        供不支持WebSocket的交易所兜底；支持WebSocket的适配器
+        应覆盖此方法建立持久连接。
+
+        Args:
+            symbol: 交易对
+            timeframe: 时间框架
+            on_message: 回调函数，入参为K线数据列表，可以是协程函数
+            poll_interval: 轮询间隔（秒），仅默认实现使用
+
+        Returns:
+            订阅任务，取消该任务即取消订阅
+        """
+        async def _poll():
+            last_candle = None
+            while True:
+                try:
+                    candles = await self.get_candles(symbol, timeframe, limit=100)
+                    if candles and candles[-1] != last_candle:
+                        last_candle = candles[-1]
+                        result = on_message(candles)
+                        if asyncio.iscoroutine(result):
+                            await result
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    pass
+                await asyncio.sleep(poll_interval)
+
+        return asyncio.create_task(_poll())
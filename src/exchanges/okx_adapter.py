@@ -1,457 +1,770 @@
-"""
-OKX交易所适配器
-实现OKX交易所的统一接口
-"""
-
-import ccxt
-import asyncio
-from typing import Dict, List, Optional, Any
-from decimal import Decimal
-import logging
-from datetime import datetime
-import aiohttp
-
-from .exchange_interface import ExchangeInterface
-from src.utils.decorators import retry, timeout
-
-
-class OKXAdapter(ExchangeInterface):
-    """OKX交易所适配器"""
-    
-    def __init__(self, api_key: str = None, secret: str = None, 
-                 password: str = None, sandbox: bool = True):
-        """
-        初始化OKX适配器
-        
-        Args:
-            api_key: API密钥
-            secret: API密钥密钥
-            password: API密码
-            sandbox: 是否使用模拟环境
-        """
-        self.api_key = api_key
-        self.secret = secret
-        self.password = password
-        self.sandbox = sandbox
-        
-        self.exchange = None
-        self.connected = False
-        self.logger = logging.getLogger(__name__)
-        
-        # 初始化ccxt的OKX实例
-        self._init_exchange()
-    
-    def _init_exchange(self):
-        """初始化交易所实例"""
-        try:
-            config = {
-                'exchange': 'okx',
-                'sandbox': self.sandbox,
-                'options': {
-                    'defaultType': 'spot',  # 默认现货
-                    'adjustForTimeDifference': True,
-                }
-            }
-            
-            # 如果提供了API凭证，配置认证
-            if self.api_key and self.secret and self.password:
-                config.update({
-                    'apiKey': self.api_key,
-                    'secret': self.secret,
-                    'password': self.password,
-                })
-            
-            self.exchange = ccxt.okx(config)
-            self.logger.info(f"OKX交易所初始化完成 - 模式: {'模拟' if self.sandbox else '实盘'}")
-            
-        except Exception as e:
-            self.logger.error(f"OKX交易所初始化失败: {e}")
-            raise
-    
-    @retry(max_attempts=3, delay=1)
-    @timeout(30)
-    async def connect(self) -> bool:
-        """连接交易所"""
-        try:
-            if not self.exchange:
-                self._init_exchange()
-            
-            # 测试连接 - 获取服务器时间
-            await asyncio.to_thread(self.exchange.load_markets)
-            
-            self.connected = True
-            self.logger.info("OKX交易所连接成功")
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"OKX连接失败: {e}")
-            self.connected = False
-            return False
-    
-    async def disconnect(self) -> bool:
-        """断开连接"""
-        try:
-            self.connected = False
-            if self.exchange:
-                self.exchange.close()
-            self.logger.info("OKX交易所断开连接")
-            return True
-        except Exception as e:
-            self.logger.error(f"OKX断开连接失败: {e}")
-            return False
-    
-    @retry(max_attempts=3, delay=1)
-    @timeout(30)
-    async def get_balance(self, currency: str = None) -> Dict[str, Any]:
-        """获取账户余额"""
-        try:
-            if not self.connected:
-                await self.connect()
-            
-            balance = await asyncio.to_thread(self.exchange.fetch_balance)
-            
-            if currency:
-                # 返回指定币种余额
-                currency_upper = currency.upper()
-                return {
-                    'currency': currency_upper,
-                    'free': balance['free'].get(currency_upper, 0),
-                    'used': balance['used'].get(currency_upper, 0),
-                    'total': balance['total'].get(currency_upper, 0),
-                }
-            
-            # 返回所有币种余额
-            return balance
-            
-        except Exception as e:
-            self.logger.error(f"获取余额失败: {e}")
-            raise
-    
-    @retry(max_attempts=3, delay=1)
-    @timeout(30)
-    async def get_ticker(self, symbol: str) -> Dict[str, Any]:
-        """获取ticker信息"""
-        try:
-            if not self.connected:
-                await self.connect()
-            
-            ticker = await asyncio.to_thread(self.exchange.fetch_ticker, symbol)
-            
-            return {
-                'symbol': symbol,
-                'timestamp': ticker['timestamp'],
-                'datetime': ticker['datetime'],
-                'high': ticker['high'],
-                'low': ticker['low'],
-                'bid': ticker['bid'],
-                'ask': ticker['ask'],
-                'last': ticker['last'],
-                'volume': ticker['baseVolume'],
-                'quote_volume': ticker['quoteVolume'],
-            }
-            
-        except Exception as e:
-            self.logger.error(f"获取ticker失败: {e}")
-            raise
-    
-    @retry(max_attempts=3, delay=1)
-    @timeout(30)
-    async def get_orderbook(self, symbol: str, limit: int = 20) -> Dict[str, Any]:
-        """获取订单簿"""
-        try:
-            if not self.connected:
-                await self.connect()
-            
-            orderbook = await asyncio.to_thread(self.exchange.fetch_order_book, symbol, limit)
-            
-            return {
-                'symbol': symbol,
-                'timestamp': orderbook['timestamp'],
-                'datetime': orderbook['datetime'],
-                'bids': orderbook['bids'][:limit],
-                'asks': orderbook['asks'][:limit],
-            }
-            
-        except Exception as e:
-            self.logger.error(f"获取订单簿失败: {e}")
-            raise
-    
-    @retry(max_attempts=3, delay=1)
-    @timeout(60)
-    async def get_candles(self, symbol: str, timeframe: str, limit: int = 100) -> List[Dict[str, Any]]:
-        """获取K线数据"""
-        try:
-            if not self.connected:
-                await self.connect()
-            
-            # 时间框架映射
-            timeframe_map = {
-                '1m': '1m', '5m': '5m', '15m': '15m', '30m': '30m',
-                '1h': '1H', '4h': '4H', '1d': '1D', '1w': '1W',
-            }
-            
-            tf = timeframe_map.get(timeframe, timeframe)
-            
-            candles = await asyncio.to_thread(
-                self.exchange.fetch_ohlcv, 
-                symbol, 
-                tf, 
-                limit=limit
-            )
-            
-            result = []
-            for candle in candles:
-                result.append({
-                    'timestamp': candle[0],
-                    'datetime': datetime.fromtimestamp(candle[0] / 1000).isoformat(),
-                    'open': candle[1],
-                    'high': candle[2],
-                    'low': candle[3],
-                    'close': candle[4],
-                    'volume': candle[5],
-                })
-            
-            return result
-            
-        except Exception as e:
-            self.logger.error(f"获取K线数据失败: {e}")
-            raise
-    
-    @retry(max_attempts=3, delay=2)
-    @timeout(60)
-    async def create_order(self, symbol: str, side: str, order_type: str, 
-                          amount: float, price: Optional[float] = None, 
-                          params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """创建订单"""
-        try:
-            if not self.connected:
-                await self.connect()
-            
-            # 验证参数
-            if order_type == 'limit' and price is None:
-                raise ValueError("限价单必须提供价格")
-            
-            # 订单类型映射
-            type_map = {
-                'market': 'market',
-                'limit': 'limit',
-            }
-            
-            order = {
-                'symbol': symbol,
-                'type': type_map.get(order_type, order_type),
-                'side': side,
-                'amount': amount,
-            }
-            
-            if price:
-                order['price'] = price
-            
-            if params:
-                order.update(params)
-            
-            result = await asyncio.to_thread(self.exchange.create_order, **order)
-            
-            return {
-                'order_id': result['id'],
-                'symbol': result['symbol'],
-                'type': result['type'],
-                'side': result['side'],
-                'price': result['price'],
-                'amount': result['amount'],
-                'filled': result['filled'],
-                'remaining': result['remaining'],
-                'status': result['status'],
-                'timestamp': result['timestamp'],
-            }
-            
-        except Exception as e:
-            self.logger.error(f"创建订单失败: {e}")
-            raise
-    
-    @retry(max_attempts=3, delay=1)
-    @timeout(30)
-    async def cancel_order(self, order_id: str, symbol: str) -> Dict[str, Any]:
-        """取消订单"""
-        try:
-            if not self.connected:
-                await self.connect()
-            
-            result = await asyncio.to_thread(
-                self.exchange.cancel_order, 
-                order_id, 
-                symbol
-            )
-            
-            return {
-                'order_id': result['id'],
-                'symbol': result['symbol'],
-                'status': result['status'],
-                'info': result,
-            }
-            
-        except Exception as e:
-            self.logger.error(f"取消订单失败: {e}")
-            raise
-    
-    @retry(max_attempts=2, delay=1)
-    @timeout(30)
-    async def get_open_orders(self, symbol: str = None) -> List[Dict[str, Any]]:
-        """获取未成交订单"""
-        try:
-            if not self.connected:
-                await self.connect()
-            
-            orders = await asyncio.to_thread(
-                self.exchange.fetch_open_orders, 
-                symbol
-            )
-            
-            result = []
-            for order in orders:
-                result.append({
-                    'order_id': order['id'],
-                    'symbol': order['symbol'],
-                    'type': order['type'],
-                    'side': order['side'],
-                    'price': order['price'],
-                    'amount': order['amount'],
-                    'filled': order['filled'],
-                    'remaining': order['remaining'],
-                    'status': order['status'],
-                    'timestamp': order['timestamp'],
-                })
-            
-            return result
-            
-        except Exception as e:
-            self.logger.error(f"获取未成交订单失败: {e}")
-            raise
-    
-    @retry(max_attempts=2, delay=1)
-    @timeout(30)
-    async def get_order(self, order_id: str, symbol: str) -> Dict[str, Any]:
-        """获取订单详情"""
-        try:
-            if not self.connected:
-                await self.connect()
-            
-            order = await asyncio.to_thread(
-                self.exchange.fetch_order, 
-                order_id, 
-                symbol
-            )
-            
-            return {
-                'order_id': order['id'],
-                'symbol': order['symbol'],
-                'type': order['type'],
-                'side': order['side'],
-                'price': order['price'],
-                'amount': order['amount'],
-                'filled': order['filled'],
-                'remaining': order['remaining'],
-                'status': order['status'],
-                'timestamp': order['timestamp'],
-                'trades': order.get('trades', []),
-            }
-            
-        except Exception as e:
-            self.logger.error(f"获取订单详情失败: {e}")
-            raise
-    
-    @retry(max_attempts=2, delay=1)
-    @timeout(30)
-    async def get_positions(self, symbol: str = None) -> List[Dict[str, Any]]:
-        """获取持仓信息（合约）"""
-        try:
-            if not self.connected:
-                await self.connect()
-            
-            # OKX合约持仓
-            positions = await asyncio.to_thread(self.exchange.fetch_positions, symbol)
-            
-            result = []
-            for pos in positions:
-                result.append({
-                    'symbol': pos['symbol'],
-                    'side': pos['side'],
-                    'contracts': pos['contracts'],
-                    'entry_price': pos['entryPrice'],
-                    'mark_price': pos['markPrice'],
-                    'unrealized_pnl': pos['unrealizedPnl'],
-                    'liquidation_price': pos['liquidationPrice'],
-                    'leverage': pos['leverage'],
-                })
-            
-            return result
-            
-        except Exception as e:
-            self.logger.error(f"获取持仓失败: {e}")
-            raise
-    
-    @retry(max_attempts=2, delay=1)
-    @timeout(30)
-    async def set_leverage(self, symbol: str, leverage: int) -> Dict[str, Any]:
-        """设置杠杆"""
-        try:
-            if not self.connected:
-                await self.connect()
-            
-            # OKX设置杠杆需要特定参数
-            params = {
-                'leverage': leverage,
-                'symbol': symbol,
-            }
-            
-            result = await asyncio.to_thread(
-                self.exchange.set_leverage, 
-                leverage, 
-                symbol
-            )
-            
-            return {
-                'symbol': symbol,
-                'leverage': leverage,
-                'info': result,
-            }
-            
-        except Exception as e:
-            self.logger.error(f"设置杠杆失败: {e}")
-            raise
-    
-    @retry(max_attempts=2, delay=1)
-    @timeout(30)
-    async def get_fee(self, symbol: str) -> Dict[str, float]:
-        """获取交易费率"""
-        try:
-            if not self.connected:
-                await self.connect()
-            
-            # 加载市场信息
-            markets = await asyncio.to_thread(self.exchange.load_markets)
-            
-            if symbol not in markets:
-                raise ValueError(f"交易对 {symbol} 不存在")
-            
-            market = markets[symbol]
-            
-            return {
-                'symbol': symbol,
-                'maker': market.get('maker', 0),
-                'taker': market.get('taker', 0),
-                'precision': market.get('precision', {}),
-            }
-            
-        except Exception as e:
-            self.logger.error(f"获取费率失败: {e}")
-            raise
-    
-    def get_exchange_name(self) -> str:
-        """获取交易所名称"""
-        return "OKX"
-    
-    def is_connected(self) -> bool:
-        """检查是否已连接"""
-        return self.connected</parameter>
-</write_to_file>
\ No newline at end of file
+"""
+OKX交易所适配器
+实现OKX交易所的统一接口
+"""
+
+import ccxt.async_support as ccxt
+import asyncio
+import json
+import random
+import time
+import types
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+from datetime import datetime
+import aiohttp
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # orjson为可选加速依赖，缺失时用ccxt默认解析
+    orjson = None
+
+from .exchange_interface import ExchangeInterface, Ticker
+
+
+class _TokenBucket:
+    """令牌桶限流器：按固定速率补充令牌，无令牌时挂起等待"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'stamp')
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate          # 每秒补充令牌数
+        self.capacity = capacity  # 桶容量（允许的突发量）
+        self.tokens = capacity
+        self.stamp = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity,
+                              self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return
+            await asyncio.sleep((1.0 - self.tokens) / self.rate)
+
+
+class OKXAdapter(ExchangeInterface):
+    """OKX交易所适配器"""
+
+    # 批量请求并发上限：OKX公共接口限频约20次/2秒，留出余量
+    _concurrency = 10
+
+    # WebSocket行情端点；v5的K线频道在business端点，tickers在public
+    _WS_URLS = {
+        'public': 'wss://ws.okx.com:8443/ws/v5/public',
+        'business': 'wss://ws.okx.com:8443/ws/v5/business',
+    }
+    _WS_URLS_DEMO = {
+        'public': 'wss://wspap.okx.com:8443/ws/v5/public?brokerId=9999',
+        'business': 'wss://wspap.okx.com:8443/ws/v5/business?brokerId=9999',
+    }
+
+    # WS推送的ticker最大可信时长（秒），超龄回退REST
+    _WS_TICKER_MAX_AGE = 2.0
+
+    # ccxt与OKX的时间框架/订单类型映射：类级只读表，
+    # 不在每次请求时重建字典
+    _TIMEFRAME_MAP = types.MappingProxyType({
+        '1m': '1m', '5m': '5m', '15m': '15m', '30m': '30m',
+        '1h': '1H', '4h': '4H', '1d': '1D', '1w': '1W',
+    })
+    _ORDER_TYPE_MAP = types.MappingProxyType({
+        'market': 'market',
+        'limit': 'limit',
+    })
+
+    def __init__(self, api_key: str = None, secret: str = None, 
+                 password: str = None, sandbox: bool = True):
+        """
+        初始化OKX适配器
+        
+        Args:
+            api_key: API密钥
+            secret: API密钥密钥
+            password: API密码
+            sandbox: 是否使用模拟环境
+        """
+        self.api_key = api_key
+        self.secret = secret
+        self.password = password
+        self.sandbox = sandbox
+        
+        self.exchange = None
+        self.connected = False
+        self.logger = logging.getLogger(__name__)
+
+        # 适配器生命周期内共享的aiohttp会话（连接池+DNS缓存），
+        # 在connect()里惰性创建：ClientSession必须在事件循环内构造
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._connect_lock = asyncio.Lock()
+
+        # 市场元数据缓存时间戳：市场表盘中基本不变，按TTL刷新，
+        # get_fee不再每次都付一趟REST往返
+        self._markets_ts = 0.0
+        self._fetch_balance = None
+        self._fetch_ticker = None
+        self._fetch_order_book = None
+        self._fetch_ohlcv = None
+        self._create_order = None
+        self._markets_ttl = 3600.0
+
+        # 按端点组限流：OKX对行情/交易/账户接口的限频不同，
+        # 独立桶让行情轮询打满自己的额度而不被账户查询拖慢
+        self._buckets = {
+            'market': _TokenBucket(rate=15.0, capacity=15.0),
+            'trade': _TokenBucket(rate=8.0, capacity=8.0),
+            'account': _TokenBucket(rate=4.0, capacity=4.0),
+        }
+
+        # WebSocket行情状态：每个端点一条连接/一个重连任务，
+        # tickers推送落在本地缓存，K线推送直接回调订阅方
+        self._ws_tasks: Dict[str, asyncio.Task] = {}
+        self._ws_conns: Dict[str, Any] = {}
+        self._ws_subs: Dict[str, set] = {'public': set(), 'business': set()}
+        self._ticker_cache: Dict[str, Tuple[Ticker, float]] = {}
+        self._candle_handlers: Dict[Tuple[str, str], Callable] = {}
+        self._trade_queues: Dict[str, List[asyncio.Queue]] = {}
+
+        # 初始化ccxt的OKX实例
+        self._init_exchange()
+    
+    def _init_exchange(self):
+        """初始化交易所实例"""
+        try:
+            config = {
+                'exchange': 'okx',
+                'sandbox': self.sandbox,
+                # 限频由下面的按端点令牌桶管理；ccxt内置的是全局
+                # 单桶，会让行情接口陪着账户接口一起排队
+                'enableRateLimit': False,
+                'options': {
+                    'defaultType': 'spot',  # 默认现货
+                    'adjustForTimeDifference': True,
+                }
+            }
+            
+            # 如果提供了API凭证，配置认证
+            if self.api_key and self.secret and self.password:
+                config.update({
+                    'apiKey': self.api_key,
+                    'secret': self.secret,
+                    'password': self.password,
+                })
+            
+            self.exchange = ccxt.okx(config)
+
+            # K线等重负载接口每次解析上百KB的JSON数组，orjson比
+            # 标准库快3-5倍；解析失败时与ccxt默认行为一致返回None
+            if orjson is not None:
+                def _parse_json(http_response):
+                    try:
+                        return orjson.loads(http_response)
+                    except Exception:
+                        return None
+                self.exchange.parse_json = _parse_json
+
+            self.logger.info("OKX交易所初始化完成 - 模式: %s", "模拟" if self.sandbox else "实盘")
+            
+        except Exception as e:
+            self.logger.error("OKX交易所初始化失败: %s", e)
+            raise
+
+    # 网络层错误与超时可重试；交易所明确拒绝（参数/资金/权限）直接抛出
+    _RETRYABLE = (ccxt.NetworkError, asyncio.TimeoutError)
+
+    async def _call(self, fn, *args, timeout: float = 30.0, attempts: int = 3,
+                    base: float = 0.25, bucket: str = 'market', **kwargs):
+        """
+        统一的请求中间件：超时+带抖动的指数退避重试
+
+        取代原来每个方法上@retry+@timeout的装饰器栈——那要为每次
+        调用额外创建两层包装协程帧；这里单帧完成，且退避带随机
+        抖动，限频风暴时不会全体同刻重发。
+
+        连接检查也在这里集中做：各公开方法不再各自带
+        if not self.connected前导分支，冷启动并发由_ensure_connected
+        的锁收敛成一次connect。
+
+        Args:
+            fn: 要调用的协程函数
+            timeout: 单次调用超时（秒）
+            attempts: 最大尝试次数
+            base: 退避基准（秒），第i次失败后挂起base*2^i+抖动
+        """
+        await self._ensure_connected()
+        if type(fn) is str:
+            # 预绑定方法按属性名传入，连接建立后才解析，
+            # 冷启动时不会读到尚未绑定的属性
+            fn = getattr(self, fn)
+        limiter = self._buckets[bucket]
+        for i in range(attempts):
+            await limiter.acquire()
+            try:
+                return await asyncio.wait_for(fn(*args, **kwargs), timeout)
+            except self._RETRYABLE as e:
+                if i == attempts - 1:
+                    raise
+                delay = base * (2 ** i) + random.random() * base
+                self.logger.warning(
+                    "请求失败(%s)，%.2fs后重试: %s", type(e).__name__, delay, e
+                )
+                await asyncio.sleep(delay)
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        """
+        惰性创建共享aiohttp会话（连接池+DNS缓存）
+
+        TCP+TLS握手和DNS解析只付一次，REST轮询与WebSocket连接
+        共用；必须在事件循环内调用。
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=32,
+                ttl_dns_cache=300,
+                keepalive_timeout=75,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=30),
+            )
+            self.exchange.session = self._session
+        return self._session
+
+    async def _ensure_connected(self) -> None:
+        """
+        确保已连接（合并并发的冷启动）
+
+        N个协程同时发现未连接时，只有拿到锁的第一个真正执行
+        load_markets，其余在锁上等待后直接复用结果——避免N路
+        重复REST冷启动（也是常见的封禁诱因）。
+        """
+        if self.connected:
+            return
+        async with self._connect_lock:
+            if not self.connected:
+                await self._connect_locked()
+
+    async def connect(self) -> bool:
+        """连接交易所"""
+        async with self._connect_lock:
+            if self.connected:
+                return True
+            return await self._connect_locked()
+
+    async def _connect_locked(self) -> bool:
+        """连接主体，调用方必须已持有_connect_lock"""
+        try:
+            if not self.exchange:
+                self._init_exchange()
+
+            # 全部REST/WS请求复用同一个带连接池的会话
+            self._ensure_session()
+
+            # 测试连接 - 获取服务器时间；不走_call以免递归进
+            # _ensure_connected，超时与限频在此单独处理
+            await self._buckets['market'].acquire()
+            await asyncio.wait_for(self.exchange.load_markets(), 30.0)
+            self._markets_ts = time.monotonic()
+
+            # 预绑定热路径方法：省掉每次调用的exchange属性链查找
+            ex = self.exchange
+            self._fetch_balance = ex.fetch_balance
+            self._fetch_ticker = ex.fetch_ticker
+            self._fetch_order_book = ex.fetch_order_book
+            self._fetch_ohlcv = ex.fetch_ohlcv
+            self._create_order = ex.create_order
+
+            self.connected = True
+            self.logger.info("OKX交易所连接成功")
+            return True
+
+        except Exception as e:
+            self.logger.error("OKX连接失败: %s", e)
+            self.connected = False
+            return False
+    
+    async def disconnect(self) -> bool:
+        """断开连接（关闭ccxt持有的aiohttp会话，否则连接器泄漏）"""
+        try:
+            self.connected = False
+            for task in self._ws_tasks.values():
+                task.cancel()
+            self._ws_tasks.clear()
+            self._ws_conns.clear()
+            if self.exchange:
+                # ccxt的close()会一并关闭注入的共享会话
+                await self.exchange.close()
+            self._session = None
+            self.logger.info("OKX交易所断开连接")
+            return True
+        except Exception as e:
+            self.logger.error("OKX断开连接失败: %s", e)
+            return False
+    
+    async def get_balance(self, currency: str = None) -> Dict[str, Any]:
+        """获取账户余额"""
+        try:
+            balance = await self._call('_fetch_balance',
+                                       bucket='account')
+            
+            if currency:
+                # 返回指定币种余额
+                currency_upper = currency.upper()
+                return {
+                    'currency': currency_upper,
+                    'free': balance['free'].get(currency_upper, 0),
+                    'used': balance['used'].get(currency_upper, 0),
+                    'total': balance['total'].get(currency_upper, 0),
+                }
+            
+            # 返回所有币种余额
+            return balance
+            
+        except Exception as e:
+            self.logger.error("获取余额失败: %s", e)
+            raise
+    
+    async def get_ticker(self, symbol: str) -> Ticker:
+        """
+        获取ticker信息
+
+        优先读WebSocket推送缓存（零RTT）；缓存缺失或超龄时回退
+        REST，同时登记WS订阅让后续调用走推送。
+        """
+        cached = self._ticker_cache.get(symbol)
+        if cached is not None and time.monotonic() - cached[1] < self._WS_TICKER_MAX_AGE:
+            return cached[0]
+
+        try:
+            # 登记订阅：首次调用后tickers由WS持续推送
+            try:
+                await self._ws_subscribe('public', 'tickers', symbol)
+            except Exception:
+                pass
+
+            ticker = await self._call('_fetch_ticker', symbol)
+
+            return Ticker(
+                symbol=symbol,
+                timestamp=ticker['timestamp'],
+                high=ticker['high'],
+                low=ticker['low'],
+                bid=ticker['bid'],
+                ask=ticker['ask'],
+                last=ticker['last'],
+                volume=ticker['baseVolume'],
+                quote_volume=ticker['quoteVolume'],
+            )
+            
+        except Exception as e:
+            self.logger.error("获取ticker失败: %s", e)
+            raise
+    
+    async def get_orderbook(self, symbol: str, limit: int = 20) -> Dict[str, Any]:
+        """
+        获取订单簿
+
+        bids/asks是shape=(N,2)的float64数组（列为[价格, 数量]），
+        在适配器边界一次转换，下游的VWAP/不平衡度等微结构计算
+        直接向量化，不再对2N个Python float逐档循环；需要JSON序列化
+        时对数组调用.tolist()即可。
+        """
+        try:
+            orderbook = await self._call('_fetch_order_book', symbol, limit)
+            
+            return {
+                'symbol': symbol,
+                'timestamp': orderbook['timestamp'],
+                'datetime': orderbook['datetime'],
+                'bids': np.asarray(orderbook['bids'][:limit],
+                                   dtype=np.float64).reshape(-1, 2),
+                'asks': np.asarray(orderbook['asks'][:limit],
+                                   dtype=np.float64).reshape(-1, 2),
+            }
+            
+        except Exception as e:
+            self.logger.error("获取订单簿失败: %s", e)
+            raise
+    
+    async def get_candles(self, symbol: str, timeframe: str, limit: int = 100) -> np.ndarray:
+        """
+        获取K线数据
+
+        返回shape=(N,6)的float64数组，列序为
+        [timestamp, open, high, low, close, volume]：一次np.asarray
+        在C层完成全部数值转换，免去逐根的Python循环和字典重组，
+        下游指标可直接按列切片零拷贝计算；需要带列标签时用
+        MarketEvent.as_df()延迟构建DataFrame。
+        """
+        try:
+            tf = self._TIMEFRAME_MAP.get(timeframe, timeframe)
+
+            candles = await self._call('_fetch_ohlcv', symbol, tf,
+                                       limit=limit, timeout=60.0)
+            return np.asarray(candles, dtype=np.float64).reshape(-1, 6)
+
+        except Exception as e:
+            self.logger.error("获取K线数据失败: %s", e)
+            raise
+    
+    async def create_order(self, symbol: str, side: str, order_type: str, 
+                          amount: float, price: Optional[float] = None, 
+                          params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """创建订单"""
+        try:
+            # 验证参数
+            if order_type == 'limit' and price is None:
+                raise ValueError("限价单必须提供价格")
+            
+            # 精度舍入只在提交边界做一次（ccxt按市场精度返回字符串），
+            # 内部全程float64，不引入Decimal混算
+            order = {
+                'symbol': symbol,
+                'type': self._ORDER_TYPE_MAP.get(order_type, order_type),
+                'side': side,
+                'amount': self.exchange.amount_to_precision(symbol, amount),
+            }
+            
+            if price:
+                order['price'] = self.exchange.price_to_precision(symbol, price)
+            
+            if params:
+                order.update(params)
+            
+            result = await self._call('_create_order', timeout=60.0,
+                                      base=0.5, bucket='trade', **order)
+            
+            return {
+                'order_id': result['id'],
+                'symbol': result['symbol'],
+                'type': result['type'],
+                'side': result['side'],
+                'price': result['price'],
+                'amount': result['amount'],
+                'filled': result['filled'],
+                'remaining': result['remaining'],
+                'status': result['status'],
+                'timestamp': result['timestamp'],
+            }
+            
+        except Exception as e:
+            self.logger.error("创建订单失败: %s", e)
+            raise
+    
+    async def cancel_order(self, order_id: str, symbol: str) -> Dict[str, Any]:
+        """取消订单"""
+        try:
+            result = await self._call(self.exchange.cancel_order, order_id, symbol,
+                                      bucket='trade')
+            
+            return {
+                'order_id': result['id'],
+                'symbol': result['symbol'],
+                'status': result['status'],
+                'info': result,
+            }
+            
+        except Exception as e:
+            self.logger.error("取消订单失败: %s", e)
+            raise
+    
+    async def get_open_orders(self, symbol: str = None) -> List[Dict[str, Any]]:
+        """获取未成交订单"""
+        try:
+            orders = await self._call(self.exchange.fetch_open_orders, symbol,
+                                      attempts=2, bucket='trade')
+            
+            result = []
+            for order in orders:
+                result.append({
+                    'order_id': order['id'],
+                    'symbol': order['symbol'],
+                    'type': order['type'],
+                    'side': order['side'],
+                    'price': order['price'],
+                    'amount': order['amount'],
+                    'filled': order['filled'],
+                    'remaining': order['remaining'],
+                    'status': order['status'],
+                    'timestamp': order['timestamp'],
+                })
+            
+            return result
+            
+        except Exception as e:
+            self.logger.error("获取未成交订单失败: %s", e)
+            raise
+    
+    async def get_order(self, order_id: str, symbol: str) -> Dict[str, Any]:
+        """获取订单详情"""
+        try:
+            order = await self._call(self.exchange.fetch_order, order_id, symbol,
+                                     attempts=2, bucket='trade')
+            
+            return {
+                'order_id': order['id'],
+                'symbol': order['symbol'],
+                'type': order['type'],
+                'side': order['side'],
+                'price': order['price'],
+                'amount': order['amount'],
+                'filled': order['filled'],
+                'remaining': order['remaining'],
+                'status': order['status'],
+                'timestamp': order['timestamp'],
+                'trades': order.get('trades', []),
+            }
+            
+        except Exception as e:
+            self.logger.error("获取订单详情失败: %s", e)
+            raise
+    
+    async def get_positions(self, symbol: str = None) -> List[Dict[str, Any]]:
+        """获取持仓信息（合约）"""
+        try:
+            # OKX合约持仓
+            positions = await self._call(self.exchange.fetch_positions, symbol,
+                                         attempts=2, bucket='account')
+            
+            result = []
+            for pos in positions:
+                result.append({
+                    'symbol': pos['symbol'],
+                    'side': pos['side'],
+                    'contracts': pos['contracts'],
+                    'entry_price': pos['entryPrice'],
+                    'mark_price': pos['markPrice'],
+                    'unrealized_pnl': pos['unrealizedPnl'],
+                    'liquidation_price': pos['liquidationPrice'],
+                    'leverage': pos['leverage'],
+                })
+            
+            return result
+            
+        except Exception as e:
+            self.logger.error("获取持仓失败: %s", e)
+            raise
+    
+    async def set_leverage(self, symbol: str, leverage: int) -> Dict[str, Any]:
+        """设置杠杆"""
+        try:
+            # OKX设置杠杆需要特定参数
+            params = {
+                'leverage': leverage,
+                'symbol': symbol,
+            }
+            
+            result = await self._call(self.exchange.set_leverage, leverage, symbol,
+                                      attempts=2, bucket='trade')
+            
+            return {
+                'symbol': symbol,
+                'leverage': leverage,
+                'info': result,
+            }
+            
+        except Exception as e:
+            self.logger.error("设置杠杆失败: %s", e)
+            raise
+    
+    async def _markets(self) -> Dict[str, Any]:
+        """
+        获取市场元数据（带TTL缓存）
+
+        首次加载后直接读self.exchange.markets，绕过load_markets
+        内部的锁与协程开销；超过TTL才强制reload一次。
+        """
+        if (self.exchange.markets
+                and time.monotonic() - self._markets_ts < self._markets_ttl):
+            return self.exchange.markets
+        markets = await self._call(self.exchange.load_markets, True)
+        self._markets_ts = time.monotonic()
+        return markets
+
+    async def get_fee(self, symbol: str) -> Dict[str, float]:
+        """获取交易费率"""
+        try:
+            # 市场信息走TTL缓存
+            markets = await self._markets()
+            
+            if symbol not in markets:
+                raise ValueError(f"交易对 {symbol} 不存在")
+            
+            market = markets[symbol]
+            
+            return {
+                'symbol': symbol,
+                'maker': market.get('maker', 0),
+                'taker': market.get('taker', 0),
+                'precision': market.get('precision', {}),
+            }
+            
+        except Exception as e:
+            self.logger.error("获取费率失败: %s", e)
+            raise
+    
+    # ------------------------------------------------------------------
+    # WebSocket行情：一条连接承载任意多订阅，推送代替REST轮询
+    # ------------------------------------------------------------------
+
+    async def _ws_subscribe(self, kind: str, channel: str, symbol: str):
+        """登记并（若连接已建立）立即发送一个WS订阅"""
+        inst = symbol.replace('/', '-')
+        key = (channel, inst)
+        subs = self._ws_subs[kind]
+        if key in subs:
+            return
+        subs.add(key)
+
+        task = self._ws_tasks.get(kind)
+        if task is None or task.done():
+            self._ws_tasks[kind] = asyncio.create_task(self._ws_loop(kind))
+
+        ws = self._ws_conns.get(kind)
+        if ws is not None and not ws.closed:
+            await ws.send_json({'op': 'subscribe',
+                                'args': [{'channel': channel, 'instId': inst}]})
+
+    async def _ws_loop(self, kind: str):
+        """WS连接维护循环：断线指数退避重连，重连后恢复全部订阅"""
+        urls = self._WS_URLS_DEMO if self.sandbox else self._WS_URLS
+        url = urls[kind]
+        backoff = 1.0
+        while True:
+            try:
+                session = self._ensure_session()
+                async with session.ws_connect(url, heartbeat=20) as ws:
+                    self._ws_conns[kind] = ws
+                    backoff = 1.0
+                    subs = self._ws_subs[kind]
+                    if subs:
+                        await ws.send_json({
+                            'op': 'subscribe',
+                            'args': [{'channel': c, 'instId': i} for c, i in subs],
+                        })
+                    async for msg in ws:
+                        if msg.type != aiohttp.WSMsgType.TEXT:
+                            continue
+                        try:
+                            self._on_ws_message(msg.data)
+                        except Exception as e:
+                            self.logger.debug("WS消息处理失败: %s", e)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning("WS(%s)断开，%.0fs后重连: %s", kind, backoff, e)
+            self._ws_conns.pop(kind, None)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    def _on_ws_message(self, raw: str):
+        """解析一条WS推送：tickers进缓存，candle推给订阅回调"""
+        msg = json.loads(raw)
+        data = msg.get('data')
+        if not data:
+            return  # 订阅确认/错误/心跳
+
+        arg = msg.get('arg', {})
+        channel = arg.get('channel')
+        symbol = arg.get('instId', '').replace('-', '/')
+
+        if channel == 'tickers':
+            t = data[-1]
+            ticker = Ticker(
+                symbol=symbol,
+                timestamp=int(t['ts']),
+                high=float(t['high24h']),
+                low=float(t['low24h']),
+                bid=float(t['bidPx']),
+                ask=float(t['askPx']),
+                last=float(t['last']),
+                volume=float(t['vol24h']),
+                quote_volume=float(t['volCcy24h']),
+            )
+            self._ticker_cache[symbol] = (ticker, time.monotonic())
+        elif channel == 'trades':
+            queues = self._trade_queues.get(symbol)
+            if queues:
+                for t in data:
+                    trade = {
+                        'symbol': symbol,
+                        'trade_id': t.get('tradeId'),
+                        'timestamp': int(t['ts']),
+                        'side': t.get('side'),
+                        'price': float(t['px']),
+                        'amount': float(t['sz']),
+                    }
+                    for q in queues:
+                        q.put_nowait(trade)
+        elif channel and channel.startswith('candle'):
+            handler = self._candle_handlers.get((channel, symbol))
+            if handler is not None:
+                rows = np.asarray(
+                    [row[:6] for row in data], dtype=np.float64)
+                result = handler(rows)
+                if asyncio.iscoroutine(result):
+                    asyncio.create_task(result)
+
+    async def stream_trades(self, symbols: List[str]) -> asyncio.Queue:
+        """
+        订阅多个交易对的逐笔成交流
+
+        每个symbol独立订阅，推送到达即刻入队，不做跨symbol的批量
+        合并——多symbol合并流在OKX上会产生秒级甚至分钟级的迟到
+        尾巴。所有symbol共享一条WS连接（单连接可承载数百路订阅），
+        消费方从返回的队列逐笔取用。
+
+        Args:
+            symbols: 交易对列表
+
+        Returns:
+            成交字典队列，字段: symbol/trade_id/timestamp/side/price/amount
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for symbol in symbols:
+            self._trade_queues.setdefault(symbol, []).append(queue)
+            await self._ws_subscribe('public', 'trades', symbol)
+        return queue
+
+    async def subscribe_candles(self, symbol: str, timeframe: str,
+                                on_message: Callable,
+                                poll_interval: float = 1.0) -> asyncio.Task:
+        """
+        订阅K线推送（覆盖基类的REST轮询实现）
+
+        先用REST回填一次历史窗口让策略立刻有完整上下文，之后
+        增量K线由WebSocket推送，毫秒级到达且不占REST限频。
+        返回的任务被取消时注销该订阅的回调。
+        """
+        tf = self._TIMEFRAME_MAP.get(timeframe, timeframe)
+        channel = f'candle{tf}'
+        key = (channel, symbol)
+
+        async def _run():
+            try:
+                candles = await self.get_candles(symbol, timeframe, limit=100)
+                # ndarray不能做整体真值判断，按长度判空
+                if len(candles):
+                    result = on_message(candles)
+                    if asyncio.iscoroutine(result):
+                        await result
+                self._candle_handlers[key] = on_message
+                await self._ws_subscribe('business', channel, symbol)
+                # 挂起到订阅被取消为止，推送在WS循环里直接回调
+                await asyncio.Event().wait()
+            finally:
+                self._candle_handlers.pop(key, None)
+
+        return asyncio.create_task(_run())
+
+    def get_exchange_name(self) -> str:
+        """获取交易所名称"""
+        return "OKX"
+    
+    def is_connected(self) -> bool:
+        """检查是否已连接"""
+        return self.connected
@@ -1,7 +1,6 @@
-"""
-风险管理系统
-"""
-from .risk_manager import RiskManager
-from .position_calculator import PositionCalculator
-
-__all__ = ['RiskManager', 'PositionCalculator']
\ No newline at end of file
+"""
+风险管理系统
+"""
+from .risk_manager import RiskManager, PositionCalculator
+
+__all__ = ['RiskManager', 'PositionCalculator']
@@ -1,489 +1,879 @@
-"""
-风险管理系统
-负责仓位计算、止盈止损、熔断机制等风控功能
-"""
-
-from dataclasses import dataclass
-from typing import Dict, Any, Optional, List
-from decimal import Decimal
-from datetime import datetime, timedelta
-from loguru import logger
-
-from src.core.events import RiskEvent, OrderEvent, EventType
-
-
-@dataclass
-class RiskConfig:
-    """风控配置"""
-    max_leverage: int = 20
-    min_leverage: int = 3
-    max_position_size: float = 0.3  # 单币种最大30%
-    risk_per_trade: float = 0.02  # 单笔风险2%
-    stop_loss_percent: float = 0.02  # 硬止损2%
-    take_profit_1: float = 1.5  # 第一批止盈1.5倍
-    take_profit_2: float = 2.0  # 第二批止盈2.0倍
-    trailing_stop: float = 0.03  # 移动止盈回撤3%
-    max_consecutive_losses: int = 3  # 熔断机制
-    max_daily_loss: float = 0.05  # 日最大亏损5%
-    min_order_size: float = 10.0  # 最小订单金额(USDT)
-
-
-class PositionCalculator:
-    """仓位计算器"""
-    
-    def __init__(self, config: RiskConfig):
-        self.config = config
-        self.logger = logger.bind(module="PositionCalculator")
-    
-    def calculate_position_size(self, balance: float, price: float, 
-                               symbol: str = "BTC/USDT") -> Dict[str, Any]:
-        """
-        计算仓位大小
-        
-        Args:
-            balance: 账户余额
-            price: 当前价格
-            
-        Returns:
-            仓位信息
-        """
-        # 1. 根据资金规模确定杠杆
-        if balance < 10000:
-            leverage = self.config.max_leverage  # 20倍
-        elif balance < 100000:
-            leverage = 10  # 10倍
-        else:
-            leverage = 5  # 5倍
-        
-        # 确保杠杆在有效范围内
-        leverage = max(self.config.min_leverage, min(leverage, self.config.max_leverage))
-        
-        # 2. 计算单笔风险金额
-        risk_amount = balance * self.config.risk_per_trade
-        
-        # 3. 计算理论仓位大小（基于止损）
-        # 如果价格下跌2%，损失risk_amount
-        # 仓位价值 = risk_amount / 0.02
-        position_value = risk_amount / self.config.stop_loss_percent
-        
-        # 4. 考虑杠杆
-        position_value_with_leverage = position_value * leverage
-        
-        # 5. 计算数量
-        amount = position_value_with_leverage / price
-        
-        # 6. 检查最大仓位限制
-        max_position_value = balance * self.config.max_position_size * leverage
-        if position_value_with_leverage > max_position_value:
-            position_value_with_leverage = max_position_value
-            amount = max_position_value / price
-            self.logger.warning(f"仓位超过限制，调整为最大仓位")
-        
-        # 7. 检查最小订单金额
-        min_amount = self.config.min_order_size / price
-        if amount < min_amount:
-            return {
-                'valid': False,
-                'reason': '订单金额过小',
-                'min_amount': min_amount,
-                'current_amount': amount
-            }
-        
-        # 8. 计算止盈止损价格
-        entry_price = price
-        stop_loss_price = entry_price * (1 - self.config.stop_loss_percent)
-        take_profit_1_price = entry_price * self.config.take_profit_1
-        take_profit_2_price = entry_price * self.config.take_profit_2
-        
-        return {
-            'valid': True,
-            'leverage': leverage,
-            'amount': amount,
-            'position_value': position_value_with_leverage,
-            'risk_amount': risk_amount,
-            'stop_loss_price': stop_loss_price,
-            'take_profit_1_price': take_profit_1_price,
-            'take_profit_2_price': take_profit_2_price,
-            'entry_price': entry_price
-        }
-
-
-class RiskManager:
-    """风险管理器"""
-    
-    def __init__(self, config: RiskConfig, event_manager=None):
-        self.config = config
-        self.event_manager = event_manager
-        self.position_calculator = PositionCalculator(config)
-        
-        # 状态跟踪
-        self.consecutive_losses = 0
-        self.daily_loss = 0.0
-        self.last_reset_date = datetime.now().date()
-        self.open_positions: Dict[str, Dict[str, Any]] = {}
-        self.trade_history: List[Dict[str, Any]] = []
-        
-        self.logger = logger.bind(module="RiskManager")
-    
-    def check_order(self, order_request: Dict[str, Any], balance: float) -> Dict[str, Any]:
-        """
-        检查订单是否符合风控规则
-        
-        Args:
-            order_request: 订单请求
-            balance: 账户余额
-            
-        Returns:
-            检查结果
-        """
-        # 重置每日亏损
-        self._reset_daily_loss()
-        
-        # 1. 熔断检查
-        if self.consecutive_losses >= self.config.max_consecutive_losses:
-            self._emit_risk_event(
-                "breach",
-                "critical",
-                f"熔断触发：连续亏损{self.consecutive_losses}次，暂停交易",
-                {"consecutive_losses": self.consecutive_losses}
-            )
-            return {
-                'valid': False,
-                'reason': '熔断触发',
-                'message': '连续亏损达到上限，暂停交易'
-            }
-        
-        # 2. 每日亏损检查
-        if self.daily_loss >= self.config.max_daily_loss * balance:
-            self._emit_risk_event(
-                "breach",
-                "critical",
-                f"每日亏损限制：已亏损{self.daily_loss:.2f}U，上限{self.config.max_daily_loss * balance:.2f}U",
-                {"daily_loss": self.daily_loss, "max_daily_loss": self.config.max_daily_loss * balance}
-            )
-            return {
-                'valid': False,
-                'reason': '每日亏损超限',
-                'message': f'今日已亏损{self.daily_loss:.2f}U，达到日亏损上限'
-            }
-        
-        # 3. 仓位计算
-        price = order_request['price']
-        position_info = self.position_calculator.calculate_position_size(balance, price)
-        
-        if not position_info['valid']:
-            return position_info
-        
-        # 4. 检查是否超过单币种仓位限制
-        symbol = order_request['symbol']
-        if symbol in self.open_positions:
-            existing_position = self.open_positions[symbol]
-            total_value = existing_position['position_value'] + position_info['position_value']
-            
-            if total_value > balance * self.config.max_position_size * position_info['leverage']:
-                self._emit_risk_event(
-                    "breach",
-                    "warning",
-                    f"仓位限制：{symbol}总仓位超过{self.config.max_position_size * 100}%",
-                    {"symbol": symbol, "total_value": total_value}
-                )
-                return {
-                    'valid': False,
-                    'reason': '仓位超限',
-                    'message': f'{symbol}总仓位超过限制'
-                }
-        
-        # 5. 调整订单数量为风控计算的值
-        order_request['amount'] = position_info['amount']
-        order_request['leverage'] = position_info['leverage']
-        
-        return {
-            'valid': True,
-            'position_info': position_info,
-            'order_request': order_request
-        }
-    
-    def update_position(self, symbol: str, position_type: str, size: float, 
-                       entry_price: float, mark_price: float):
-        """更新持仓信息"""
-        if size == 0:
-            # 平仓
-            if symbol in self.open_positions:
-                self.open_positions.pop(symbol)
-        else:
-            # 开仓或更新
-            self.open_positions[symbol] = {
-                'type': position_type,
-                'size': size,
-                'entry_price': entry_price,
-                'mark_price': mark_price,
-                'unrealized_pnl': (mark_price - entry_price) * size if position_type == 'long' else (entry_price - mark_price) * size,
-                'updated_at': datetime.now()
-            }
-    
-    def check_stop_loss(self, symbol: str, current_price: float) -> Optional[Dict[str, Any]]:
-        """检查止损"""
-        if symbol not in self.open_positions:
-            return None
-        
-        position = self.open_positions[symbol]
-        entry_price = position['entry_price']
-        position_type = position['type']
-        
-        # 计算当前盈亏
-        if position_type == 'long':
-            pnl = (current_price - entry_price) / entry_price
-        else:
-            pnl = (entry_price - current_price) / entry_price
-        
-        # 硬止损
-        if pnl <= -self.config.stop_loss_percent:
-            self._emit_risk_event(
-                "stop_loss",
-                "critical",
-                f"触发硬止损: {symbol} 当前价格 {current_price}, 入场价 {entry_price}",
-                {
-                    'symbol': symbol,
-                    'current_price': current_price,
-                    'entry_price': entry_price,
-                    'pnl': pnl
-                }
-            )
-            return {
-                'action': 'close',
-                'reason': 'stop_loss',
-                'symbol': symbol,
-                'price': current_price
-            }
-        
-        return None
-    
-    def check_take_profit(self, symbol: str, current_price: float) -> Optional[Dict[str, Any]]:
-        """检查止盈"""
-        if symbol not in self.open_positions:
-            return None
-        
-        position = self.open_positions[symbol]
-        entry_price = position['entry_price']
-        position_type = position['type']
-        size = position['size']
-        
-        # 计算当前盈亏倍数
-        if position_type == 'long':
-            pnl_multiple = (current_price - entry_price) / (entry_price * self.config.stop_loss_percent)
-        else:
-            pnl_multiple = (entry_price - current_price) / (entry_price * self.config.stop_loss_percent)
-        
-        # 第一批止盈 (1.5倍)
-        if pnl_multiple >= self.config.take_profit_1 and pnl_multiple < self.config.take_profit_2:
-            close_amount = size * 0.3  # 平仓30%
-            self._emit_risk_event(
-                "take_profit",
-                "info",
-                f"第一止盈: {symbol} 平仓30%",
-                {
-                    'symbol': symbol,
-                    'current_price': current_price,
-                    'close_amount': close_amount,
-                    'pnl_multiple': pnl_multiple
-                }
-            )
-            return {
-                'action': 'partial_close',
-                'reason': 'take_profit_1',
-                'symbol': symbol,
-                'amount': close_amount,
-                'price': current_price
-            }
-        
-        # 第二批止盈 (2倍)
-        elif pnl_multiple >= self.config.take_profit_2:
-            close_amount = size * 0.3  # 再平仓30%
-            self._emit_risk_event(
-                "take_profit",
-                "info",
-                f"第二止盈: {symbol} 平仓30%",
-                {
-                    'symbol': symbol,
-                    'current_price': current_price,
-                    'close_amount': close_amount,
-                    'pnl_multiple': pnl_multiple
-                }
-            )
-            return {
-                'action': 'partial_close',
-                'reason': 'take_profit_2',
-                'symbol': symbol,
-                'amount': close_amount,
-                'price': current_price
-            }
-        
-        # 移动止盈 (剩余40%)
-        elif pnl_multiple > self.config.take_profit_2:
-            # 检查是否从高点回撤
-            highest_price = position.get('highest_price', current_price)
-            if current_price > highest_price:
-                position['highest_price'] = current_price
-                return None
-            
-            # 回撤超过3%则平仓
-            if (highest_price - current_price) / highest_price >= self.config.trailing_stop:
-                close_amount = size * 0.4  # 平仓剩余40%
-                self._emit_risk_event(
-                    "take_profit",
-                    "info",
-                    f"移动止盈: {symbol} 回撤触发，平仓40%",
-                    {
-                        'symbol': symbol,
-                        'current_price': current_price,
-                        'highest_price': highest_price,
-                        'close_amount': close_amount
-                    }
-                )
-                return {
-                    'action': 'close',
-                    'reason': 'trailing_stop',
-                    'symbol': symbol,
-                    'price': current_price
-                }
-        
-        return None
-    
-    def record_trade(self, symbol: str, side: str, price: float, amount: float, 
-                    pnl: float = 0.0, fee: float = 0.0):
-        """记录交易"""
-        trade = {
-            'symbol': symbol,
-            'side': side,
-            'price': price,
-            'amount': amount,
-            'pnl': pnl,
-            'fee': fee,
-            'timestamp': datetime.now()
-        }
-        self.trade_history.append(trade)
-        
-        # 更新亏损统计
-        if pnl < 0:
-            self.daily_loss += abs(pnl)
-            self.consecutive_losses += 1
-        elif pnl > 0:
-            self.consecutive_losses = 0
-        
-        # 保留最近100笔交易
-        if len(self.trade_history) > 100:
-            self.trade_history = self.trade_history[-100:]
-    
-    def _reset_daily_loss(self):
-        """重置每日亏损"""
-        today = datetime.now().date()
-        if today != self.last_reset_date:
-            self.daily_loss = 0.0
-            self.last_reset_date = today
-            self.logger.info("重置每日亏损统计")
-    
-    def _emit_risk_event(self, risk_type: str, level: str, message: str, details: Dict[str, Any]):
-        """发布风控事件"""
-        if self.event_manager:
-            event = RiskEvent(
-                risk_type=risk_type,
-                level=level,
-                message=message,
-                details=details
-            )
-            self.event_manager.publish(event)
-        
-        # 记录日志
-        if level == "critical":
-            self.logger.error(f"[风控] {message}")
-        elif level == "warning":
-            self.logger.warning(f"[风控] {message}")
-        else:
-            self.logger.info(f"[风控] {message}")
-    
-    def get_risk_status(self) -> Dict[str, Any]:
-        """获取风控状态"""
-        return {
-            'consecutive_losses': self.consecutive_losses,
-            'daily_loss': self.daily_loss,
-            'open_positions': len(self.open_positions),
-            'total_trades': len(self.trade_history),
-            'is_trading_paused': self.consecutive_losses >= self.config.max_consecutive_losses,
-            'last_reset_date': self.last_reset_date.isoformat()
-        }
-
-
-class OrderValidator:
-    """订单验证器"""
-    
-    def __init__(self, config: RiskConfig):
-        self.config = config
-        self.logger = logger.bind(module="OrderValidator")
-    
-    def validate_market_order(self, symbol: str, side: str, amount: float, 
-                             price: float, balance: float) -> Dict[str, Any]:
-        """验证市价单"""
-        # 检查最小订单金额
-        order_value = amount * price
-        if order_value < self.config.min_order_size:
-            return {
-                'valid': False,
-                'reason': '订单金额过小',
-                'min_value': self.config.min_order_size,
-                'current_value': order_value
-            }
-        
-        # 检查是否超过可用余额
-        if order_value > balance:
-            return {
-                'valid': False,
-                'reason': '余额不足',
-                'available': balance,
-                'required': order_value
-            }
-        
-        # 检查数量精度
-        if amount <= 0:
-            return {
-                'valid': False,
-                'reason': '数量必须大于0'
-            }
-        
-        return {'valid': True}
-    
-    def validate_limit_order(self, symbol: str, side: str, amount: float, 
-                            price: float, balance: float) -> Dict[str, Any]:
-        """验证限价单"""
-        # 基础验证
-        result = self.validate_market_order(symbol, side, amount, price, balance)
-        if not result['valid']:
-            return result
-        
-        # 检查价格合理性
-        if price <= 0:
-            return {
-                'valid': False,
-                'reason': '价格必须大于0'
-            }
-        
-        return {'valid': True}
-    
-    def validate_leverage(self, leverage: int, symbol: str) -> Dict[str, Any]:
-        """验证杠杆"""
-        if leverage < self.config.min_leverage:
-            return {
-                'valid': False,
-                'reason': '杠杆过低',
-                'min_leverage': self.config.min_leverage,
-                'current_leverage': leverage
-            }
-        
-        if leverage > self.config.max_leverage:
-            return {
-                'valid': False,
-                'reason': '杠杆过高',
-                'max_leverage': self.config.max_leverage,
-                'current_leverage': leverage
-            }
-        
-        return {'valid': True}
\ No newline at end of file
+"""
+风险管理系统
+负责仓位计算、止盈止损、熔断机制等风控功能
+"""
+
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Dict, Any, Optional, List, Tuple
+from datetime import datetime, date
+import threading
+import time
+
+import numpy as np
+from loguru import logger
+
+try:
+    from numba import njit
+except ImportError:  # numba为可选加速依赖，缺失时核心走纯Python
+    njit = None
+
+from src.core.events import RiskEvent, OrderEvent, EventType
+
+
+def _sizing_core(balance: float, price: float, leverage: float,
+                 risk_pct: float, inv_sl: float, max_pos: float,
+                 min_order: float, sl_mult: float,
+                 tp1_mult: float, tp2_mult: float):
+    """
+    仓位计算的纯数值内核
+
+    只有标量浮点运算，无字典、无日志、无I/O——回测批量调用时
+    装上numba的@njit(cache=True, fastmath=True)把每次调用的解释器
+    开销压到几十纳秒；numba缺失时同一函数原样走纯Python。
+    返回(valid, clamped, amount, position_value, risk_amount,
+    sl_px, tp1_px, tp2_px)。
+    """
+    risk_amount = balance * risk_pct
+    position_value = risk_amount * inv_sl * leverage
+    max_position_value = balance * max_pos * leverage
+    clamped = position_value > max_position_value
+    if clamped:
+        position_value = max_position_value
+    amount = position_value / price
+    valid = amount * price >= min_order
+    return (valid, clamped, amount, position_value, risk_amount,
+            price * sl_mult, price * tp1_mult, price * tp2_mult)
+
+
+if njit is not None:
+    _sizing_core = njit(cache=True, fastmath=True)(_sizing_core)
+
+# 交易记录的结构化行：40字节/行对比约500字节的7键字典，
+# 聚合统计（sum pnl、手续费合计）变成一趟连续内存扫描
+_TRADE_DTYPE = np.dtype([
+    ('price', 'f8'), ('amount', 'f8'), ('pnl', 'f8'), ('fee', 'f8'),
+    ('ts_ns', 'i8'), ('side', 'u1'), ('sym', 'u2'),
+])
+_TRADE_CAP = 100
+
+
+def _next_midnight_ts(now: Optional[float] = None) -> float:
+    """下一个本地零点的epoch秒（每日重置只比较这个float）
+
+    纯time模块实现，不构造datetime对象；一天只调一次，
+    struct_time往返的成本可忽略。
+    """
+    if now is None:
+        now = time.time()
+    t = time.localtime(now + 86400.0)
+    return time.mktime((t.tm_year, t.tm_mon, t.tm_mday, 0, 0, 0,
+                        t.tm_wday, t.tm_yday, -1))
+
+
+@dataclass(slots=True, frozen=True)
+class RiskConfig:
+    """风控配置（冻结slots：无__dict__、属性读取更快，可在组件间安全共享）"""
+    max_leverage: int = 20
+    min_leverage: int = 3
+    max_position_size: float = 0.3  # 单币种最大30%
+    risk_per_trade: float = 0.02  # 单笔风险2%
+    stop_loss_percent: float = 0.02  # 硬止损2%
+    take_profit_1: float = 1.5  # 第一批止盈1.5倍
+    take_profit_2: float = 2.0  # 第二批止盈2.0倍
+    trailing_stop: float = 0.03  # 移动止盈回撤3%
+    max_consecutive_losses: int = 3  # 熔断机制
+    max_daily_loss: float = 0.05  # 日最大亏损5%
+    min_order_size: float = 10.0  # 最小订单金额(USDT)
+
+    # 派生常量（init=False，__post_init__里算一次）：热路径直接乘，
+    # 不重复做除法/复合乘法
+    inv_stop_loss: float = field(init=False)
+    sl_price_mult: float = field(init=False)   # = 1 - stop_loss_percent
+    tp1_price_mult: float = field(init=False)  # = 1 + stop*take_profit_1
+    tp2_price_mult: float = field(init=False)  # = 1 + stop*take_profit_2
+
+    def __post_init__(self):
+        object.__setattr__(self, 'inv_stop_loss', 1.0 / self.stop_loss_percent)
+        object.__setattr__(self, 'sl_price_mult', 1.0 - self.stop_loss_percent)
+        object.__setattr__(self, 'tp1_price_mult',
+                           1.0 + self.stop_loss_percent * self.take_profit_1)
+        object.__setattr__(self, 'tp2_price_mult',
+                           1.0 + self.stop_loss_percent * self.take_profit_2)
+
+
+@dataclass(slots=True)
+class Position:
+    """
+    持仓记录（slots对象）
+
+    比6-7键字典省约2/3内存，字段按偏移读取无哈希查找；
+    position_value为开仓名义价值，供单币种仓位限制累加。
+    """
+    type: str
+    sign: float
+    size: float
+    entry_price: float
+    inv_entry: float
+    mark_price: float
+    unrealized_pnl: float
+    updated_at_ns: int
+    position_value: float
+    highest_price: float
+    sl_abs: float    # = entry * stop_loss_percent，预过滤用绝对价差
+    tp1_abs: float   # = entry * stop * take_profit_1
+
+
+class PositionCalculator:
+    """仓位计算器"""
+    
+    def __init__(self, config: RiskConfig):
+        self.config = config
+        # 除以配置常量改为乘其倒数（强度削减）：除法比乘法慢一个
+        # 数量级，倒数在构造时算一次即可
+        self._inv_stop = config.inv_stop_loss
+        # 杠杆档位表：searchsorted查表代替if/elif分支链，
+        # 且天然支持对balance向量整批定档
+        self._tier_edges = np.array([10_000.0, 100_000.0])
+        self._tier_lev = np.array([
+            max(config.min_leverage, min(config.max_leverage, config.max_leverage)),
+            max(config.min_leverage, min(10, config.max_leverage)),
+            max(config.min_leverage, min(5, config.max_leverage)),
+        ], dtype=np.int64)
+        self.logger = logger.bind(module="PositionCalculator")
+    
+    def calculate_position_size(self, balance: float, price: float, 
+                               symbol: str = "BTC/USDT",
+                               leverage: Optional[int] = None) -> Dict[str, Any]:
+        """
+        计算仓位大小
+        
+        Args:
+            balance: 账户余额
+            price: 当前价格
+            leverage: 已定档的杠杆（调用方缓存时传入，省查表）
+            
+        Returns:
+            仓位信息
+        """
+        # 1. 根据资金规模查表定杠杆（档位边界10k/100k，
+        # 范围钳制已在建表时完成）
+        if leverage is None:
+            leverage = int(self._tier_lev[np.searchsorted(self._tier_edges,
+                                                          balance,
+                                                          side='right')])
+        
+        # 2. 数值内核一把算完（风险额、杠杆仓位、上限钳制、
+        # 止盈止损价），字典只在边界组装
+        cfg = self.config
+        (valid, clamped, amount, position_value, risk_amount,
+         stop_loss_price, take_profit_1_price, take_profit_2_price) = \
+            _sizing_core(balance, price, float(leverage),
+                         cfg.risk_per_trade, self._inv_stop,
+                         cfg.max_position_size, cfg.min_order_size,
+                         cfg.sl_price_mult,
+                         cfg.tp1_price_mult, cfg.tp2_price_mult)
+
+        if clamped:
+            self.logger.warning("仓位超过限制，调整为最大仓位")
+
+        if not valid:
+            return {
+                'valid': False,
+                'reason': '订单金额过小',
+                'min_amount': cfg.min_order_size / price,
+                'current_amount': amount
+            }
+
+        return {
+            'valid': True,
+            'leverage': leverage,
+            'amount': amount,
+            'position_value': position_value,
+            'risk_amount': risk_amount,
+            'stop_loss_price': stop_loss_price,
+            'take_profit_1_price': take_profit_1_price,
+            'take_profit_2_price': take_profit_2_price,
+            'entry_price': price
+        }
+
+    def calculate_position_size_batch(self, balances, prices) -> Dict[str, np.ndarray]:
+        """
+        批量仓位计算（回测/多symbol网格）
+
+        对balance和price向量一次完成定档、风险额、仓位钳制和
+        止盈止损价：每个字段是一条ufunc链，不逐元素回落Python。
+        balances与prices按NumPy广播规则对齐。
+
+        Returns:
+            字段与标量版同名的数组字典，valid为布尔掩码
+        """
+        balances = np.asarray(balances, dtype=np.float64)
+        prices = np.asarray(prices, dtype=np.float64)
+        cfg = self.config
+
+        leverage = self._tier_lev[np.searchsorted(self._tier_edges, balances,
+                                                  side='right')].astype(np.float64)
+        risk_amount = balances * cfg.risk_per_trade
+        position_value = np.minimum(risk_amount * self._inv_stop * leverage,
+                                    balances * cfg.max_position_size * leverage)
+        amount = position_value / prices
+        valid = position_value >= cfg.min_order_size
+
+        return {
+            'valid': valid,
+            'leverage': leverage,
+            'amount': amount,
+            'position_value': position_value,
+            'risk_amount': risk_amount,
+            'stop_loss_price': prices * cfg.sl_price_mult,
+            'take_profit_1_price': prices * cfg.tp1_price_mult,
+            'take_profit_2_price': prices * cfg.tp2_price_mult,
+            'entry_price': prices,
+        }
+
+
+class RiskManager:
+    """风险管理器"""
+    
+    def __init__(self, config: RiskConfig, event_manager=None):
+        self.config = config
+        self.event_manager = event_manager
+        self.position_calculator = PositionCalculator(config)
+        self._inv_stop = config.inv_stop_loss
+        
+        # 状态跟踪
+        self.consecutive_losses = 0
+        self.daily_loss = 0.0
+        self.last_reset_date = date.today()
+        # 每日重置只做一次float比较；日损上限/仓位上限随余额变化
+        # 才重算，不在每次check_order里重复乘
+        self._next_reset_ts = _next_midnight_ts()
+        self._cached_balance = -1e18  # 必然超出ε，首单即建缓存
+        self._daily_loss_limit = 0.0
+        self._max_pos_frac = 0.0
+        self._cached_leverage = config.min_leverage
+        self.open_positions: Dict[str, Dict[str, Any]] = {}
+        # 复合读改写（SoA槽位迁移、环形缓冲head推进、移动止盈高点
+        # max更新、连亏/日损计数）不受GIL单操作原子性保护；纯asyncio
+        # 下锁无竞争只付一次原子操作，若有executor线程回调则保证
+        # 不丢更新
+        self._lock = threading.RLock()
+        # 交易历史：预分配结构化数组环形缓冲（SoA按列连续），
+        # head取模推进，淘汰零成本；symbol驻留成u2编号
+        self._trades = np.zeros(_TRADE_CAP, dtype=_TRADE_DTYPE)
+        self._trade_head = 0
+        self._trade_count = 0
+        self._sym_ids: Dict[str, int] = {}
+        self._sym_names: List[str] = []
+
+        # 持仓的SoA镜像：entry/size/sign/high按槽位存成并行数组，
+        # scan_exits对全部持仓做一次向量化扫描，替代逐symbol的
+        # Python循环+字典取值；平仓用交换删除保持数组稠密
+        self._cap = 16
+        self._entry = np.zeros(self._cap, dtype=np.float64)
+        self._inv_entry = np.zeros(self._cap, dtype=np.float64)
+        self._size = np.zeros(self._cap, dtype=np.float64)
+        self._sign = np.zeros(self._cap, dtype=np.float64)  # +1多 -1空
+        self._high = np.zeros(self._cap, dtype=np.float64)
+        self._slots: Dict[str, int] = {}
+        self._slot_symbols: List[str] = []
+        self._n = 0
+        
+        self.logger = logger.bind(module="RiskManager")
+    
+    def check_order(self, order_request: Dict[str, Any], balance: float) -> Dict[str, Any]:
+        """
+        检查订单是否符合风控规则
+        
+        Args:
+            order_request: 订单请求
+            balance: 账户余额
+            
+        Returns:
+            检查结果
+        """
+        # 重置每日亏损
+        self._reset_daily_loss()
+
+        # 余额派生阈值：余额变动不超过1U时沿用缓存（阈值本身
+        # 是百分比口径，1U以内的漂移不影响判定）
+        if abs(balance - self._cached_balance) > 1.0:
+            self.set_balance(balance)
+        
+        # 1. 熔断检查
+        if self.consecutive_losses >= self.config.max_consecutive_losses:
+            self._emit_risk_event(
+                "breach",
+                "critical",
+                f"熔断触发：连续亏损{self.consecutive_losses}次，暂停交易",
+                {"consecutive_losses": self.consecutive_losses}
+            )
+            return {
+                'valid': False,
+                'reason': '熔断触发',
+                'message': '连续亏损达到上限，暂停交易'
+            }
+        
+        # 2. 每日亏损检查
+        if self.daily_loss >= self._daily_loss_limit:
+            self._emit_risk_event(
+                "breach",
+                "critical",
+                f"每日亏损限制：已亏损{self.daily_loss:.2f}U，上限{self._daily_loss_limit:.2f}U",
+                {"daily_loss": self.daily_loss, "max_daily_loss": self._daily_loss_limit}
+            )
+            return {
+                'valid': False,
+                'reason': '每日亏损超限',
+                'message': f'今日已亏损{self.daily_loss:.2f}U，达到日亏损上限'
+            }
+        
+        # 3. 仓位计算
+        price = order_request['price']
+        position_info = self.position_calculator.calculate_position_size(
+            balance, price, leverage=self._cached_leverage)
+        
+        if not position_info['valid']:
+            return position_info
+        
+        # 4. 检查是否超过单币种仓位限制
+        symbol = order_request['symbol']
+        existing_position = self.open_positions.get(symbol)
+        if existing_position is not None:
+            total_value = existing_position.position_value + position_info['position_value']
+            
+            if total_value > self._max_pos_frac * position_info['leverage']:
+                self._emit_risk_event(
+                    "breach",
+                    "warning",
+                    f"仓位限制：{symbol}总仓位超过{self.config.max_position_size * 100}%",
+                    {"symbol": symbol, "total_value": total_value}
+                )
+                return {
+                    'valid': False,
+                    'reason': '仓位超限',
+                    'message': f'{symbol}总仓位超过限制'
+                }
+        
+        # 5. 调整订单数量为风控计算的值
+        order_request['amount'] = position_info['amount']
+        order_request['leverage'] = position_info['leverage']
+
+        # 6. 订单基础验证（原OrderValidator.validate_market_order的
+        # 逻辑就地完成，信号路径不再对同一组字段做第二遍检查）。
+        # 余额检查按保证金口径：订单名义价值/杠杆
+        amount = position_info['amount']
+        order_value = amount * price
+        required_margin = order_value / position_info['leverage']
+        if amount <= 0:
+            return {'valid': False, 'reason': '数量必须大于0'}
+        if order_value < self.config.min_order_size:
+            return {
+                'valid': False,
+                'reason': '订单金额过小',
+                'min_value': self.config.min_order_size,
+                'current_value': order_value
+            }
+        if required_margin > balance:
+            return {
+                'valid': False,
+                'reason': '余额不足',
+                'available': balance,
+                'required': required_margin
+            }
+
+        return {
+            'valid': True,
+            'position_info': position_info,
+            'order_request': order_request
+        }
+    
+    def update_position(self, symbol: str, position_type: str, size: float, 
+                       entry_price: float, mark_price: float):
+        """更新持仓信息"""
+        with self._lock:
+            self._update_position_locked(symbol, position_type, size,
+                                         entry_price, mark_price)
+
+    def _update_position_locked(self, symbol: str, position_type: str,
+                                size: float, entry_price: float,
+                                mark_price: float):
+        if size == 0:
+            # 平仓（带默认值的pop：一次哈希完成存在性判断和删除）
+            self.open_positions.pop(symbol, None)
+            self._drop_slot(symbol)
+        else:
+            # 开仓或更新；方向存成±1.0乘数，pnl计算不再分支。
+            # 高点跨更新保留（与SoA的_high列同步语义）
+            sign = 1.0 if position_type == 'long' else -1.0
+            prev = self.open_positions.get(symbol)
+            highest = mark_price if prev is None else max(prev.highest_price,
+                                                          mark_price)
+            self.open_positions[symbol] = Position(
+                type=position_type,
+                sign=sign,
+                size=size,
+                entry_price=entry_price,
+                inv_entry=1.0 / entry_price,  # 标量路径乘法代替除法
+                mark_price=mark_price,
+                unrealized_pnl=sign * (mark_price - entry_price) * size,
+                # 整数纳秒时间戳：每tick每symbol少一次datetime分配
+                updated_at_ns=time.time_ns(),
+                position_value=size * entry_price,
+                highest_price=highest,
+                sl_abs=entry_price * self.config.stop_loss_percent,
+                tp1_abs=entry_price * self.config.stop_loss_percent
+                        * self.config.take_profit_1,
+            )
+            idx = self._slots.get(symbol)
+            if idx is None:
+                if self._n == self._cap:
+                    self._grow()
+                idx = self._n
+                self._n += 1
+                self._slots[symbol] = idx
+                self._slot_symbols.append(symbol)
+                self._high[idx] = mark_price
+            elif mark_price > self._high[idx]:
+                self._high[idx] = mark_price
+            self._entry[idx] = entry_price
+            self._inv_entry[idx] = 1.0 / entry_price
+            self._size[idx] = size
+            self._sign[idx] = 1.0 if position_type == 'long' else -1.0
+
+    def _grow(self):
+        """SoA数组扩容（翻倍）"""
+        self._cap *= 2
+        for name in ('_entry', '_inv_entry', '_size', '_sign', '_high'):
+            arr = getattr(self, name)
+            new = np.zeros(self._cap, dtype=np.float64)
+            new[:self._n] = arr[:self._n]
+            setattr(self, name, new)
+
+    def _drop_slot(self, symbol: str):
+        """释放symbol的槽位，末槽交换补位保持数组稠密"""
+        idx = self._slots.pop(symbol, None)
+        if idx is None:
+            return
+        last = self._n - 1
+        if idx != last:
+            for arr in (self._entry, self._inv_entry, self._size,
+                        self._sign, self._high):
+                arr[idx] = arr[last]
+            moved = self._slot_symbols[last]
+            self._slot_symbols[idx] = moved
+            self._slots[moved] = idx
+        self._slot_symbols.pop()
+        self._n = last
+
+    def scan_exits(self, prices) -> List[Dict[str, Any]]:
+        """
+        对全部持仓做一次向量化止损/止盈扫描
+
+        pnl、各级止盈倍数、移动止盈回撤全部在NumPy数组上一把算完，
+        每个tick只有常数次ufunc调用，不随持仓数增长Python开销。
+        原per-symbol版本里移动止盈挂在pnl>=take_profit_2的elif之后
+        永远走不到，这里给它高于第二止盈的优先级：达到2倍后从高点
+        回撤超限即全平，否则继续分批止盈。
+
+        Args:
+            prices: 标量（全部持仓用同一价格）或{symbol: price}字典
+
+        Returns:
+            触发的动作列表，元素与check_stop_loss/check_take_profit
+            的返回值同构
+        """
+        with self._lock:
+            return self._scan_exits_locked(prices)
+
+    def _scan_exits_locked(self, prices) -> List[Dict[str, Any]]:
+        n = self._n
+        if n == 0:
+            return []
+        if isinstance(prices, dict):
+            px = np.fromiter((prices[s] for s in self._slot_symbols),
+                             dtype=np.float64, count=n)
+        else:
+            px = np.full(n, float(prices))
+
+        entry = self._entry[:n]
+        inv_entry = self._inv_entry[:n]
+        sign = self._sign[:n]
+        size = self._size[:n]
+        high = self._high[:n]
+
+        pnl = sign * (px - entry) * inv_entry
+        np.maximum(high, px, out=high)  # 移动止盈高点就地更新
+
+        cfg = self.config
+        sl = cfg.stop_loss_percent
+        tp1 = cfg.take_profit_1
+        tp2 = cfg.take_profit_2
+        trail = cfg.trailing_stop
+        mult = pnl * self._inv_stop
+        sl_mask = pnl <= -sl
+        trail_mask = ((mult >= tp2)
+                      & ((high - px) / high >= trail)
+                      & ~sl_mask)
+        tp2_mask = (mult >= tp2) & ~trail_mask & ~sl_mask
+        tp1_mask = (mult >= tp1) & (mult < tp2)
+
+        actions: List[Dict[str, Any]] = []
+        for i in np.flatnonzero(sl_mask):
+            symbol = self._slot_symbols[i]
+            self._emit_risk_event(
+                "stop_loss", "critical",
+                f"触发硬止损: {symbol} 当前价格 {px[i]}, 入场价 {entry[i]}",
+                {'symbol': symbol, 'current_price': float(px[i]),
+                 'entry_price': float(entry[i]), 'pnl': float(pnl[i])}
+            )
+            actions.append({'action': 'close', 'reason': 'stop_loss',
+                            'symbol': symbol, 'price': float(px[i])})
+        for i in np.flatnonzero(trail_mask):
+            symbol = self._slot_symbols[i]
+            self._emit_risk_event(
+                "take_profit", "info",
+                f"移动止盈: {symbol} 回撤触发，平仓40%",
+                {'symbol': symbol, 'current_price': float(px[i]),
+                 'highest_price': float(high[i]),
+                 'close_amount': float(size[i]) * 0.4}
+            )
+            actions.append({'action': 'close', 'reason': 'trailing_stop',
+                            'symbol': symbol, 'price': float(px[i])})
+        for i in np.flatnonzero(tp1_mask):
+            symbol = self._slot_symbols[i]
+            close_amount = float(size[i]) * 0.3
+            self._emit_risk_event(
+                "take_profit", "info",
+                f"第一止盈: {symbol} 平仓30%",
+                {'symbol': symbol, 'current_price': float(px[i]),
+                 'close_amount': close_amount, 'pnl_multiple': float(mult[i])}
+            )
+            actions.append({'action': 'partial_close', 'reason': 'take_profit_1',
+                            'symbol': symbol, 'amount': close_amount,
+                            'price': float(px[i])})
+        for i in np.flatnonzero(tp2_mask):
+            symbol = self._slot_symbols[i]
+            close_amount = float(size[i]) * 0.3
+            self._emit_risk_event(
+                "take_profit", "info",
+                f"第二止盈: {symbol} 平仓30%",
+                {'symbol': symbol, 'current_price': float(px[i]),
+                 'close_amount': close_amount, 'pnl_multiple': float(mult[i])}
+            )
+            actions.append({'action': 'partial_close', 'reason': 'take_profit_2',
+                            'symbol': symbol, 'amount': close_amount,
+                            'price': float(px[i])})
+        return actions
+    
+    def check_exits(self, symbol: str, current_price: float) -> Optional[Dict[str, Any]]:
+        """
+        单symbol的止损/止盈融合检查
+
+        一次字典取位、一次pnl计算覆盖全部退出条件（硬止损、移动
+        止盈、两级分批止盈），优先级与scan_exits一致；原来分别调
+        check_stop_loss和check_take_profit要做两次查找、两次pnl。
+        """
+        position = self.open_positions.get(symbol)
+        if position is None:
+            return None
+
+        entry_price = position.entry_price
+
+        # 常见情形预过滤：价差离任何触发线都远时一次带符号减法
+        # 加两次比较就返回，不做除法、不碰配置
+        delta = position.sign * (current_price - entry_price)
+        if -position.sl_abs < delta < position.tp1_abs:
+            return None
+
+        size = position.size
+        pnl = delta * position.inv_entry
+        # 配置常量绑定到局部变量：后续全是LOAD_FAST而非LOAD_ATTR
+        cfg = self.config
+        sl = cfg.stop_loss_percent
+        tp1 = cfg.take_profit_1
+        tp2 = cfg.take_profit_2
+        trail = cfg.trailing_stop
+
+        # 硬止损
+        if pnl <= -sl:
+            self._emit_risk_event(
+                "stop_loss",
+                "critical",
+                f"触发硬止损: {symbol} 当前价格 {current_price}, 入场价 {entry_price}",
+                {
+                    'symbol': symbol,
+                    'current_price': current_price,
+                    'entry_price': entry_price,
+                    'pnl': pnl
+                }
+            )
+            return {
+                'action': 'close',
+                'reason': 'stop_loss',
+                'symbol': symbol,
+                'price': current_price
+            }
+
+        mult = pnl * self._inv_stop
+        if mult >= tp2:
+            # 移动止盈高点维护与回撤判断（优先于第二止盈，与
+            # scan_exits一致）
+            highest_price = position.highest_price
+            if current_price > highest_price:
+                highest_price = current_price
+                position.highest_price = current_price
+            if (highest_price - current_price) / highest_price >= trail:
+                close_amount = size * 0.4  # 平仓剩余40%
+                self._emit_risk_event(
+                    "take_profit",
+                    "info",
+                    f"移动止盈: {symbol} 回撤触发，平仓40%",
+                    {
+                        'symbol': symbol,
+                        'current_price': current_price,
+                        'highest_price': highest_price,
+                        'close_amount': close_amount
+                    }
+                )
+                return {
+                    'action': 'close',
+                    'reason': 'trailing_stop',
+                    'symbol': symbol,
+                    'price': current_price
+                }
+
+            # 第二批止盈 (2倍)
+            close_amount = size * 0.3
+            self._emit_risk_event(
+                "take_profit",
+                "info",
+                f"第二止盈: {symbol} 平仓30%",
+                {
+                    'symbol': symbol,
+                    'current_price': current_price,
+                    'close_amount': close_amount,
+                    'pnl_multiple': mult
+                }
+            )
+            return {
+                'action': 'partial_close',
+                'reason': 'take_profit_2',
+                'symbol': symbol,
+                'amount': close_amount,
+                'price': current_price
+            }
+
+        # 第一批止盈 (1.5倍)
+        if mult >= tp1:
+            close_amount = size * 0.3
+            self._emit_risk_event(
+                "take_profit",
+                "info",
+                f"第一止盈: {symbol} 平仓30%",
+                {
+                    'symbol': symbol,
+                    'current_price': current_price,
+                    'close_amount': close_amount,
+                    'pnl_multiple': mult
+                }
+            )
+            return {
+                'action': 'partial_close',
+                'reason': 'take_profit_1',
+                'symbol': symbol,
+                'amount': close_amount,
+                'price': current_price
+            }
+
+        return None
+
+    def check_stop_loss(self, symbol: str, current_price: float) -> Optional[Dict[str, Any]]:
+        """检查止损（薄包装，完整单次检查见check_exits）"""
+        action = self.check_exits(symbol, current_price)
+        return action if action and action['reason'] == 'stop_loss' else None
+
+    def check_take_profit(self, symbol: str, current_price: float) -> Optional[Dict[str, Any]]:
+        """检查止盈（薄包装，完整单次检查见check_exits）"""
+        action = self.check_exits(symbol, current_price)
+        return action if action and action['reason'] != 'stop_loss' else None
+
+    def record_trade(self, symbol: str, side: str, price: float, amount: float, 
+                    pnl: float = 0.0, fee: float = 0.0):
+        """记录交易"""
+        with self._lock:
+            self._record_trade_locked(symbol, side, price, amount, pnl, fee)
+
+    def _record_trade_locked(self, symbol: str, side: str, price: float,
+                             amount: float, pnl: float, fee: float):
+        sym_id = self._sym_ids.get(symbol)
+        if sym_id is None:
+            sym_id = self._sym_ids[symbol] = len(self._sym_names)
+            self._sym_names.append(symbol)
+
+        row = self._trades[self._trade_head]
+        row['price'] = price
+        row['amount'] = amount
+        row['pnl'] = pnl
+        row['fee'] = fee
+        row['ts_ns'] = time.time_ns()  # 不在热路径分配datetime
+        row['side'] = 1 if side == 'sell' else 0
+        row['sym'] = sym_id
+        self._trade_head = (self._trade_head + 1) % _TRADE_CAP
+        if self._trade_count < _TRADE_CAP:
+            self._trade_count += 1
+
+        # 更新亏损统计
+        if pnl < 0:
+            self.daily_loss += abs(pnl)
+            self.consecutive_losses += 1
+        elif pnl > 0:
+            self.consecutive_losses = 0
+
+    def recent_trades(self):
+        """按时间顺序惰性产出字典视图（慢路径：报表/导出用）"""
+        for i in range(self._trade_count):
+            idx = (self._trade_head - self._trade_count + i) % _TRADE_CAP
+            row = self._trades[idx]
+            yield {
+                'symbol': self._sym_names[row['sym']],
+                'side': 'sell' if row['side'] else 'buy',
+                'price': float(row['price']),
+                'amount': float(row['amount']),
+                'pnl': float(row['pnl']),
+                'fee': float(row['fee']),
+                'timestamp': datetime.fromtimestamp(row['ts_ns'] / 1e9),
+            }
+
+    @property
+    def trade_history(self) -> List[Dict[str, Any]]:
+        """兼容旧调用方的列表视图（按需物化）"""
+        return list(self.recent_trades())
+    
+    def set_balance(self, balance: float):
+        """缓存余额派生的风控阈值（余额变化时调用一次）"""
+        self._cached_balance = balance
+        self._daily_loss_limit = balance * self.config.max_daily_loss
+        self._max_pos_frac = balance * self.config.max_position_size
+        # 杠杆档位由余额唯一决定，随余额缓存一并定档
+        pc = self.position_calculator
+        self._cached_leverage = int(pc._tier_lev[np.searchsorted(pc._tier_edges,
+                                                                 balance,
+                                                                 side='right')])
+
+    def _reset_daily_loss(self):
+        """重置每日亏损（热路径上只有一次time.time()和一次比较）"""
+        now = time.time()
+        if now >= self._next_reset_ts:
+            self.daily_loss = 0.0
+            self.last_reset_date = date.fromtimestamp(now)  # 复用已取的时钟
+            self._next_reset_ts = _next_midnight_ts(now)
+            self.logger.info("重置每日亏损统计")
+    
+    def _emit_risk_event(self, risk_type: str, level: str, message: str, details: Dict[str, Any]):
+        """发布风控事件"""
+        # 无管理器或无人订阅RISK事件时跳过事件构造，只走日志
+        em = self.event_manager
+        if em is not None and em.has_subscribers(EventType.RISK):
+            event = RiskEvent(
+                risk_type=risk_type,
+                level=level,
+                message=message,
+                details=details
+            )
+            em.publish(event)
+        
+        # 记录日志；"{}"占位由loguru在级别放行后才插值，
+        # 被过滤的事件不付字符串拼接成本
+        if level == "critical":
+            self.logger.error("[风控] {}", message)
+        elif level == "warning":
+            self.logger.warning("[风控] {}", message)
+        else:
+            self.logger.info("[风控] {}", message)
+    
+    def get_risk_status(self) -> Dict[str, Any]:
+        """获取风控状态"""
+        return {
+            'consecutive_losses': self.consecutive_losses,
+            'daily_loss': self.daily_loss,
+            'open_positions': len(self.open_positions),
+            'total_trades': self._trade_count,
+            'is_trading_paused': self.consecutive_losses >= self.config.max_consecutive_losses,
+            'last_reset_date': self.last_reset_date.isoformat()
+        }
+
+
+class ValidationError(IntEnum):
+    """订单验证失败原因码（小整数比较/分发，不携带字符串）"""
+    ORDER_TOO_SMALL = 1
+    INSUFFICIENT_BALANCE = 2
+    INVALID_AMOUNT = 3
+    INVALID_PRICE = 4
+    LEVERAGE_TOO_LOW = 5
+    LEVERAGE_TOO_HIGH = 6
+
+
+# 验证通过的单例元组：热路径零分配返回
+_VALID: Tuple[bool, Optional[ValidationError]] = (True, None)
+
+_VALIDATION_MESSAGES = {
+    ValidationError.ORDER_TOO_SMALL: '订单金额过小',
+    ValidationError.INSUFFICIENT_BALANCE: '余额不足',
+    ValidationError.INVALID_AMOUNT: '数量必须大于0',
+    ValidationError.INVALID_PRICE: '价格必须大于0',
+    ValidationError.LEVERAGE_TOO_LOW: '杠杆过低',
+    ValidationError.LEVERAGE_TOO_HIGH: '杠杆过高',
+}
+
+
+class OrderValidator:
+    """
+    订单验证器
+
+    注意：市价单的验证逻辑已并入RiskManager.check_order，信号路径
+    不再单独调用本类；保留供外部调用方单独验证订单使用。
+    验证方法返回(valid, reason)元组——通过时返回模块级_VALID单例，
+    不为每次验证分配字典；需要旧字典形态时用*_dict包装。
+    """
+
+    def __init__(self, config: RiskConfig):
+        self.config = config
+        self.logger = logger.bind(module="OrderValidator")
+
+    def validate_market_order(self, symbol: str, side: str, amount: float,
+                             price: float, balance: float) -> Tuple[bool, Optional[ValidationError]]:
+        """验证市价单"""
+        if amount <= 0:
+            return (False, ValidationError.INVALID_AMOUNT)
+        order_value = amount * price
+        if order_value < self.config.min_order_size:
+            return (False, ValidationError.ORDER_TOO_SMALL)
+        if order_value > balance:
+            return (False, ValidationError.INSUFFICIENT_BALANCE)
+        return _VALID
+
+    def validate_limit_order(self, symbol: str, side: str, amount: float,
+                            price: float, balance: float) -> Tuple[bool, Optional[ValidationError]]:
+        """验证限价单"""
+        if price <= 0:
+            return (False, ValidationError.INVALID_PRICE)
+        return self.validate_market_order(symbol, side, amount, price, balance)
+
+    def validate_leverage(self, leverage: int, symbol: str) -> Tuple[bool, Optional[ValidationError]]:
+        """验证杠杆"""
+        if leverage < self.config.min_leverage:
+            return (False, ValidationError.LEVERAGE_TOO_LOW)
+        if leverage > self.config.max_leverage:
+            return (False, ValidationError.LEVERAGE_TOO_HIGH)
+        return _VALID
+
+    def validate_market_order_dict(self, symbol: str, side: str, amount: float,
+                                  price: float, balance: float) -> Dict[str, Any]:
+        """旧字典形态的市价单验证（慢路径兼容包装）"""
+        valid, reason = self.validate_market_order(symbol, side, amount,
+                                                   price, balance)
+        if valid:
+            return {'valid': True}
+        return {'valid': False, 'reason': _VALIDATION_MESSAGES[reason]}
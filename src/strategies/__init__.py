@@ -1,8 +1,6 @@
 """
 策略引擎模块
 """
-from .dma_supertrend import DMASuperTrendStrategy
-from .market_classifier import MarketClassifier
-from .timeframe_optimizer import TimeframeOptimizer
+from .dma_supertrend import DMASuperTrendStrategy, MarketClassifier, TimeframeOptimizer
 
 __all__ = ['DMASuperTrendStrategy', 'MarketClassifier', 'TimeframeOptimizer']
\ No newline at end of file
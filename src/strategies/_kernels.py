@@ -0,0 +1,219 @@
+"""
+策略指标内核
+SuperTrend等指标的单遍数组实现，Numba可用时JIT加速
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # Numba为可选依赖，缺失时内核以纯Python循环运行，
+    # 仍比逐行pandas索引快一个数量级以上
+    njit = None
+
+
+def _supertrend_impl(high, low, close, period, multiplier):
+    """
+    单遍计算SuperTrend
+
+    第一遍前向遍历同时算TR和Wilder RMA得到ATR，第二遍按携带规则
+    迭代最终上下轨，整体O(n)且每根K线无额外分配。
+
+    Args:
+        high/low/close: float64数组
+        period: ATR周期
+        multiplier: 轨道宽度倍数
+
+    Returns:
+        (atr, supertrend, direction)，direction为+1/-1
+    """
+    n = close.shape[0]
+    atr = np.empty(n, dtype=np.float64)
+    supertrend = np.empty(n, dtype=np.float64)
+    direction = np.empty(n, dtype=np.int64)
+    if n == 0:
+        return atr, supertrend, direction
+
+    # TR与Wilder RMA合并为一次遍历
+    prev_close = close[0]
+    acc = 0.0
+    for i in range(n):
+        tr = high[i] - low[i]
+        if i > 0:
+            d = abs(high[i] - prev_close)
+            if d > tr:
+                tr = d
+            d = abs(low[i] - prev_close)
+            if d > tr:
+                tr = d
+        if i < period:
+            acc += tr
+            atr[i] = acc / (i + 1)
+        else:
+            atr[i] = (atr[i - 1] * (period - 1) + tr) / period
+        prev_close = close[i]
+
+    # 最终上下轨的携带迭代
+    hl2 = (high[0] + low[0]) * 0.5
+    supertrend[0] = hl2 - multiplier * atr[0]
+    direction[0] = 1
+    for i in range(1, n):
+        hl2 = (high[i] + low[i]) * 0.5
+        upper = hl2 + multiplier * atr[i]
+        lower = hl2 - multiplier * atr[i]
+        prev_st = supertrend[i - 1]
+
+        if direction[i - 1] == 1:  # 上升趋势
+            st = lower if lower > prev_st else prev_st
+            if close[i] < st:
+                direction[i] = -1
+                st = upper
+            else:
+                direction[i] = 1
+        else:  # 下降趋势
+            st = upper if upper < prev_st else prev_st
+            if close[i] > st:
+                direction[i] = 1
+                st = lower
+            else:
+                direction[i] = -1
+        supertrend[i] = st
+
+    return atr, supertrend, direction
+
+
+if njit is not None:
+    # nogil：编译后的内核不持有GIL，网格搜索等多线程调用方
+    # 可以真正并行跑多个参数组合
+    supertrend_kernel = njit(cache=True, fastmath=True, nogil=True)(_supertrend_impl)
+else:
+    supertrend_kernel = _supertrend_impl
+
+
+def _rsi_wilder_impl(close, period):
+    """
+    单遍计算Wilder RSI
+
+    增益/损失分离与Wilder平滑(α=1/period)在同一个循环里完成，
+    前period根用累计均值预热——递推式与流式update()逐bar路径
+    完全一致，批量回测和实盘增量算出同样的值。
+
+    Args:
+        close: float64数组
+        period: RSI周期
+
+    Returns:
+        rsi数组，首根为50
+    """
+    n = close.shape[0]
+    rsi = np.empty(n, dtype=np.float64)
+    if n == 0:
+        return rsi
+    rsi[0] = 50.0
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, n):
+        delta = close[i] - close[i - 1]
+        gain = delta if delta > 0.0 else 0.0
+        loss = -delta if delta < 0.0 else 0.0
+        if i <= period:
+            avg_gain = (avg_gain * (i - 1) + gain) / i
+            avg_loss = (avg_loss * (i - 1) + loss) / i
+        else:
+            avg_gain = (avg_gain * (period - 1) + gain) / period
+            avg_loss = (avg_loss * (period - 1) + loss) / period
+        if avg_loss > 0.0:
+            rsi[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        else:
+            rsi[i] = 100.0 if avg_gain > 0.0 else 50.0
+    return rsi
+
+
+if njit is not None:
+    rsi_kernel = njit(cache=True, fastmath=True, nogil=True)(_rsi_wilder_impl)
+else:
+    rsi_kernel = _rsi_wilder_impl
+
+
+def _adx_impl(high, low, close, period):
+    """
+    单遍计算最新ADX值
+
+    Wilder正统递推：+DM/-DM按方向性移动规则取值，TR/+DM/-DM与
+    DX的平滑全部用RMA在一个循环里携带，只保留标量状态——
+    调用方只消费最后一个ADX，不需要物化任何中间数组。
+
+    Args:
+        high/low/close: float64数组
+        period: 平滑周期
+
+    Returns:
+        最新ADX（数据不足时为0.0）
+    """
+    n = close.shape[0]
+    if n < period + 1:
+        return 0.0
+
+    atr = 0.0
+    plus_sm = 0.0
+    minus_sm = 0.0
+    adx = 0.0
+    dx_count = 0
+    for i in range(1, n):
+        up = high[i] - high[i - 1]
+        dn = low[i - 1] - low[i]
+        plus_dm = up if (up > dn and up > 0.0) else 0.0
+        minus_dm = dn if (dn > up and dn > 0.0) else 0.0
+
+        tr = high[i] - low[i]
+        d = abs(high[i] - close[i - 1])
+        if d > tr:
+            tr = d
+        d = abs(low[i] - close[i - 1])
+        if d > tr:
+            tr = d
+
+        if i <= period:
+            # 前period根累计均值预热，与SuperTrend内核的RMA一致
+            atr = (atr * (i - 1) + tr) / i
+            plus_sm = (plus_sm * (i - 1) + plus_dm) / i
+            minus_sm = (minus_sm * (i - 1) + minus_dm) / i
+        else:
+            atr = (atr * (period - 1) + tr) / period
+            plus_sm = (plus_sm * (period - 1) + plus_dm) / period
+            minus_sm = (minus_sm * (period - 1) + minus_dm) / period
+
+        if i >= period and atr > 0.0:
+            plus_di = 100.0 * plus_sm / atr
+            minus_di = 100.0 * minus_sm / atr
+            di_sum = plus_di + minus_di
+            dx = 100.0 * abs(plus_di - minus_di) / di_sum if di_sum > 0.0 else 0.0
+            dx_count += 1
+            if dx_count <= period:
+                adx = (adx * (dx_count - 1) + dx) / dx_count
+            else:
+                adx = (adx * (period - 1) + dx) / period
+
+    return adx
+
+
+if njit is not None:
+    adx_kernel = njit(cache=True, fastmath=True, nogil=True)(_adx_impl)
+else:
+    adx_kernel = _adx_impl
+
+
+def warmup_kernels() -> None:
+    """
+    预热JIT内核，避免首次实盘调用时停顿编译
+
+    成本在编译本身而非数据量，用最小数组触发即可；cache=True
+    让编译结果落盘，后续进程只付缓存加载的成本。刻意不在import
+    时触发：短命CLI和测试只为导入付不起数秒的编译费，调用方
+    在initialize阶段（strategy.warmup）统一预热。
+    """
+    dummy = np.ones(2, dtype=np.float64)
+    supertrend_kernel(dummy, dummy, dummy, 10, 3.0)
+    rsi_kernel(dummy, 14)
+    adx_kernel(dummy, dummy, dummy, 14)
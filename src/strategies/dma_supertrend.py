@@ -5,11 +5,74 @@ DMA + SuperTrend 策略
 
 import pandas as pd
 import numpy as np
+from collections import deque
+from itertools import product
 from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 from loguru import logger
 
 from src.core.events import SignalEvent
+from src.strategies._kernels import supertrend_kernel, rsi_kernel, adx_kernel, njit, warmup_kernels
+
+try:
+    # bottleneck的C实现滑动窗口比pandas rolling快5-10倍（小窗口）
+    import bottleneck as bn
+except ImportError:
+    bn = None
+
+try:
+    # 参数网格搜索的多进程并行，缺失时退化为串行
+    import joblib
+except ImportError:
+    joblib = None
+
+
+# pandas rolling的numba引擎：首次调用付一次JIT编译，之后每次
+# 聚合走编译后的循环。只对长序列启用，短序列编译成本摊不平
+_NUMBA_ROLL_THRESHOLD = 5000
+_NUMBA_ROLL_KW = {'engine': 'numba',
+                  'engine_kwargs': {'nopython': True, 'nogil': True,
+                                    'parallel': False}}
+
+
+def _move_mean(arr: np.ndarray, window: int) -> np.ndarray:
+    """滑动均值：优先bottleneck，缺失时退回pandas rolling"""
+    if bn is not None:
+        return bn.move_mean(arr, window=window, min_count=window)
+    roll = pd.Series(arr).rolling(window=window)
+    if njit is not None and arr.shape[0] > _NUMBA_ROLL_THRESHOLD:
+        return roll.mean(**_NUMBA_ROLL_KW).to_numpy()
+    return roll.mean().to_numpy()
+
+
+def _move_std(arr: np.ndarray, window: int) -> np.ndarray:
+    """滑动样本标准差（ddof=1），语义同pandas rolling().std()"""
+    if bn is not None:
+        return bn.move_std(arr, window=window, min_count=window, ddof=1)
+    roll = pd.Series(arr).rolling(window=window)
+    if njit is not None and arr.shape[0] > _NUMBA_ROLL_THRESHOLD:
+        return roll.std(**_NUMBA_ROLL_KW).to_numpy()
+    return roll.std().to_numpy()
+
+
+@dataclass(slots=True, frozen=True)
+class Indicators:
+    """
+    指标列的SoA容器
+
+    热路径直接持有ndarray列，取最新值是C级下标读（ind.close[-1]），
+    不经过pandas的标签查找和标量装箱。需要DataFrame形态时由
+    calculate_indicators包装一层。
+    """
+    close: np.ndarray
+    fast_ma: np.ndarray
+    slow_ma: np.ndarray
+    super_trend: np.ndarray
+    super_trend_dir: np.ndarray
+    ma_cross: np.ndarray
+    trend_strength: np.ndarray
+    rsi: np.ndarray
+    volatility: np.ndarray
 
 
 @dataclass
@@ -32,134 +95,333 @@ class SuperTrendIndicator:
     def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         计算超级趋势指标
-        
+
+        计算在supertrend_kernel内核中单遍完成（Wilder RMA算ATR +
+        最终轨携带迭代），这里只做列到数组的转换和结果写回。
+
         Args:
             df: 包含high, low, close的DataFrame
-            
+
         Returns:
             DataFrame包含SuperTrend值和方向
         """
-        # 计算ATR (平均真实波动范围)
-        high = df['high']
-        low = df['low']
-        close = df['close']
-        
-        # 真实波动范围
-        tr1 = high - low
-        tr2 = abs(high - close.shift(1))
-        tr3 = abs(low - close.shift(1))
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        
-        # ATR
-        atr = tr.rolling(window=self.period).mean()
-        
-        # 中轨
-        hl2 = (high + low) / 2
-        upper_band = hl2 + self.multiplier * atr
-        lower_band = hl2 - self.multiplier * atr
-        
-        # 超级趋势计算
-        super_trend = pd.Series(index=df.index, dtype=float)
-        direction = pd.Series(index=df.index, dtype=int)
-        
-        for i in range(len(df)):
-            if i == 0:
-                super_trend.iloc[i] = lower_band.iloc[i]
-                direction.iloc[i] = 1
-                continue
-                
-            # 上一期的值
-            prev_st = super_trend.iloc[i-1]
-            prev_dir = direction.iloc[i-1]
-            
-            # 当前值
-            curr_lower = lower_band.iloc[i]
-            curr_upper = upper_band.iloc[i]
-            curr_close = close.iloc[i]
-            prev_close = close.iloc[i-1]
-            
-            if prev_dir == 1:  # 上升趋势
-                if curr_lower > prev_st:
-                    super_trend.iloc[i] = curr_lower
-                else:
-                    super_trend.iloc[i] = prev_st
-                
-                if curr_close < super_trend.iloc[i]:
-                    direction.iloc[i] = -1
-                    super_trend.iloc[i] = curr_upper
-                else:
-                    direction.iloc[i] = 1
-            else:  # 下降趋势
-                if curr_upper < prev_st:
-                    super_trend.iloc[i] = curr_upper
-                else:
-                    super_trend.iloc[i] = prev_st
-                
-                if curr_close > super_trend.iloc[i]:
-                    direction.iloc[i] = 1
-                    super_trend.iloc[i] = curr_lower
-                else:
-                    direction.iloc[i] = -1
-        
+        high = df['high'].to_numpy(dtype=np.float64)
+        low = df['low'].to_numpy(dtype=np.float64)
+        close = df['close'].to_numpy(dtype=np.float64)
+
+        _, super_trend, direction = supertrend_kernel(
+            high, low, close, self.period, self.multiplier
+        )
+
         df['super_trend'] = super_trend
         df['super_trend_dir'] = direction
-        
+
         return df
 
 
 class DMASuperTrendStrategy:
     """DMA + SuperTrend 策略"""
-    
+
+    # 绑定日志器在类定义时做一次：网格搜索按参数组合批量构造
+    # 实例，不为每个实例重复付bind()的分配
+    logger = logger.bind(module="DMASuperTrendStrategy")
+
     def __init__(self, config: StrategyConfig = None):
         self.config = config or StrategyConfig()
         self.super_trend = SuperTrendIndicator(
             period=self.config.super_trend_period,
             multiplier=self.config.super_trend_multiplier
         )
-        self.logger = logger.bind(module="DMASuperTrendStrategy")
+        self.reset_stream()
+
+    def reset_stream(self):
+        """重置流式增量状态"""
+        cfg = self.config
+        self._bars_seen = 0
+        self._prev_close = 0.0
+
+        # SuperTrend递推状态
+        self._atr = 0.0
+        self._st = 0.0
+        self._st_dir = 1
+
+        # 双均线滑动窗口与滚动和
+        self._fast_win = deque(maxlen=cfg.fast_ma)
+        self._slow_win = deque(maxlen=cfg.slow_ma)
+        self._fast_sum = 0.0
+        self._slow_sum = 0.0
+
+        # Wilder RSI递推状态
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+
+        # 波动率：最近20个收益率的滚动和与平方和
+        self._ret_win = deque(maxlen=20)
+        self._ret_sum = 0.0
+        self._ret_sumsq = 0.0
+
+    def warmup(self):
+        """
+        预热策略计算路径
+
+        进程启动后首次调用要付JIT编译/缓存加载和pandas、numpy
+        内部dtype缓存的构建成本（可达数百毫秒）。在initialize阶段
+        用假数据把数组内核和增量更新路径各跑一遍，实盘首根K线
+        就是热路径。结束后重置流式状态，不污染实盘递推。
+        """
+        # 先把全部JIT内核编译/加载一遍（含分类器用的ADX内核）
+        warmup_kernels()
+
+        n = 60
+        base = np.arange(n, dtype=np.float64) % 7.0 + 100.0
+        df = pd.DataFrame({'high': base + 1.0, 'low': base - 1.0, 'close': base})
+        self.super_trend.calculate(df)
+
+        for price in base:
+            self.update(price + 1.0, price - 1.0, price, closed=True)
+        self.update(101.0, 99.0, 100.0, closed=False)
+        self.reset_stream()
+
+    def update(self, high: float, low: float, close: float,
+               closed: bool = True) -> Tuple[str, float, Dict[str, Any]]:
+        """
+        增量更新一根K线并生成信号，O(1)每根
+
+        所有指标都维护递推状态（Wilder ATR/RSI、滚动和均线、滚动
+        方差波动率），每根K线只做常数次运算，不再对整个窗口重算。
+        closed=False用于盘中未收盘K线：按当前值试算信号但不写回
+        状态，同一根K线的后续更新不会被重复计入。
+
+        Args:
+            high/low/close: 当前K线
+            closed: 该K线是否已收盘
+
+        Returns:
+            (信号类型, 置信度, 元数据)
+        """
+        cfg = self.config
+        i = self._bars_seen
+
+        # --- ATR (Wilder RMA，前period根用累计均值预热) ---
+        if i == 0:
+            tr = high - low
+            atr = tr
+        else:
+            tr = max(high - low,
+                     abs(high - self._prev_close),
+                     abs(low - self._prev_close))
+            if i < cfg.super_trend_period:
+                atr = (self._atr * i + tr) / (i + 1)
+            else:
+                atr = (self._atr * (cfg.super_trend_period - 1) + tr) \
+                    / cfg.super_trend_period
+
+        # --- SuperTrend携带规则 ---
+        hl2 = (high + low) * 0.5
+        upper = hl2 + cfg.super_trend_multiplier * atr
+        lower = hl2 - cfg.super_trend_multiplier * atr
+        if i == 0:
+            st = lower
+            st_dir = 1
+        elif self._st_dir == 1:
+            st = lower if lower > self._st else self._st
+            if close < st:
+                st_dir = -1
+                st = upper
+            else:
+                st_dir = 1
+        else:
+            st = upper if upper < self._st else self._st
+            if close > st:
+                st_dir = 1
+                st = lower
+            else:
+                st_dir = -1
+
+        # --- 双均线（滚动和） ---
+        fast_old = self._fast_win[0] if len(self._fast_win) == cfg.fast_ma else 0.0
+        fast_sum = self._fast_sum + close - fast_old
+        fast_ma = fast_sum / min(len(self._fast_win) + 1, cfg.fast_ma)
+
+        slow_old = self._slow_win[0] if len(self._slow_win) == cfg.slow_ma else 0.0
+        slow_sum = self._slow_sum + close - slow_old
+        slow_ma = slow_sum / min(len(self._slow_win) + 1, cfg.slow_ma)
+
+        ma_cross = 1 if fast_ma > slow_ma else (-1 if fast_ma < slow_ma else 0)
+        trend_strength = abs(fast_ma - slow_ma) / slow_ma if slow_ma else 0.0
+
+        # --- Wilder RSI(14) ---
+        if i == 0:
+            avg_gain = avg_loss = 0.0
+            rsi = 50.0
+        else:
+            delta = close - self._prev_close
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            if i <= 14:
+                avg_gain = (self._avg_gain * (i - 1) + gain) / i
+                avg_loss = (self._avg_loss * (i - 1) + loss) / i
+            else:
+                avg_gain = (self._avg_gain * 13 + gain) / 14
+                avg_loss = (self._avg_loss * 13 + loss) / 14
+            if avg_loss > 0:
+                rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+            else:
+                rsi = 100.0 if avg_gain > 0 else 50.0
+
+        # --- 波动率（最近20个收益率的样本标准差） ---
+        volatility = 0.0
+        ret_sum, ret_sumsq = self._ret_sum, self._ret_sumsq
+        if i > 0 and self._prev_close:
+            ret = close / self._prev_close - 1.0
+            if len(self._ret_win) == 20:
+                old = self._ret_win[0]
+                ret_sum -= old
+                ret_sumsq -= old * old
+            ret_sum += ret
+            ret_sumsq += ret * ret
+            m = min(len(self._ret_win) + 1, 20)
+            if m > 1:
+                var = (ret_sumsq - ret_sum * ret_sum / m) / (m - 1)
+                volatility = var ** 0.5 if var > 0 else 0.0
+
+        # --- 写回状态（仅收盘K线） ---
+        if closed:
+            self._bars_seen = i + 1
+            self._atr = atr
+            self._st = st
+            self._st_dir = st_dir
+            self._fast_win.append(close)
+            self._slow_win.append(close)
+            self._fast_sum = fast_sum
+            self._slow_sum = slow_sum
+            if i > 0:
+                self._avg_gain = avg_gain
+                self._avg_loss = avg_loss
+                if self._prev_close:
+                    self._ret_win.append(close / self._prev_close - 1.0)
+                    self._ret_sum = ret_sum
+                    self._ret_sumsq = ret_sumsq
+            self._prev_close = close
+
+        # --- 信号判定（与generate_signal相同的规则） ---
+        if i + 1 < max(cfg.fast_ma, cfg.slow_ma, cfg.super_trend_period):
+            return "hold", 0.0, {}
+
+        current_price = close
+        if ma_cross == 1 and st_dir == 1 and current_price > st:
+            signal = "buy"
+            confidence = self._calculate_buy_confidence(
+                trend_strength, rsi, st, volatility, current_price)
+        elif ma_cross == -1 and st_dir == -1 and current_price < st:
+            signal = "sell"
+            confidence = self._calculate_sell_confidence(
+                trend_strength, rsi, st, volatility, current_price)
+        else:
+            signal = "hold"
+            confidence = 0.5
+
+        metadata = {
+            'fast_ma': fast_ma,
+            'slow_ma': slow_ma,
+            'super_trend': st,
+            'trend_strength': trend_strength,
+            'rsi': rsi,
+            'volatility': volatility,
+        }
+        if signal == "hold":
+            metadata['reason'] = 'no_clear_signal'
+
+        if confidence < cfg.min_confidence:
+            signal = "hold"
+            confidence = max(confidence, 0.5)
+
+        return signal, confidence, metadata
     
     def calculate_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         计算所有技术指标
-        
+
+        入参只读：指标在ndarray上算好后组装成新DataFrame返回，
+        原始列零拷贝引用进去。调用方不需要为保护自己的df先做
+        整帧copy()。
+
         Args:
             df: K线数据
-            
+
         Returns:
-            包含指标的DataFrame
+            包含原始列和指标列的新DataFrame
         """
-        # 计算双均线
-        df['fast_ma'] = df['close'].rolling(window=self.config.fast_ma).mean()
-        df['slow_ma'] = df['close'].rolling(window=self.config.slow_ma).mean()
-        
-        # 计算SuperTrend
-        df = self.super_trend.calculate(df)
-        
-        # 计算金叉/死叉
-        df['ma_cross'] = 0
-        df.loc[df['fast_ma'] > df['slow_ma'], 'ma_cross'] = 1
-        df.loc[df['fast_ma'] < df['slow_ma'], 'ma_cross'] = -1
-        
-        # 计算趋势强度
-        df['trend_strength'] = abs(df['fast_ma'] - df['slow_ma']) / df['slow_ma']
-        
-        # 计算RSI (14周期)
-        df['rsi'] = self._calculate_rsi(df['close'], period=14)
-        
-        # 计算波动率
-        df['volatility'] = df['close'].pct_change().rolling(window=20).std()
-        
-        return df
+        ind = self._compute_indicator_arrays(df)
+        data = {col: df[col] for col in df.columns}
+        data.update({
+            'fast_ma': ind.fast_ma,
+            'slow_ma': ind.slow_ma,
+            'super_trend': ind.super_trend,
+            'super_trend_dir': ind.super_trend_dir,
+            'ma_cross': ind.ma_cross,
+            'trend_strength': ind.trend_strength,
+            'rsi': ind.rsi,
+            'volatility': ind.volatility,
+        })
+        return pd.DataFrame(data, index=df.index)
+
+    def _compute_indicator_arrays(self, df: pd.DataFrame) -> Indicators:
+        """
+        从K线DataFrame算出全部指标的ndarray列
+
+        generate_signal和优化器回测直接消费这个SoA容器，
+        整个计算和读取路径不再物化指标DataFrame。
+        """
+        high = df['high'].to_numpy(dtype=np.float64)
+        low = df['low'].to_numpy(dtype=np.float64)
+        close = df['close'].to_numpy(dtype=np.float64)
+
+        # 双均线
+        fast_ma = _move_mean(close, self.config.fast_ma)
+        slow_ma = _move_mean(close, self.config.slow_ma)
+
+        # SuperTrend（单遍内核）
+        _, super_trend, st_dir = supertrend_kernel(
+            high, low, close,
+            self.config.super_trend_period, self.config.super_trend_multiplier)
+
+        # 金叉/死叉与趋势强度：一次np.sign代替三次掩码遍历，
+        # int8列只占1字节；预热段的NaN归零后落在0（无交叉）
+        diff = fast_ma - slow_ma
+        trend_strength = np.abs(diff) / slow_ma
+        ma_cross = np.nan_to_num(np.sign(diff, out=diff),
+                                 copy=False).astype(np.int8)
+
+        # RSI (14周期，Wilder平滑)
+        rsi = rsi_kernel(close, 14)
+
+        # 波动率：收益率直接在ndarray上算，不经过pct_change的
+        # Series构造和对齐
+        returns = np.empty_like(close)
+        returns[0] = np.nan
+        np.divide(close[1:], close[:-1], out=returns[1:])
+        returns[1:] -= 1.0
+        volatility = _move_std(returns, 20)
+
+        # 派生指标降到float32：整条流水线是访存受限的，指标只喂
+        # 给百分位阈值比较，3位有效数字足够，列内存带宽减半。
+        # 内核内部递推仍用float64，只在边界降精度
+        f32 = np.float32
+        return Indicators(close=close,
+                          fast_ma=fast_ma.astype(f32),
+                          slow_ma=slow_ma.astype(f32),
+                          super_trend=super_trend.astype(f32),
+                          super_trend_dir=st_dir,
+                          ma_cross=ma_cross,
+                          trend_strength=trend_strength.astype(f32),
+                          rsi=rsi.astype(f32),
+                          volatility=volatility.astype(f32))
     
     def _calculate_rsi(self, prices: pd.Series, period: int = 14) -> pd.Series:
-        """计算RSI指标"""
-        delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
+        """计算RSI指标（Wilder平滑，单遍内核）"""
+        return pd.Series(rsi_kernel(prices.to_numpy(dtype=np.float64), period),
+                         index=prices.index)
     
     def generate_signal(self, df: pd.DataFrame, current_price: float) -> Tuple[str, float, Dict[str, Any]]:
         """
@@ -174,133 +436,223 @@ class DMASuperTrendStrategy:
         """
         if len(df) < max(self.config.fast_ma, self.config.slow_ma, self.config.super_trend_period):
             return "hold", 0.0, {}
-        
-        # 计算指标
-        df_with_indicators = self.calculate_indicators(df.copy())
-        latest = df_with_indicators.iloc[-1]
-        
+
+        # 指标直接算成SoA数组，取最新值是C级下标读，
+        # 不物化指标DataFrame也不经过iloc/标签查找
+        ind = self._compute_indicator_arrays(df)
+        fast_ma = float(ind.fast_ma[-1])
+        slow_ma = float(ind.slow_ma[-1])
+        st = float(ind.super_trend[-1])
+        st_dir = int(ind.super_trend_dir[-1])
+        ma_cross = int(ind.ma_cross[-1])
+        trend_strength = float(ind.trend_strength[-1])
+        rsi = float(ind.rsi[-1])
+        volatility = float(ind.volatility[-1])
+
         # 信号逻辑
-        signal = "hold"
-        confidence = 0.0
-        metadata = {}
-        
-        # 1. 双均线金叉 + SuperTrend看涨
-        if (latest['ma_cross'] == 1 and  # 均线金叉
-            latest['super_trend_dir'] == 1 and  # SuperTrend看涨
-            current_price > latest['super_trend']):  # 价格在SuperTrend上方
-            
+        # 1. 双均线金叉 + SuperTrend看涨，价格在SuperTrend上方
+        if ma_cross == 1 and st_dir == 1 and current_price > st:
             signal = "buy"
-            confidence = self._calculate_buy_confidence(df_with_indicators, latest, current_price)
-            metadata = {
-                'fast_ma': latest['fast_ma'],
-                'slow_ma': latest['slow_ma'],
-                'super_trend': latest['super_trend'],
-                'trend_strength': latest['trend_strength'],
-                'rsi': latest['rsi'],
-                'volatility': latest['volatility']
-            }
-            
-        # 2. 双均线死叉 + SuperTrend看跌
-        elif (latest['ma_cross'] == -1 and  # 均线死叉
-              latest['super_trend_dir'] == -1 and  # SuperTrend看跌
-              current_price < latest['super_trend']):  # 价格在SuperTrend下方
-            
+            confidence = self._calculate_buy_confidence(
+                trend_strength, rsi, st, volatility, current_price)
+        # 2. 双均线死叉 + SuperTrend看跌，价格在SuperTrend下方
+        elif ma_cross == -1 and st_dir == -1 and current_price < st:
             signal = "sell"
-            confidence = self._calculate_sell_confidence(df_with_indicators, latest, current_price)
-            metadata = {
-                'fast_ma': latest['fast_ma'],
-                'slow_ma': latest['slow_ma'],
-                'super_trend': latest['super_trend'],
-                'trend_strength': latest['trend_strength'],
-                'rsi': latest['rsi'],
-                'volatility': latest['volatility']
-            }
-        
+            confidence = self._calculate_sell_confidence(
+                trend_strength, rsi, st, volatility, current_price)
         # 3. 横盘或不确定，保持观望
         else:
             signal = "hold"
             confidence = 0.5
-            metadata = {
-                'reason': 'no_clear_signal',
-                'fast_ma': latest['fast_ma'],
-                'slow_ma': latest['slow_ma'],
-                'super_trend': latest['super_trend'],
-                'trend_strength': latest['trend_strength']
-            }
-        
+
+        metadata = {
+            'fast_ma': fast_ma,
+            'slow_ma': slow_ma,
+            'super_trend': st,
+            'trend_strength': trend_strength,
+            'rsi': rsi,
+            'volatility': volatility,
+        }
+        if signal == "hold":
+            metadata['reason'] = 'no_clear_signal'
+
         # 如果置信度低于阈值，改为hold
         if confidence < self.config.min_confidence:
             signal = "hold"
             confidence = max(confidence, 0.5)
-        
+
         return signal, confidence, metadata
     
-    def _calculate_buy_confidence(self, df: pd.DataFrame, latest: pd.Series, current_price: float) -> float:
+    def generate_signals_vectorized(self, df_ind: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        对整个指标DataFrame一次性生成信号列
+
+        与signal_from_values逐bar判定结果一致，但所有谓词和置信度
+        都在整列ndarray上用布尔掩码/np.where算出，回测评估没有
+        Python级逐行工作。指标为NaN的预热段比较结果为False，
+        自然落在hold分支。
+
+        Args:
+            df_ind: calculate_indicators的输出DataFrame，
+                或_compute_indicator_arrays的Indicators容器
+
+        Returns:
+            (信号数组, 置信度数组)，信号取值'buy'/'sell'/'hold'
+        """
+        if isinstance(df_ind, Indicators):
+            ind = df_ind
+        else:
+            ind = Indicators(*(df_ind[f].to_numpy() for f in (
+                'close', 'fast_ma', 'slow_ma', 'super_trend',
+                'super_trend_dir', 'ma_cross', 'trend_strength',
+                'rsi', 'volatility')))
+        close = ind.close
+        ma_cross = ind.ma_cross
+        st_dir = ind.super_trend_dir
+        st = ind.super_trend
+        ts = ind.trend_strength
+        rsi = ind.rsi
+        vol = ind.volatility
+        n = close.shape[0]
+
+        buy_mask = (ma_cross == 1) & (st_dir == 1) & (close > st)
+        sell_mask = (ma_cross == -1) & (st_dir == -1) & (close < st)
+
+        # 置信度评分：side=+1按买入规则、-1按卖出规则
+        side = np.where(buy_mask, 1.0, -1.0)
+        st_distance = side * (close - st) / st
+        conf = self._confidence_vectorized(ts, rsi, st_distance, vol, side)
+
+        # 低置信度信号降级为hold；hold的置信度统一为0.5
+        active = buy_mask | sell_mask
+        keep = active & (conf >= self.config.min_confidence)
+        signals = np.where(keep & buy_mask, 'buy',
+                           np.where(keep & sell_mask, 'sell', 'hold'))
+        confidence = np.where(keep, conf, np.maximum(np.where(active, conf, 0.5), 0.5))
+        return signals, confidence
+
+    @staticmethod
+    def _confidence_vectorized(trend_strength: np.ndarray, rsi: np.ndarray,
+                               st_distance: np.ndarray, volatility: np.ndarray,
+                               side: np.ndarray) -> np.ndarray:
+        """
+        无分支的批量置信度评分
+
+        与标量_calculate_buy/sell_confidence同一套阈值和加减项，
+        但全部用np.select/np.where在整列上算。买卖的RSI规则互为
+        镜像：side=-1时把RSI映到100-rsi，超买奖励/超卖惩罚自动
+        翻转，不需要按方向写两份条件。NaN经比较后落到0贡献。
+
+        Args:
+            trend_strength/rsi/st_distance/volatility: 指标列
+            side: +1按买入规则评分，-1按卖出规则
+
+        Returns:
+            置信度数组，上限0.95
+        """
+        conf = np.full(trend_strength.shape[0], 0.6)
+        conf += np.select([trend_strength > 0.02, trend_strength > 0.01],
+                          [0.15, 0.08], 0.0)
+        r = np.where(side > 0, rsi, 100.0 - rsi)
+        conf += np.select([(r > 30) & (r < 70), r <= 30, r >= 70],
+                          [0.1, 0.15, -0.1], 0.0)
+        conf += np.where(st_distance > 0.01, 0.05, 0.0)
+        conf += np.select([(volatility > 0.01) & (volatility < 0.05),
+                           volatility > 0.08],
+                          [0.05, -0.1], 0.0)
+        return np.minimum(conf, 0.95)
+
+    def signal_from_values(self, ma_cross: int, st_dir: int, st: float,
+                           trend_strength: float, rsi: float, volatility: float,
+                           current_price: float) -> Tuple[str, float]:
+        """
+        从已算好的指标标量判定信号
+
+        generate_signal/优化器回测共用的纯判定逻辑：指标由调用方
+        一次性批量算好，这里只做标量比较，不再触发任何指标重算。
+
+        Returns:
+            (信号类型, 置信度)
+        """
+        if ma_cross == 1 and st_dir == 1 and current_price > st:
+            signal = "buy"
+            confidence = self._calculate_buy_confidence(
+                trend_strength, rsi, st, volatility, current_price)
+        elif ma_cross == -1 and st_dir == -1 and current_price < st:
+            signal = "sell"
+            confidence = self._calculate_sell_confidence(
+                trend_strength, rsi, st, volatility, current_price)
+        else:
+            return "hold", 0.5
+
+        if confidence < self.config.min_confidence:
+            return "hold", max(confidence, 0.5)
+        return signal, confidence
+
+    def _calculate_buy_confidence(self, trend_strength: float, rsi: float,
+                                  super_trend: float, volatility: float,
+                                  current_price: float) -> float:
         """计算买入置信度"""
         confidence = 0.6  # 基础置信度
-        
+
         # 1. 趋势强度
-        trend_strength = latest['trend_strength']
         if trend_strength > 0.02:  # 趋势较强
             confidence += 0.15
         elif trend_strength > 0.01:
             confidence += 0.08
-        
+
         # 2. RSI条件 (不超买)
-        rsi = latest['rsi']
         if 30 < rsi < 70:  # 理想范围
             confidence += 0.1
         elif rsi <= 30:  # 超卖，可能反弹
             confidence += 0.15
         elif rsi >= 70:  # 超买，风险
             confidence -= 0.1
-        
+
         # 3. 价格与SuperTrend的距离
-        st_distance = (current_price - latest['super_trend']) / latest['super_trend']
+        st_distance = (current_price - super_trend) / super_trend
         if st_distance > 0.01:  # 价格明显高于SuperTrend
             confidence += 0.05
-        
+
         # 4. 波动率适中
-        volatility = latest['volatility']
         if 0.01 < volatility < 0.05:  # 适中波动
             confidence += 0.05
         elif volatility > 0.08:  # 波动过大
             confidence -= 0.1
-        
+
         return min(confidence, 0.95)
-    
-    def _calculate_sell_confidence(self, df: pd.DataFrame, latest: pd.Series, current_price: float) -> float:
+
+    def _calculate_sell_confidence(self, trend_strength: float, rsi: float,
+                                   super_trend: float, volatility: float,
+                                   current_price: float) -> float:
         """计算卖出置信度"""
         confidence = 0.6  # 基础置信度
-        
+
         # 1. 趋势强度
-        trend_strength = latest['trend_strength']
         if trend_strength > 0.02:  # 趋势较强
             confidence += 0.15
         elif trend_strength > 0.01:
             confidence += 0.08
-        
+
         # 2. RSI条件
-        rsi = latest['rsi']
         if 30 < rsi < 70:  # 理想范围
             confidence += 0.1
         elif rsi >= 70:  # 超买，可能回调
             confidence += 0.15
         elif rsi <= 30:  # 超卖，可能反弹
             confidence -= 0.1
-        
+
         # 3. 价格与SuperTrend的距离
-        st_distance = (latest['super_trend'] - current_price) / latest['super_trend']
+        st_distance = (super_trend - current_price) / super_trend
         if st_distance > 0.01:  # 价格明显低于SuperTrend
             confidence += 0.05
-        
+
         # 4. 波动率适中
-        volatility = latest['volatility']
         if 0.01 < volatility < 0.05:  # 适中波动
             confidence += 0.05
         elif volatility > 0.08:  # 波动过大
             confidence -= 0.1
-        
+
         return min(confidence, 0.95)
     
     def get_required_history(self) -> int:
@@ -325,10 +677,9 @@ class DMASuperTrendStrategy:
 
 class MarketClassifier:
     """市场状态分类器"""
-    
-    def __init__(self):
-        self.logger = logger.bind(module="MarketClassifier")
-    
+
+    logger = logger.bind(module="MarketClassifier")
+
     def classify(self, df: pd.DataFrame) -> str:
         """
         分类市场状态
@@ -364,39 +715,20 @@ class MarketClassifier:
         return "trend"
     
     def _calculate_adx(self, df: pd.DataFrame, period: int = 14) -> float:
-        """计算ADX指标"""
-        high = df['high']
-        low = df['low']
-        close = df['close']
-        
-        # 计算+DM和-DM
-        plus_dm = high.diff()
-        minus_dm = low.diff()
-        plus_dm[plus_dm < 0] = 0
-        minus_dm[minus_dm > 0] = 0
-        
-        # 计算真实波动范围
-        tr1 = high - low
-        tr2 = abs(high - close.shift(1))
-        tr3 = abs(low - close.shift(1))
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        
-        # 计算平滑后的值
-        plus_di = 100 * (plus_dm.rolling(window=period).mean() / tr.rolling(window=period).mean())
-        minus_di = abs(100 * (minus_dm.rolling(window=period).mean() / tr.rolling(window=period).mean()))
-        
-        # 计算ADX
-        dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
-        adx = dx.rolling(window=period).mean().iloc[-1]
-        
-        return adx if not pd.isna(adx) else 0
+        """计算ADX指标（Wilder递推内核，只算最新值）"""
+        return float(adx_kernel(
+            df['high'].to_numpy(dtype=np.float64),
+            df['low'].to_numpy(dtype=np.float64),
+            df['close'].to_numpy(dtype=np.float64),
+            period))
 
 
 class TimeframeOptimizer:
     """时间框架优化器"""
-    
+
+    logger = logger.bind(module="TimeframeOptimizer")
+
     def __init__(self):
-        self.logger = logger.bind(module="TimeframeOptimizer")
         self.timeframes = ['5m', '15m', '30m', '1h', '4h']
     
     def recommend_timeframe(self, symbol: str, volatility: float, 
@@ -470,36 +802,39 @@ class TimeframeOptimizer:
         Returns:
             最优参数
         """
-        # 简化的网格搜索
-        best_params = None
-        best_score = -float('inf')
-        
-        # 生成参数组合（简化版本，实际可使用贝叶斯优化）
-        for fast_ma in param_ranges.get('fast_ma', [9]):
-            for slow_ma in param_ranges.get('slow_ma', [21]):
-                if slow_ma <= fast_ma:
-                    continue
-                
-                for st_period in param_ranges.get('super_trend_period', [10]):
-                    for st_mult in param_ranges.get('super_trend_multiplier', [3.0]):
-                        # 评估参数组合
-                        score = self._evaluate_params(df, fast_ma, slow_ma, st_period, st_mult)
-                        
-                        if score > best_score:
-                            best_score = score
-                            best_params = {
-                                'fast_ma': fast_ma,
-                                'slow_ma': slow_ma,
-                                'super_trend_period': st_period,
-                                'super_trend_multiplier': st_mult,
-                                'score': score
-                            }
-        
-        return best_params or {}
+        # 简化的网格搜索：组合之间相互独立（embarrassingly parallel），
+        # joblib可用且组合够多时按核并行评估，否则串行
+        combos = [(fast_ma, slow_ma, st_period, st_mult)
+                  for fast_ma, slow_ma, st_period, st_mult in product(
+                      param_ranges.get('fast_ma', [9]),
+                      param_ranges.get('slow_ma', [21]),
+                      param_ranges.get('super_trend_period', [10]),
+                      param_ranges.get('super_trend_multiplier', [3.0]))
+                  if slow_ma > fast_ma]
+        if not combos:
+            return {}
+
+        if joblib is not None and len(combos) > 1:
+            scores = joblib.Parallel(n_jobs=-1, prefer='processes')(
+                joblib.delayed(self._evaluate_params)(df, *combo)
+                for combo in combos)
+        else:
+            scores = [self._evaluate_params(df, *combo) for combo in combos]
+
+        best_idx = int(np.argmax(scores))
+        fast_ma, slow_ma, st_period, st_mult = combos[best_idx]
+        return {
+            'fast_ma': fast_ma,
+            'slow_ma': slow_ma,
+            'super_trend_period': st_period,
+            'super_trend_multiplier': st_mult,
+            'score': scores[best_idx],
+        }
     
-    def _evaluate_params(self, df: pd.DataFrame, fast_ma: int, slow_ma: int, 
-                        st_period: int, st_mult: float) -> float:
-        """评估参数组合"""
+    @staticmethod
+    def _evaluate_params(df: pd.DataFrame, fast_ma: int, slow_ma: int,
+                         st_period: int, st_mult: float) -> float:
+        """评估参数组合（静态方法：多进程分发时只序列化数据不序列化实例）"""
         strategy = DMASuperTrendStrategy(
             StrategyConfig(
                 fast_ma=fast_ma,
@@ -509,24 +844,21 @@ class TimeframeOptimizer:
             )
         )
         
-        # 简化回测评估
-        signals = []
-        for i in range(len(df) - 1):
-            if i < max(fast_ma, slow_ma, st_period) + 50:
-                continue
-            
-            subset = df.iloc[:i+1]
-            signal, confidence, _ = strategy.generate_signal(subset, df.iloc[i]['close'])
-            
-            if signal in ['buy', 'sell']:
-                signals.append((signal, confidence))
-        
-        if not signals:
+        # 简化回测评估：指标全部递推/滚动且只依赖历史，在全量数据上
+        # 批量算一次，逐bar读第i行的值与逐bar在df.iloc[:i+1]上重算
+        # 结果相同——整体O(N)而不是每根K线O(i)重算的O(N^2)
+        ind = strategy._compute_indicator_arrays(df)
+        signals, confidence = strategy.generate_signals_vectorized(ind)
+
+        # 只统计预热期之后、最后一根之前的bar
+        start = max(fast_ma, slow_ma, st_period) + 50
+        active = signals[start:len(df) - 1] != 'hold'
+        signal_count = int(np.count_nonzero(active))
+
+        if not signal_count:
             return 0
-        
-        # 计算平均置信度和信号数量
-        avg_confidence = sum(s for _, s in signals) / len(signals)
-        signal_count = len(signals)
+
+        avg_confidence = float(confidence[start:len(df) - 1][active].mean())
         
         # 评分：高置信度 + 适度信号数量
         score = avg_confidence * 0.7 + min(signal_count / 50, 1.0) * 0.3
@@ -1,7 +1,6 @@
-"""
-工具模块
-"""
-from .logger import setup_logger
-from .helpers import calculate_position_size, calculate_stop_loss
-
-__all__ = ['setup_logger', 'calculate_position_size', 'calculate_stop_loss']
\ No newline at end of file
+"""
+工具模块
+"""
+from .logger import setup_logger
+
+__all__ = ['setup_logger']
@@ -5,7 +5,9 @@
 
 import asyncio
 import functools
+import heapq
 import time
+from collections import deque
 from typing import Callable, Any, Optional
 import logging
 
@@ -88,23 +90,27 @@ def rate_limit(calls: int = 10, period: float = 1.0):
         装饰器函数
     """
     def decorator(func: Callable) -> Callable:
-        call_times = []
-        
+        # 时间戳天然递增，deque两端的C级popleft/append让清理
+        # 摊还O(1)，不再每次调用重建整张列表
+        call_times = deque()
+
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
-            nonlocal call_times
-            
             # 清理过期的调用记录
             current_time = time.time()
-            call_times = [t for t in call_times if current_time - t < period]
-            
+            while call_times and current_time - call_times[0] >= period:
+                call_times.popleft()
+
             # 检查是否超过限制
             if len(call_times) >= calls:
                 sleep_time = period - (current_time - call_times[0])
                 if sleep_time > 0:
                     await asyncio.sleep(sleep_time)
-                call_times = [t for t in call_times if current_time - t < period]
-            
+                # 醒来后用新时钟再清一遍
+                current_time = time.time()
+                while call_times and current_time - call_times[0] >= period:
+                    call_times.popleft()
+
             result = await func(*args, **kwargs)
             call_times.append(time.time())
             return result
@@ -126,36 +132,38 @@ def cache_result(ttl: float = 60.0, key_func: Optional[Callable] = None):
     """
     def decorator(func: Callable) -> Callable:
         cache = {}
-        
+        # 按到期时间排序的最小堆：淘汰只看堆顶，摊还O(log N)，
+        # 不再每次调用全量扫描cache找过期键
+        expiry_heap = []
+
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
-            nonlocal cache
-            
             # 生成缓存键
             if key_func:
                 cache_key = key_func(*args, **kwargs)
             else:
                 cache_key = str(args) + str(sorted(kwargs.items()))
-            
-            # 检查缓存
+
             current_time = time.time()
-            if cache_key in cache:
-                result, timestamp = cache[cache_key]
-                if current_time - timestamp < ttl:
-                    return result
-            
+
+            # 弹出所有已到期的堆顶；同键被刷新过时条目可能还新鲜，
+            # 删除前按实际时间戳再确认一次
+            while expiry_heap and expiry_heap[0][0] <= current_time:
+                _, k = heapq.heappop(expiry_heap)
+                entry = cache.get(k)
+                if entry is not None and current_time - entry[1] >= ttl:
+                    del cache[k]
+
+            # 检查缓存
+            entry = cache.get(cache_key)
+            if entry is not None and current_time - entry[1] < ttl:
+                return entry[0]
+
             # 执行函数并缓存结果
             result = await func(*args, **kwargs)
             cache[cache_key] = (result, current_time)
-            
-            # 清理过期缓存
-            expired_keys = [
-                k for k, (_, t) in cache.items() 
-                if current_time - t > ttl
-            ]
-            for k in expired_keys:
-                del cache[k]
-            
+            heapq.heappush(expiry_heap, (current_time + ttl, cache_key))
+
             return result
         
         return wrapper
@@ -219,5 +227,4 @@ def validate_args(**validators):
             return await func(*args, **kwargs)
         
         return wrapper
-    return decorator</parameter>
-</write_to_file>
\ No newline at end of file
+    return decorator
@@ -11,6 +11,36 @@ from loguru import logger
 import json
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # orjson为可选加速依赖，缺失时用标准库json
+    orjson = None
+
+
+def _json_formatter(record) -> str:
+    """
+    JSON行格式化器（模块级函数，loguru每条记录调用一次）
+
+    直接用record['time']（loguru已备好的datetime），不再每行
+    额外调datetime.now()；orjson可用时序列化快3-5倍。loguru把
+    返回值当作格式模板再做一次插值，JSON体里的花括号不能直接
+    出现在模板里，所以序列化结果塞进extra经{extra[serialized]}
+    原样输出——这是loguru官方的结构化输出写法。
+    """
+    log_obj = {
+        'time': record['time'].isoformat(),
+        'level': record['level'].name,
+        'module': record['name'],
+        'function': record['function'],
+        'line': record['line'],
+        'message': record['message'],
+    }
+    if orjson is not None:
+        record['extra']['serialized'] = orjson.dumps(log_obj).decode()
+    else:
+        record['extra']['serialized'] = json.dumps(log_obj, ensure_ascii=False)
+    return '{extra[serialized]}\n'
+
 
 class JsonFormatter(logging.Formatter):
     """JSON格式日志处理器"""
@@ -77,14 +107,7 @@ def setup_logger(
             logger.add(
                 str(log_path),
                 level=level,
-                format=lambda record: json.dumps({
-                    'time': datetime.now().isoformat(),
-                    'level': record['level'].name,
-                    'module': record['name'],
-                    'function': record['function'],
-                    'line': record['line'],
-                    'message': record['message'],
-                }, ensure_ascii=False),
+                format=_json_formatter,
                 rotation="10 MB",
                 retention="30 days",
                 compression="zip"